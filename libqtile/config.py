@@ -78,7 +78,7 @@ class Key(object):
         self.keysym = xcbq.keysyms[key]
         try:
             self.modmask = xcbq.translate_masks(self.modifiers)
-        except KeyError as v:
+        except xcbq.XCBQError as v:
             raise utils.QtileError(v)
 
     def __repr__(self):
@@ -131,6 +131,10 @@ class Mouse:
         self.button = button
         self.commands = commands
         self.button_code = int(self.button.replace('Button', ''))
+        try:
+            self.modmask = xcbq.translate_masks(self.modifiers)
+        except xcbq.XCBQError as v:
+            raise utils.QtileError(v)
         for k, v in kwargs.items():
             setattr(self, k, v)
 
@@ -143,7 +147,16 @@ class Drag(Mouse):
 
     It focuses clicked window by default.  If you want to prevent it pass,
     `focus=None` as an argument
+
+    The command is executed at most `frame_rate` times per second (60 by
+    default, 0 for every motion event), with the latest pointer position.
+    Moving or resizing a floating window can instead show the new geometry
+    as an outline and only apply it on release, by passing a colour as
+    `outline`, e.g. `outline="#ffffff"`.
     """
+    frame_rate = 60
+    outline = None
+
     def __repr__(self):
         return "<Drag (%s, %s)>" % (self.modifiers, self.button)
 
@@ -314,6 +327,8 @@ class Screen(command.CommandObject):
         self.y = y
         self.width = width
         self.height = height
+        if qtile is not None:
+            qtile.screen_rects.update(self, x, y, x + width, y + height)
         self.set_group(group)
         for i in self.gaps:
             i._configure(qtile, self)
@@ -4,9 +4,11 @@ import typing
 
 class Core(metaclass=ABCMeta):
     @abstractmethod
-    def get_keys(self) -> typing.List[str]:
+    def get_keys(self) -> typing.AbstractSet[str]:
+        """The names of the valid keys, as a set for fast lookups"""
         pass
 
     @abstractmethod
-    def get_modifiers(self) -> typing.List[str]:
+    def get_modifiers(self) -> typing.AbstractSet[str]:
+        """The names of the valid modifiers, as a set for fast lookups"""
         pass
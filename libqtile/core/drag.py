@@ -0,0 +1,154 @@
+# Copyright (c) 2019 Qtile contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+    Mouse drags, applied at most once per frame.
+
+    Motion events only record the pointer position. The drag commands are
+    called with the latest position when the next frame is due, so a fast
+    drag configures the window once per frame instead of once per event.
+"""
+from .. import command, hook
+from .. import window
+from ..log_utils import logger
+
+# the commands whose result is known, and which can be shown as an outline
+_OUTLINE_COMMANDS = ("set_position_floating", "set_size_floating")
+
+
+class _Outline:
+    """Four thin windows drawing the edges of a rectangle"""
+
+    def __init__(self, qtile, color, width=2):
+        self.width = width
+        self.edges = []
+        for _ in range(4):
+            edge = window.Internal.create(qtile, 0, 0, 1, 1)
+            edge.window.set_attribute(backpixel=qtile.color_pixel(color))
+            self.edges.append(edge)
+
+    def show(self, x, y, width, height):
+        b = self.width
+        width = max(width, 2 * b)
+        height = max(height, 2 * b)
+        rects = [
+            (x, y, width, b),
+            (x, y + height - b, width, b),
+            (x, y, b, height),
+            (x + width - b, y, b, height),
+        ]
+        for edge, (ex, ey, ew, eh) in zip(self.edges, rects):
+            edge.place(ex, ey, ew, eh, 0, None, above=True)
+            edge.unhide()
+
+    def kill(self):
+        for edge in self.edges:
+            edge.kill()
+
+
+class DragState:
+    """A drag in progress, started by a Drag binding"""
+
+    def __init__(self, qtile, drag, x, y, rx, ry):
+        self.qtile = qtile
+        self.commands = drag.commands
+        self.origin = (x, y, rx, ry)
+        self.interval = 1 / drag.frame_rate if drag.frame_rate else 0
+        self.pointer = None
+        self.last_frame = None
+        self.frame = None
+        self.float_changed = False
+        self.position = None
+        self.target = qtile.current_window
+        self.outline = None
+        if drag.outline and self.target is not None and self.commands and all(
+            i.name in _OUTLINE_COMMANDS and i.selectors == [("window", None)]
+            for i in self.commands
+        ):
+            self.outline = _Outline(qtile, drag.outline)
+
+    def motion(self, x, y):
+        """Record the pointer position, and schedule a frame if needed"""
+        self.pointer = (x, y)
+        if self.frame is not None:
+            return
+        now = self.qtile._eventloop.time()
+        if self.last_frame is None or now >= self.last_frame + self.interval:
+            self.apply()
+        else:
+            self.frame = self.qtile.call_later(
+                self.last_frame + self.interval - now, self.apply
+            )
+
+    def apply(self):
+        """Apply the latest pointer position"""
+        self.frame = None
+        if self.pointer is None:
+            return
+        x, y = self.pointer
+        self.pointer = None
+        self.last_frame = self.qtile._eventloop.time()
+        ox, oy, rx, ry = self.origin
+        dx = x - ox
+        dy = y - oy
+        if not (dx or dy):
+            return
+        self.position = (rx + dx, ry + dy, x, y)
+        if self.outline is not None:
+            self._show_outline(rx + dx, ry + dy)
+        else:
+            self._call(self.position)
+
+    def _show_outline(self, a, b):
+        target = self.target
+        border = 2 * target.borderwidth
+        if self.commands[0].name == "set_size_floating":
+            self.outline.show(target.x, target.y, a + border, b + border)
+        else:
+            self.outline.show(a, b, target.width + border,
+                              target.height + border)
+
+    def _call(self, position):
+        for i in self.commands:
+            if i.check(self.qtile):
+                status, val = self.qtile.server.call((
+                    i.selectors,
+                    i.name,
+                    i.args + position,
+                    i.kwargs
+                ))
+                if status in (command.ERROR, command.EXCEPTION):
+                    logger.error(
+                        "Mouse command error %s: %s" % (i.name, val)
+                    )
+
+    def finish(self):
+        """End the drag, applying the last position right away"""
+        if self.frame is not None:
+            self.frame.cancel()
+        self.apply()
+        if self.outline is not None:
+            self.outline.kill()
+            if self.position is not None:
+                self._call(self.position)
+        if self.qtile._drag is self:
+            self.qtile._drag = None
+        if self.float_changed:
+            hook.fire("float_change")
@@ -29,6 +29,7 @@ import pickle
 import shlex
 import signal
 import sys
+import tempfile
 import traceback
 import xcffib
 import xcffib.xinerama
@@ -43,14 +44,18 @@ from ..group import _Group
 from ..scratchpad import ScratchPad
 from ..log_utils import logger
 from ..state import QtileState
-from ..utils import QtileError, get_cache_dir
+from ..utils import QtileError, get_cache_dir, get_runtime_dir
 from ..widget.base import _Widget
 from ..extension.base import _Extension
 from .. import command
+from .. import fuzzy
 from .. import hook
+from .. import metrics
+from .. import mixer
+from .. import spatial
 from .. import utils
 from .. import window
-from . import xcbq
+from . import drag, xcbq
 
 
 def _import_module(module_name, dir_path):
@@ -77,6 +82,7 @@ class Qtile(command.CommandObject):
         state=None
     ):
         self._restart = False
+        self._restoring = False
         self.no_spawn = no_spawn
 
         self._eventloop = None
@@ -101,6 +107,7 @@ class Qtile(command.CommandObject):
         hook.init(self)
 
         self.windows_map = {}
+        self.window_rects = spatial.RectIndex()
         self.widgets_map = {}
         self.groups_map = {}
         self.groups = []
@@ -185,6 +192,7 @@ class Qtile(command.CommandObject):
 
         self.current_screen = None
         self.screens = []
+        self.screen_rects = spatial.RectIndex()
         self._process_screens()
         self.current_screen = self.screens[0]
         self._drag = None
@@ -227,14 +235,30 @@ class Qtile(command.CommandObject):
             hook.fire("startup_once")
         hook.fire("startup")
 
+        st = None
         if state:
-            st = pickle.load(io.BytesIO(state.encode()))
-            try:
-                st.apply(self)
-            except:  # noqa: E722
-                logger.exception("failed restoring state")
+            st = self._load_state(state)
+            if st is not None:
+                try:
+                    st.apply(self)
+                except:  # noqa: E722
+                    logger.exception("failed restoring state")
+
+        # while restoring, windows are only laid out once all are back
+        self._restoring = st is not None
+        try:
+            self.scan()
+            if st is not None:
+                try:
+                    st.apply_windows(self)
+                except Exception:
+                    logger.exception("failed restoring window state")
+        finally:
+            self._restoring = False
+        if st is not None:
+            for group in self.groups:
+                group.layout_all()
 
-        self.scan()
         self.update_net_desktops()
         hook.subscribe.setgroup(self.update_net_desktops)
 
@@ -323,6 +347,9 @@ class Qtile(command.CommandObject):
 
             for w in self.widgets_map.values():
                 w.finalize()
+            metrics.finalize(self)
+            mixer.finalize(self)
+            fuzzy.finalize(self)
 
             for l in self.config.layouts:
                 l.finalize()
@@ -422,11 +449,8 @@ class Qtile(command.CommandObject):
             yield self.numlock_mask | xcbq.ModMasks["lock"]
 
     def map_key(self, key):
-        try:
-            keysym = xcbq.get_keysym(key.key)
-            modmask = xcbq.translate_masks(key.modifiers)
-        except xcbq.XCBQError as e:
-            raise utils.QtileError(e)
+        # translated once, when the key was defined
+        keysym, modmask = key.keysym, key.modmask
         self.keys_map[(keysym, modmask & self.valid_mask)] = key
         code = self.conn.keysym_to_keycode(keysym)
         for amask in self._auto_modmasks():
@@ -439,11 +463,7 @@ class Qtile(command.CommandObject):
             )
 
     def unmap_key(self, key):
-        try:
-            keysym = xcbq.get_keysym(key.key)
-            modmask = xcbq.translate_masks(key.modifiers)
-        except xcbq.XCBQError as e:
-            raise utils.QtileError(e)
+        keysym, modmask = key.keysym, key.modmask
         key_index = (keysym, modmask & self.valid_mask)
         if key_index not in self.keys_map:
             return
@@ -583,6 +603,7 @@ class Qtile(command.CommandObject):
             if getattr(c, "group", None):
                 c.group.remove(c)
             del self.windows_map[win]
+            self.window_rects.remove(c)
             self.update_client_list()
 
     def reset_gaps(self, c):
@@ -669,10 +690,7 @@ class Qtile(command.CommandObject):
     def grab_mouse(self):
         self.root.ungrab_button(None, None)
         for i in self.config.mouse:
-            try:
-                modmask = xcbq.translate_masks(i.modifiers)
-            except xcbq.XCBQError as e:
-                raise utils.QtileError(e)
+            modmask = i.modmask
             if isinstance(i, Click) and i.focus:
                 # Make a freezing grab on mouse button to gain focus
                 # Event will propagate to target window
@@ -834,11 +852,7 @@ class Qtile(command.CommandObject):
 
     def find_screen(self, x, y):
         """Find a screen based on the x and y offset"""
-        result = []
-        for i in self.screens:
-            if i.x <= x <= i.x + i.width and \
-                    i.y <= y <= i.y + i.height:
-                result.append(i)
+        result = self.screen_rects.at(x, y)
         if len(result) == 1:
             return result[0]
         return None
@@ -1012,11 +1026,7 @@ class Qtile(command.CommandObject):
 
         k = self.mouse_map.get(button_code)
         for m in k:
-            try:
-                modmask = xcbq.translate_masks(m.modifiers)
-            except xcbq.XCBQError as e:
-                raise utils.QtileError(e)
-            if not m or modmask & self.valid_mask != state & self.valid_mask:
+            if not m or m.modmask & self.valid_mask != state & self.valid_mask:
                 logger.info("Ignoring unknown button: %s" % button_code)
                 continue
             if isinstance(m, Click):
@@ -1050,7 +1060,7 @@ class Qtile(command.CommandObject):
                     val = (0, 0)
                 if m.focus == "after":
                     self.cmd_focus_by_click(e)
-                self._drag = (x, y, val[0], val[1], m.commands)
+                self._drag = drag.DragState(self, m, x, y, val[0], val[1])
                 self.root.grab_pointer(
                     True,
                     xcbq.ButtonMotionMask |
@@ -1073,28 +1083,15 @@ class Qtile(command.CommandObject):
                 )
                 continue
             if isinstance(m, Drag):
+                if self._drag is not None:
+                    self._drag.finish()
                 self._drag = None
                 self.root.ungrab_pointer()
 
     def handle_MotionNotify(self, e):  # noqa: N802
         if self._drag is None:
             return
-        ox, oy, rx, ry, cmd = self._drag
-        dx = e.event_x - ox
-        dy = e.event_y - oy
-        if dx or dy:
-            for i in cmd:
-                if i.check(self):
-                    status, val = self.server.call((
-                        i.selectors,
-                        i.name,
-                        i.args + (rx + dx, ry + dy, e.event_x, e.event_y),
-                        i.kwargs
-                    ))
-                    if status in (command.ERROR, command.EXCEPTION):
-                        logger.error(
-                            "Mouse command error %s: %s" % (i.name, val)
-                        )
+        self._drag.motion(e.event_x, e.event_y)
 
     def handle_ConfigureNotify(self, e):  # noqa: N802
         """Handle xrandr events"""
@@ -1242,11 +1239,29 @@ class Qtile(command.CommandObject):
             self.conn.flush()
         return self._eventloop.call_later(delay, f)
 
+    def add_reader(self, fd, func, *args):
+        """ Another event loop proxy, see `call_soon`. func is called whenever
+        fd is readable. """
+        def f():
+            func(*args)
+            self.conn.flush()
+        return self._eventloop.add_reader(fd, f)
+
+    def remove_reader(self, fd):
+        """ Stop watching fd, see `add_reader`. """
+        return self._eventloop.remove_reader(fd)
+
     def run_in_executor(self, func, *args):
         """ A wrapper for running a function in the event loop's default
         executor. """
         return self._eventloop.run_in_executor(None, func, *args)
 
+    def create_task(self, coro):
+        """ A wrapper for scheduling a coroutine on the event loop. Code
+        running in the coroutine has to flush the X connection itself, e.g. by
+        drawing through `call_soon`. """
+        return self._eventloop.create_task(coro)
+
     def cmd_debug(self):
         """Set log level to DEBUG"""
         logger.setLevel(logging.DEBUG)
@@ -1445,18 +1460,41 @@ class Qtile(command.CommandObject):
         d.state = modmasks
         self.handle_KeyPress(d)
 
+    def _load_state(self, state):
+        """Read the state passed on by restart, None if it can't be read"""
+        if not os.path.exists(state):
+            # pickled state, passed on by versions of qtile without state files
+            try:
+                return pickle.loads(state.encode())
+            except:  # noqa: E722
+                logger.exception("failed reading pickled state")
+                return None
+        try:
+            return QtileState.load(state)
+        except Exception:
+            # whatever is wrong with the state, qtile must still start
+            logger.exception("failed reading state file %s", state)
+            return None
+        finally:
+            try:
+                os.unlink(state)
+            except OSError:
+                pass
+
     def cmd_restart(self):
         """Restart qtile"""
         argv = [sys.executable] + sys.argv
         if '--no-spawn' not in argv:
             argv.append('--no-spawn')
-        buf = io.BytesIO()
+        argv = [s for s in argv if not s.startswith('--with-state')]
         try:
-            pickle.dump(QtileState(self), buf, protocol=0)
+            fd, path = tempfile.mkstemp(prefix='state-', dir=get_runtime_dir())
+            with os.fdopen(fd, 'wb') as f:
+                QtileState(self).save(f)
         except:  # noqa: E722
-            logger.error("Unable to pickle qtile state")
-        argv = [s for s in argv if not s.startswith('--with-state')]
-        argv.append('--with-state=' + buf.getvalue().decode())
+            logger.exception("Unable to save qtile state")
+        else:
+            argv.append('--with-state=' + path)
         self._restart = (sys.executable, argv)
         self.stop()
 
@@ -6,8 +6,8 @@ from . import xcbq
 
 
 class XCore(base.Core):
-    def get_keys(self) -> typing.List[str]:
-        return list(xcbq.keysyms.keys())
+    def get_keys(self) -> typing.AbstractSet[str]:
+        return xcbq.keysyms.keys()
 
-    def get_modifiers(self) -> typing.List[str]:
-        return list(xcbq.ModMasks.keys())
+    def get_modifiers(self) -> typing.AbstractSet[str]:
+        return xcbq.ModMasks.keys()
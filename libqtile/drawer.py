@@ -29,6 +29,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import collections
+import functools
 import math
 import cairocffi
 import xcffib.xproto
@@ -37,6 +38,32 @@ from . import pangocffi
 from . import utils
 
 
+@functools.lru_cache(maxsize=256)
+def _cached_rgb(colour):
+    return utils.rgb(colour)
+
+
+def _rgb(colour):
+    """Parse a colour spec, reusing the result for hashable specs"""
+    try:
+        return _cached_rgb(colour)
+    except TypeError:
+        # unhashable specs, e.g. a list of components, are parsed every time
+        return utils.rgb(colour)
+
+
+@functools.lru_cache(maxsize=64)
+def _linear_gradient(colours, height):
+    """Build a vertical gradient pattern, shared by all drawers of a height"""
+    linear = cairocffi.LinearGradient(0.0, 0.0, 0.0, height)
+    step_size = 1.0 / (len(colours) - 1)
+    step = 0.0
+    for c in colours:
+        linear.add_color_stop_rgba(step, *_rgb(c))
+        step += step_size
+    return linear
+
+
 class TextLayout:
     def __init__(self, drawer, text, colour, font_family, font_size,
                  font_shadow, wrap=True, markup=False):
@@ -202,6 +229,74 @@ class TextFrame:
         return self.layout.width + self.pad_left + self.pad_right
 
 
+class ScaledIconCache:
+    """A process wide LRU cache of window icons scaled to a size
+
+    Entries are keyed by window, icon revision and size, so bars on every
+    screen share the scaled icons and painting one is a plain blit. The
+    least recently used icons are dropped once the surfaces take more than
+    budget bytes.
+    """
+    def __init__(self, budget=8 * 1024 * 1024):
+        self.budget = budget
+        self.used = 0
+        self._surfaces = collections.OrderedDict()
+
+    def get(self, window, size):
+        icons = window.icons
+        if not icons or not size:
+            return None
+        key = (window.window.wid, getattr(icons, "revision", id(icons)), size)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        surface = self._scale(icons, size)
+        self._surfaces[key] = surface
+        self.used += self._nbytes(surface)
+        while self.used > self.budget and len(self._surfaces) > 1:
+            _, old = self._surfaces.popitem(last=False)
+            self.used -= self._nbytes(old)
+        return surface
+
+    def invalidate(self, window):
+        wid = window.window.wid
+        for key in [k for k in self._surfaces if k[0] == wid]:
+            self.used -= self._nbytes(self._surfaces.pop(key))
+
+    @staticmethod
+    def _nbytes(surface):
+        return surface.get_stride() * surface.get_height()
+
+    @staticmethod
+    def _scale(icons, size):
+        # only the closest size is decoded
+        best = min(icons, key=lambda x: abs(size - int(x.split("x")[0])))
+        width, height = map(int, best.split("x"))
+        source = cairocffi.ImageSurface.create_for_data(
+            icons[best],
+            cairocffi.FORMAT_ARGB32,
+            width,
+            height
+        )
+        factor = size / height
+        surface = cairocffi.ImageSurface(
+            cairocffi.FORMAT_ARGB32,
+            max(int(round(width * factor)), 1),
+            size
+        )
+        ctx = cairocffi.Context(surface)
+        ctx.scale(factor, factor)
+        ctx.set_source_surface(source)
+        ctx.paint()
+        surface.flush()
+        return surface
+
+
+icon_cache = ScaledIconCache()
+
+
 class Drawer:
     """ A helper class for drawing and text layout.
 
@@ -312,6 +407,22 @@ class Drawer:
             self.height if height is None else height
         )
 
+    def copy_area(self, src_x, src_y, width, height, dst_x, dst_y):
+        """
+        Copy a region of the pixmap onto another position of the same pixmap,
+        e.g. to scroll already drawn content instead of redrawing it.
+        """
+        self.surface.flush()
+        self.qtile.conn.conn.core.CopyArea(
+            self.pixmap,
+            self.pixmap,
+            self.gc,
+            src_x, src_y,
+            dst_x, dst_y,
+            width, height
+        )
+        self.surface.mark_dirty_rectangle(dst_x, dst_y, width, height)
+
     def find_root_visual(self):
         for i in self.qtile.conn.default_screen.allowed_depths:
             for v in i.visuals:
@@ -325,22 +436,17 @@ class Drawer:
         if type(colour) == list:
             if len(colour) == 0:
                 # defaults to black
-                self.ctx.set_source_rgba(*utils.rgb("#000000"))
+                self.ctx.set_source_rgba(*_rgb("#000000"))
             elif len(colour) == 1:
-                self.ctx.set_source_rgba(*utils.rgb(colour[0]))
+                self.ctx.set_source_rgba(*_rgb(colour[0]))
             else:
-                linear = cairocffi.LinearGradient(0.0, 0.0, 0.0, self.height)
-                step_size = 1.0 / (len(colour) - 1)
-                step = 0.0
-                for c in colour:
-                    rgb_col = utils.rgb(c)
-                    if len(rgb_col) < 4:
-                        rgb_col[3] = 1
-                    linear.add_color_stop_rgba(step, *rgb_col)
-                    step += step_size
+                try:
+                    linear = _linear_gradient(tuple(colour), self.height)
+                except TypeError:
+                    linear = _linear_gradient.__wrapped__(colour, self.height)
                 self.ctx.set_source(linear)
         else:
-            self.ctx.set_source_rgba(*utils.rgb(colour))
+            self.ctx.set_source_rgba(*_rgb(colour))
 
     def clear(self, colour):
         self.set_source_rgb(colour)
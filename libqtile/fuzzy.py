@@ -0,0 +1,203 @@
+# Copyright (c) 2019 Qtile contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+    Fuzzy matching of windows and groups by name.
+
+    The indexes are kept up to date by hooks, so finding a window does not
+    need to walk every window, and a query extending the previous one only
+    rescores the previous matches.
+"""
+from . import hook
+from .utils import QtileError
+
+from typing import Any, Dict, List, Tuple
+
+# characters after which a match counts as the start of a word
+_BOUNDARIES = " -_./:"
+
+
+def _score_from(query, text, position):
+    score = 0.0
+    previous = -2
+    for char in query:
+        position = text.find(char, position)
+        if position == -1:
+            return None
+        if position == previous + 1:
+            score += 3
+        elif position == 0 or text[position - 1] in _BOUNDARIES:
+            score += 2
+        else:
+            score += 1
+        if previous >= 0:
+            score -= 0.1 * (position - previous - 1)
+        previous = position
+        position += 1
+    return score
+
+
+def score(query, text):
+    """Score text as a match of query, None if it doesn't match
+
+    query matches text if its characters appear in text in order. Consecutive
+    characters and characters at the start of words score higher, gaps and
+    long texts lower. Both arguments are expected to be lower case.
+    """
+    if not query:
+        return 0.0
+    best = _score_from(query, text, 0)
+    if best is None:
+        return None
+    # the greedy match may start too early, e.g. "fox" in "ff fox"
+    start = text.find(query)
+    if start != -1:
+        best = max(best, _score_from(query, text, start))
+    if text.startswith(query):
+        best += 2
+    return best - 0.01 * len(text)
+
+
+class FuzzyIndex:
+    """Names indexed by a key, searchable by fuzzy matching"""
+
+    def __init__(self):
+        self.items: Dict[Any, Tuple[str, str]] = {}
+        self._generation = 0
+        self._last = None
+        # (hook name, callback) keeping the index up to date
+        self._hooks: List[Tuple[str, Any]] = []
+
+    def _subscribe(self):
+        for name, callback in self._hooks:
+            getattr(hook.subscribe, name)(callback)
+
+    def close(self):
+        """Stop following the hooks"""
+        for name, callback in self._hooks:
+            try:
+                getattr(hook.unsubscribe, name)(callback)
+            except QtileError:
+                pass  # the hooks were cleared
+        self._hooks = []
+
+    def set(self, key, name):
+        name = name or ""
+        if self.items.get(key, (None,))[0] != name:
+            self.items[key] = (name, name.lower())
+            self._generation += 1
+
+    def remove(self, key):
+        if self.items.pop(key, None) is not None:
+            self._generation += 1
+
+    def search(self, query):
+        """Returns the (score, name, key) matches of query, best first"""
+        query = query.lower()
+        candidates = self.items
+        if self._last is not None:
+            generation, last_query, last_matches = self._last
+            # the matches of a longer query are among those of the shorter one
+            if generation == self._generation and query.startswith(last_query):
+                candidates = last_matches
+        matches = {}
+        results = []
+        for key in candidates:
+            name, folded = self.items[key]
+            s = score(query, folded)
+            if s is not None:
+                matches[key] = None
+                results.append((s, name, key))
+        self._last = (self._generation, query, matches)
+        results.sort(key=lambda x: (-x[0], x[1]))
+        return results
+
+
+class WindowIndex(FuzzyIndex):
+    """The names of the managed windows, keyed by window id"""
+
+    def __init__(self, qtile):
+        FuzzyIndex.__init__(self)
+        for wid, window in qtile.windows_map.items():
+            if window.group:
+                self.set(wid, window.name)
+        self._hooks = [
+            ("client_managed", self._update),
+            ("client_name_updated", self._update),
+            ("client_killed", self._remove),
+        ]
+        self._subscribe()
+
+    def _update(self, window):
+        if window.group or window.wid in self.items:
+            self.set(window.wid, window.name)
+
+    def _remove(self, window):
+        self.remove(window.wid)
+
+
+class GroupIndex(FuzzyIndex):
+    """The names of the groups"""
+
+    def __init__(self, qtile):
+        FuzzyIndex.__init__(self)
+        for name in qtile.groups_map:
+            self.set(name, name)
+        self._hooks = [
+            ("addgroup", self._add),
+            ("delgroup", self._delete),
+        ]
+        self._subscribe()
+
+    def _add(self, qtile, name):
+        self.set(name, name)
+
+    def _delete(self, qtile, name):
+        self.remove(name)
+
+
+# (qtile, index class) -> FuzzyIndex
+_indexes: Dict[Tuple, FuzzyIndex] = {}
+
+
+def _index(qtile, cls):
+    key = (qtile, cls)
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = cls(qtile)
+    return index
+
+
+def window_index(qtile):
+    """Get the shared window index of qtile, creating it on first use"""
+    return _index(qtile, WindowIndex)
+
+
+def group_index(qtile):
+    """Get the shared group index of qtile, creating it on first use"""
+    return _index(qtile, GroupIndex)
+
+
+def finalize(qtile):
+    """Drop the indexes of qtile"""
+    for key, index in list(_indexes.items()):
+        if key[0] is qtile:
+            del _indexes[key]
+            index.close()
@@ -147,6 +147,9 @@ class _Group(command.CommandObject):
         If we have have a current_window give it focus, optionally moving warp
         to it.
         """
+        if self.qtile._restoring:
+            # the windows are laid out once their layouts are restored
+            return
         if self.screen and len(self.windows):
             with self.disable_mask(xcffib.xproto.EventMask.EnterWindow):
                 normal = [x for x in self.windows if not x.floating]
@@ -24,16 +24,52 @@
 # is annoying, so we ignore libqtile/layout/__init__.py completely
 # flake8: noqa
 
-from .bsp import Bsp
-from .columns import Columns
-from .floating import Floating
-from .matrix import Matrix
-from .max import Max
-from .ratiotile import RatioTile
-from .slice import Slice
-from .stack import Stack
-from .tile import Tile
-from .tree import TreeTab
-from .verticaltile import VerticalTile
-from .xmonad import MonadTall, MonadWide
-from .zoomy import Zoomy
+import importlib
+import sys
+
+# layout name -> module defining it; layouts are imported on first use, so a
+# config only pays for the layouts it uses
+_layouts = {
+    "Bsp": "bsp",
+    "Columns": "columns",
+    "Floating": "floating",
+    "Matrix": "matrix",
+    "Max": "max",
+    "RatioTile": "ratiotile",
+    "Slice": "slice",
+    "Stack": "stack",
+    "Tile": "tile",
+    "TreeTab": "tree",
+    "VerticalTile": "verticaltile",
+    "MonadTall": "xmonad",
+    "MonadWide": "xmonad",
+    "Zoomy": "zoomy",
+}
+
+__all__ = list(_layouts)
+
+
+def __getattr__(name):
+    module_name = _layouts.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module("." + module_name, __name__), name)
+        globals()[name] = value
+        return value
+    if not name.startswith("_"):
+        # a submodule, e.g. layout.base
+        try:
+            return importlib.import_module("." + name, __name__)
+        except ModuleNotFoundError as e:
+            if e.name != __name__ + "." + name:
+                raise
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_layouts))
+
+
+# module __getattr__ is only supported from python 3.7
+if sys.version_info < (3, 7):
+    for _name in _layouts:
+        __getattr__(_name)
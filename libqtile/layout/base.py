@@ -21,12 +21,70 @@
 
 import copy
 from abc import ABCMeta, abstractmethod
+from collections import namedtuple
 
 from .. import command, configurable
 
 from typing import Any, List, Tuple
 
 
+Placement = namedtuple("Placement", (
+    "client", "x", "y", "width", "height", "borderwidth", "bordercolor",
+    "margin", "above", "visible",
+))
+Placement.__new__.__defaults__ = (None, False, True)
+Placement.__doc__ = """Where a layout places a client, see Layout.plan()
+
+The fields are the arguments of Window.place(), and whether the client is
+visible at all. Use hidden() for the placement of a hidden client.
+"""
+
+
+def hidden(client):
+    """The placement of a client which a layout doesn't show"""
+    return Placement(client, 0, 0, 0, 0, 0, None, visible=False)
+
+
+def _is_placed(client, placement):
+    x, y = placement.x, placement.y
+    width, height = placement.width, placement.height
+    if placement.margin is not None:
+        x += placement.margin
+        y += placement.margin
+        width -= placement.margin * 2
+        height -= placement.margin * 2
+    return (
+        client.x == x and client.y == y and
+        client.width == width and client.height == height and
+        client.borderwidth == placement.borderwidth and
+        client.bordercolor == placement.bordercolor
+    )
+
+
+def apply_plan(plan):
+    """Place, show and hide clients as planned
+
+    Clients already at their planned geometry are not configured again.
+    """
+    for placement in plan:
+        client = placement.client
+        if not placement.visible:
+            client.hide()
+            continue
+        if placement.above or not _is_placed(client, placement):
+            client.place(
+                placement.x,
+                placement.y,
+                placement.width,
+                placement.height,
+                placement.borderwidth,
+                placement.bordercolor,
+                above=placement.above,
+                margin=placement.margin,
+            )
+        client.unhide()
+
+
 class Layout(command.CommandObject, configurable.Configurable, metaclass=ABCMeta):
     """This class defines the API that should be exposed by all layouts"""
     @classmethod
@@ -53,8 +111,53 @@ class Layout(command.CommandObject, configurable.Configurable, metaclass=ABCMeta
 
     def layout(self, windows, screen):
         assert windows, "let's eliminate unnecessary calls"
-        for i in windows:
-            self.configure(i, screen)
+        plan = self.plan(windows, screen)
+        if plan is None:
+            for i in windows:
+                self.configure(i, screen)
+        else:
+            apply_plan(plan)
+
+    def plan(self, windows, screen):
+        """Compute where to place the windows
+
+        Layouts which can compute the placement of all their windows at once
+        return a list of Placement for the windows. The default
+        returns None, and the windows are then configured one by one with
+        configure().
+        """
+        return None
+
+    def configure_from_plan(self, client, screen):
+        """Implements configure() for layouts implementing plan()"""
+        apply_plan(self.plan([client], screen))
+
+    # version of the data returned by get_state(), saved state of another
+    # version is not restored
+    state_version = 1
+
+    def get_state(self):
+        """Save the arrangement of the clients, to restore it on restart
+
+        Returns None if there is nothing to save, or data made of dicts,
+        lists, strings, numbers and booleans, where clients are given by
+        their window ids.
+        """
+        return None
+
+    def restore_state(self, state, windows):
+        """Rearrange the clients as saved by get_state()
+
+        This is called once all the windows are managed again, windows maps
+        the window ids to the clients of this layout. Saved clients which are
+        gone are skipped, and clients which weren't saved keep the place
+        add() gave them.
+
+        Only the order, focus and sizes of the clients are restored, settings
+        such as ratios or the number of stacks come from the config, which may
+        have changed since the state was saved.
+        """
+        pass
 
     def finalize(self):
         pass
@@ -363,11 +466,48 @@ class _ClientList:
     whereas 'current_client' property can be used with clients directly.
 
     The collection implements focus_xxx methods as desired for Group.
+
+    Clients are kept in a ring together with a map from each client to its
+    slot, so that membership, index and neighbour lookups are O(1) and
+    rotations only move the start of the ring. A client can only be in the
+    collection once.
     """
 
     def __init__(self):
         self._current_idx = 0
-        self.clients = []
+        self._ring = []
+        self._start = 0
+        self._slots = {}
+        self._list = []
+
+    @property
+    def clients(self):
+        """The clients in order, as a list which must not be modified"""
+        if self._list is None:
+            self._list = self._ring[self._start:] + self._ring[:self._start]
+        return self._list
+
+    @clients.setter
+    def clients(self, clients):
+        self._ring = list(clients)
+        self._start = 0
+        self._slots = {c: i for i, c in enumerate(self._ring)}
+        self._list = None
+
+    def _unrotate(self):
+        """Make the ring start at its first slot, before editing it"""
+        if self._start:
+            self.clients = self.clients
+        self._list = None
+
+    def _renumber(self, start):
+        for i in range(start, len(self._ring)):
+            self._slots[self._ring[i]] = i
+
+    def _insert(self, pos, client):
+        self._unrotate()
+        self._ring.insert(pos, client)
+        self._renumber(pos)
 
     @property
     def current_index(self):
@@ -383,13 +523,13 @@ class _ClientList:
 
     @property
     def current_client(self):
-        if not self.clients:
+        if not self._ring:
             return None
-        return self.clients[self._current_idx]
+        return self[self._current_idx]
 
     @current_client.setter
     def current_client(self, client):
-        self._current_idx = self.clients.index(client)
+        self._current_idx = self.index(client)
 
     def focus(self, client):
         """
@@ -440,32 +580,32 @@ class _ClientList:
         Positive values are after the client.
         """
         pos = max(0, self._current_idx + offset_to_current)
-        if pos < len(self.clients):
-            self.clients.insert(pos, client)
-        else:
-            self.clients.append(client)
+        self._insert(min(pos, len(self._ring)), client)
         self.current_client = client
 
     def append_head(self, client):
         """
         Append the given client in front of list.
         """
-        self.clients.insert(0, client)
+        self._insert(0, client)
 
     def append(self, client):
         """
         Append the given client to the end of the collection.
         """
-        self.clients.append(client)
+        self._insert(len(self._ring), client)
 
     def remove(self, client):
         """
         Remove the given client from collection.
         """
-        if client not in self.clients:
+        if client not in self._slots:
             return
-        idx = self.clients.index(client)
-        del self.clients[idx]
+        idx = self.index(client)
+        self._unrotate()
+        del self._ring[idx]
+        del self._slots[client]
+        self._renumber(idx)
         if len(self) == 0:
             self._current_idx = 0
         elif idx <= self._current_idx:
@@ -477,8 +617,9 @@ class _ClientList:
         If maintain_index is True the current_index is adjusted,
         such that the same client stays current and goes up in list.
         """
-        if len(self.clients) > 1:
-            self.clients.append(self.clients.pop(0))
+        if len(self._ring) > 1:
+            self._start = (self._start + 1) % len(self._ring)
+            self._list = None
             if maintain_index:
                 self.current_index -= 1
 
@@ -488,11 +629,19 @@ class _ClientList:
         If maintain_index is True the current_index is adjusted,
         such that the same client stays current and goes down in list.
         """
-        if len(self.clients) > 1:
-            self.clients.insert(0, self.clients.pop())
+        if len(self._ring) > 1:
+            self._start = (self._start - 1) % len(self._ring)
+            self._list = None
             if maintain_index:
                 self.current_index += 1
 
+    def _swap_slots(self, i1, i2):
+        s1, s2 = self._slot(i1), self._slot(i2)
+        c1, c2 = self._ring[s1], self._ring[s2]
+        self._ring[s1], self._ring[s2] = c2, c1
+        self._slots[c1], self._slots[c2] = s2, s1
+        self._list = None
+
     def swap(self, c1, c2, focus=1):
         """
         Swap the two given clients in list.
@@ -500,9 +649,9 @@ class _ClientList:
         In case of 1, the first client c1 is focused, in case of 2 the c2 and
         the current_index is not changed otherwise.
         """
-        i1 = self.clients.index(c1)
-        i2 = self.clients.index(c2)
-        self.clients[i1], self.clients[i2] = self.clients[i2], self.clients[i1]
+        i1 = self.index(c1)
+        i2 = self.index(c2)
+        self._swap_slots(i1, i2)
         if focus == 1:
             self.current_index = i1
         elif focus == 2:
@@ -516,7 +665,7 @@ class _ClientList:
         """
         idx = self._current_idx
         if idx > 0:
-            self.clients[idx], self.clients[idx - 1] = self[idx - 1], self[idx]
+            self._swap_slots(idx, idx - 1)
             if maintain_index:
                 self.current_index -= 1
 
@@ -527,8 +676,8 @@ class _ClientList:
         such that the same client stays current and goes down in list.
         """
         idx = self._current_idx
-        if idx + 1 < len(self.clients):
-            self.clients[idx], self.clients[idx + 1] = self[idx + 1], self[idx]
+        if idx + 1 < len(self._ring):
+            self._swap_slots(idx, idx + 1)
             if maintain_index:
                 self.current_index += 1
 
@@ -537,30 +686,49 @@ class _ClientList:
         Add clients from 'other' _WindowCollection to self.
         'offset_to_current' works as described for add()
         """
-        pos = max(0, self.current_index + offset_to_current)
-        if pos < len(self.clients):
-            self.clients = (self.clients[:pos:] + other.clients +
-                            self.clients[pos::])
-        else:
-            self.clients.extend(other.clients)
+        pos = min(max(0, self.current_index + offset_to_current), len(self))
+        self._unrotate()
+        self._ring[pos:pos] = other.clients
+        self._renumber(pos)
+
+    def _slot(self, i):
+        return (self._start + i) % len(self._ring)
 
     def index(self, client):
-        return self.clients.index(client)
+        try:
+            slot = self._slots[client]
+        except KeyError:
+            raise ValueError("%r is not in list" % (client, )) from None
+        return (slot - self._start) % len(self._ring)
 
     def __len__(self):
-        return len(self.clients)
+        return len(self._ring)
 
     def __getitem__(self, i):
-        try:
+        if isinstance(i, slice):
             return self.clients[i]
-        except IndexError:
+        n = len(self._ring)
+        if not -n <= i < n:
             return None
+        return self._ring[self._slot(i)]
+
+    def __setitem__(self, i, client):
+        n = len(self._ring)
+        if not -n <= i < n:
+            raise IndexError("list assignment index out of range")
+        slot = self._slot(i)
+        old = self._ring[slot]
+        if self._slots.get(old) == slot:
+            del self._slots[old]
+        self._ring[slot] = client
+        self._slots[client] = slot
+        self._list = None
 
     def __iter__(self):
-        return self.clients.__iter__()
+        return iter(self.clients)
 
     def __contains__(self, client):
-        return client in self.clients
+        return client in self._slots
 
     def __str__(self):
         curr = self.current_client
@@ -573,6 +741,28 @@ class _ClientList:
             current=self._current_idx,
         )
 
+    def get_state(self):
+        current = self.current_client
+        return dict(
+            clients=[c.window.wid for c in self.clients],
+            current=current.window.wid if current is not None else None,
+        )
+
+    def restore_state(self, state, windows):
+        """Take the saved clients out of windows, in their saved order"""
+        clients = []
+        current = None
+        for wid in state["clients"]:
+            client = windows.pop(wid, None)
+            if client is not None:
+                clients.append(client)
+                if wid == state["current"]:
+                    current = client
+        self.clients = clients
+        self._current_idx = 0
+        if current is not None:
+            self.current_client = current
+
 
 class _SimpleLayoutBase(Layout):
     """
@@ -626,6 +816,17 @@ class _SimpleLayoutBase(Layout):
     def remove(self, client):
         return self.clients.remove(client)
 
+    def get_state(self):
+        return self.clients.get_state()
+
+    def restore_state(self, state, windows):
+        added = list(self.clients)
+        self.clients.restore_state(state, windows)
+        unsaved = set(windows.values())
+        for client in added:
+            if client in unsaved:
+                self.clients.append(client)
+
     def info(self):
         d = Layout.info(self)
         d.update(self.clients.info())
@@ -15,7 +15,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from .base import Layout
+from .base import Layout, Placement, hidden
 
 
 class _BspNode():
@@ -30,29 +30,26 @@ class _BspNode():
         self.h = 9
 
     def __iter__(self):
-        yield self
-        for child in self.children:
-            for c in child:
-                yield c
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
 
     def clients(self):
-        if self.client:
-            yield self.client
-        else:
-            for child in self.children:
-                for c in child.clients():
-                    yield c
-
-    def _shortest(self, l):
-        if len(self.children) == 0:
-            return self, l
-        else:
-            c0, l0 = self.children[0]._shortest(l + 1)
-            c1, l1 = self.children[1]._shortest(l + 1)
-            return (c1, l1) if l1 < l0 else (c0, l0)
+        for node in self:
+            if node.client:
+                yield node.client
 
     def get_shortest(self):
-        return self._shortest(0)[0]
+        # breadth first, so the first leaf found is the leftmost of the
+        # least deep ones
+        level = [self]
+        while True:
+            for node in level:
+                if len(node.children) == 0:
+                    return node
+            level = [child for node in level for child in node.children]
 
     def insert(self, client, idx, ratio):
         if self.client is None:
@@ -76,34 +73,42 @@ class _BspNode():
         return self
 
     def distribute(self):
-        if len(self.children) == 0:
-            return 1, 1
-        h0, v0 = self.children[0].distribute()
-        h1, v1 = self.children[1].distribute()
-        if self.split_horizontal:
-            h = h0 + h1
-            v = max(v0, v1)
-            self.split_ratio = 100 * h0 / h
-        else:
-            h = max(h0, h1)
-            v = v0 + v1
-            self.split_ratio = 100 * v0 / v
-        return h, v
+        sizes = {}
+        # children come after their parents, so visit the nodes backwards
+        for node in reversed(list(self)):
+            if len(node.children) == 0:
+                sizes[node] = 1, 1
+                continue
+            h0, v0 = sizes.pop(node.children[0])
+            h1, v1 = sizes.pop(node.children[1])
+            if node.split_horizontal:
+                h = h0 + h1
+                v = max(v0, v1)
+                node.split_ratio = 100 * h0 / h
+            else:
+                h = max(h0, h1)
+                v = v0 + v1
+                node.split_ratio = 100 * v0 / v
+            sizes[node] = h, v
+        return sizes[self]
 
     def calc_geom(self, x, y, w, h):
-        self.x = x
-        self.y = y
-        self.w = w
-        self.h = h
-        if len(self.children) > 1:
-            if self.split_horizontal:
-                w0 = int(self.split_ratio * w * 0.01 + 0.5)
-                self.children[0].calc_geom(x, y, w0, h)
-                self.children[1].calc_geom(x + w0, y, w - w0, h)
-            else:
-                h0 = int(self.split_ratio * h * 0.01 + 0.5)
-                self.children[0].calc_geom(x, y, w, h0)
-                self.children[1].calc_geom(x, y + h0, w, h - h0)
+        stack = [(self, x, y, w, h)]
+        while stack:
+            node, x, y, w, h = stack.pop()
+            node.x = x
+            node.y = y
+            node.w = w
+            node.h = h
+            if len(node.children) > 1:
+                if node.split_horizontal:
+                    w0 = int(node.split_ratio * w * 0.01 + 0.5)
+                    stack.append((node.children[0], x, y, w0, h))
+                    stack.append((node.children[1], x + w0, y, w - w0, h))
+                else:
+                    h0 = int(node.split_ratio * h * 0.01 + 0.5)
+                    stack.append((node.children[0], x, y, w, h0))
+                    stack.append((node.children[1], x, y + h0, w, h - h0))
 
 
 class Bsp(Layout):
@@ -160,22 +165,90 @@ class Bsp(Layout):
         self.add_defaults(Bsp.defaults)
         self.root = _BspNode()
         self.current = self.root
+        self._invalidate()
 
     def clone(self, group):
         c = Layout.clone(self, group)
         c.root = _BspNode()
         c.current = c.root
+        c._invalidate()
         return c
 
+    def _invalidate(self):
+        """Forget the node index and geometry after the tree changed"""
+        self._nodes = None
+        self._geometry = None
+
+    def _relayout(self):
+        self._invalidate()
+        self.group.layout_all()
+
+    def get_state(self):
+        def save(node):
+            if node.client:
+                return node.client.window.wid
+            if not node.children:
+                return None
+            return [
+                node.split_horizontal,
+                node.split_ratio,
+                save(node.children[0]),
+                save(node.children[1]),
+            ]
+        current = self.current.client
+        return dict(
+            tree=save(self.root),
+            current=current.window.wid if current else None,
+        )
+
+    def restore_state(self, state, windows):
+        def restore(saved):
+            if isinstance(saved, list):
+                split_horizontal, split_ratio, first, second = saved
+                children = [restore(first), restore(second)]
+                # a subtree whose windows are all gone collapses
+                if children[0] is None or children[1] is None:
+                    return children[0] or children[1]
+                node = _BspNode()
+                node.split_horizontal = split_horizontal
+                node.split_ratio = split_ratio
+                node.children = children
+                for child in children:
+                    child.parent = node
+                return node
+            client = windows.pop(saved, None)
+            if client is None:
+                return None
+            node = _BspNode()
+            node.client = client
+            return node
+
+        added = list(self._node_index())
+        current = windows.get(state["current"])
+        self.root = restore(state["tree"]) or _BspNode()
+        self.root.parent = None
+        self._invalidate()
+        self.current = self.get_node(current) or self.root
+        unsaved = set(windows.values())
+        for client in added:
+            if client in unsaved:
+                self.add(client)
+
     def info(self):
         return dict(
             name=self.name,
             clients=[c.name for c in self.root.clients()])
 
+    def _node_index(self):
+        """The node of each client, in the order of the tree"""
+        if self._nodes is None:
+            self._nodes = {
+                node.client: node for node in self.root if node.client
+            }
+        return self._nodes
+
     def get_node(self, client):
-        for node in self.root:
-            if client is node.client:
-                return node
+        return self._node_index().get(client)
 
     def focus(self, client):
         self.current = self.get_node(client)
@@ -183,10 +256,12 @@ class Bsp(Layout):
     def add(self, client):
         node = self.root.get_shortest() if self.fair else self.current
         self.current = node.insert(client, int(self.lower_right), self.ratio)
+        self._invalidate()
 
     def remove(self, client):
         node = self.get_node(client)
         if node:
+            self._invalidate()
             if node.parent:
                 node = node.parent.remove(node)
                 newclient = next(node.clients(), None)
@@ -199,43 +274,54 @@ class Bsp(Layout):
             self.current = self.root
 
     def configure(self, client, screen):
-        self.root.calc_geom(screen.x, screen.y, screen.width,
-                            screen.height)
-        node = self.get_node(client)
-        color = self.group.qtile.color_pixel(
-            self.border_focus if client.has_focus else self.border_normal)
-        border = 0 if node is self.root else self.border_width
-        client.place(
-            node.x,
-            node.y,
-            node.w - 2 * border,
-            node.h - 2 * border,
-            border,
-            color,
-            margin=self.margin)
-        client.unhide()
+        self.configure_from_plan(client, screen)
+
+    def plan(self, windows, screen):
+        geometry = (screen.x, screen.y, screen.width, screen.height)
+        if geometry != self._geometry:
+            self.root.calc_geom(*geometry)
+            self._geometry = geometry
+        focus_color = self.group.qtile.color_pixel(self.border_focus)
+        normal_color = self.group.qtile.color_pixel(self.border_normal)
+        plan = []
+        for client in windows:
+            node = self.get_node(client)
+            if node is None:
+                plan.append(hidden(client))
+                continue
+            border = 0 if node is self.root else self.border_width
+            plan.append(Placement(
+                client,
+                node.x,
+                node.y,
+                node.w - 2 * border,
+                node.h - 2 * border,
+                border,
+                focus_color if client.has_focus else normal_color,
+                margin=self.margin))
+        return plan
 
     def cmd_toggle_split(self):
         if self.current.parent:
             self.current.parent.split_horizontal = not self.current.parent.split_horizontal
-        self.group.layout_all()
+        self._relayout()
 
     def focus_first(self):
-        return next(self.root.clients(), None)
+        return next(iter(self._node_index()), None)
 
     def focus_last(self):
-        clients = list(self.root.clients())
+        clients = list(self._node_index())
         return clients[-1] if len(clients) else None
 
     def focus_next(self, client):
-        clients = list(self.root.clients())
+        clients = list(self._node_index())
         if client in clients:
             idx = clients.index(client)
             if idx + 1 < len(clients):
                 return clients[idx + 1]
 
     def focus_previous(self, client):
-        clients = list(self.root.clients())
+        clients = list(self._node_index())
         if client in clients:
             idx = clients.index(client)
             if idx > 0:
@@ -340,7 +426,7 @@ class Bsp(Layout):
         if node:
             node.client, self.current.client = self.current.client, node.client
             self.current = node
-            self.group.layout_all()
+            self._relayout()
         elif self.current is not self.root:
             node = self.current
             self.remove(node.client)
@@ -351,14 +437,14 @@ class Bsp(Layout):
             node.parent = newroot
             self.root = newroot
             self.current = node
-            self.group.layout_all()
+            self._relayout()
 
     def cmd_shuffle_right(self):
         node = self.find_right()
         if node:
             node.client, self.current.client = self.current.client, node.client
             self.current = node
-            self.group.layout_all()
+            self._relayout()
         elif self.current is not self.root:
             node = self.current
             self.remove(node.client)
@@ -369,14 +455,14 @@ class Bsp(Layout):
             node.parent = newroot
             self.root = newroot
             self.current = node
-            self.group.layout_all()
+            self._relayout()
 
     def cmd_shuffle_up(self):
         node = self.find_up()
         if node:
             node.client, self.current.client = self.current.client, node.client
             self.current = node
-            self.group.layout_all()
+            self._relayout()
         elif self.current is not self.root:
             node = self.current
             self.remove(node.client)
@@ -387,14 +473,14 @@ class Bsp(Layout):
             node.parent = newroot
             self.root = newroot
             self.current = node
-            self.group.layout_all()
+            self._relayout()
 
     def cmd_shuffle_down(self):
         node = self.find_down()
         if node:
             node.client, self.current.client = self.current.client, node.client
             self.current = node
-            self.group.layout_all()
+            self._relayout()
         elif self.current is not self.root:
             node = self.current
             self.remove(node.client)
@@ -405,7 +491,7 @@ class Bsp(Layout):
             node.parent = newroot
             self.root = newroot
             self.current = node
-            self.group.layout_all()
+            self._relayout()
 
     def cmd_grow_left(self):
         child = self.current
@@ -414,7 +500,7 @@ class Bsp(Layout):
             if parent.split_horizontal and child is parent.children[1]:
                 parent.split_ratio = max(5,
                                          parent.split_ratio - self.grow_amount)
-                self.group.layout_all()
+                self._relayout()
                 break
             child = parent
             parent = child.parent
@@ -426,7 +512,7 @@ class Bsp(Layout):
             if parent.split_horizontal and child is parent.children[0]:
                 parent.split_ratio = min(95,
                                          parent.split_ratio + self.grow_amount)
-                self.group.layout_all()
+                self._relayout()
                 break
             child = parent
             parent = child.parent
@@ -438,7 +524,7 @@ class Bsp(Layout):
             if not parent.split_horizontal and child is parent.children[1]:
                 parent.split_ratio = max(5,
                                          parent.split_ratio - self.grow_amount)
-                self.group.layout_all()
+                self._relayout()
                 break
             child = parent
             parent = child.parent
@@ -450,7 +536,7 @@ class Bsp(Layout):
             if not parent.split_horizontal and child is parent.children[0]:
                 parent.split_ratio = min(95,
                                          parent.split_ratio + self.grow_amount)
-                self.group.layout_all()
+                self._relayout()
                 break
             child = parent
             parent = child.parent
@@ -461,7 +547,7 @@ class Bsp(Layout):
         while parent:
             if parent.split_horizontal and child is parent.children[1]:
                 parent.children = parent.children[::-1]
-                self.group.layout_all()
+                self._relayout()
                 break
             child = parent
             parent = child.parent
@@ -472,7 +558,7 @@ class Bsp(Layout):
         while parent:
             if parent.split_horizontal and child is parent.children[0]:
                 parent.children = parent.children[::-1]
-                self.group.layout_all()
+                self._relayout()
                 break
             child = parent
             parent = child.parent
@@ -483,7 +569,7 @@ class Bsp(Layout):
         while parent:
             if not parent.split_horizontal and child is parent.children[1]:
                 parent.children = parent.children[::-1]
-                self.group.layout_all()
+                self._relayout()
                 break
             child = parent
             parent = child.parent
@@ -494,7 +580,7 @@ class Bsp(Layout):
         while parent:
             if not parent.split_horizontal and child is parent.children[0]:
                 parent.children = parent.children[::-1]
-                self.group.layout_all()
+                self._relayout()
                 break
             child = parent
             parent = child.parent
@@ -507,4 +593,4 @@ class Bsp(Layout):
                 distribute = False
         if distribute:
             self.root.distribute()
-        self.group.layout_all()
+        self._relayout()
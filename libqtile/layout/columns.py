@@ -15,7 +15,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from .base import Layout, _ClientList
+from .base import Layout, Placement, _ClientList, hidden
 
 
 class _Column(_ClientList):
@@ -134,6 +134,40 @@ class Columns(Layout):
         c.columns = [_Column(self.split, self.insert_position)]
         return c
 
+    def get_state(self):
+        columns = []
+        for col in self.columns:
+            state = col.get_state()
+            state.update(
+                width=col.width,
+                heights=[col.heights[c] for c in col],
+            )
+            columns.append(state)
+        return dict(columns=columns, current=self.current)
+
+    def restore_state(self, state, windows):
+        added = [c for col in self.columns for c in col]
+        columns = []
+        for saved in state["columns"]:
+            col = _Column(self.split, self.insert_position, saved["width"])
+            col.restore_state(saved, windows)
+            if len(col) == 0:
+                continue
+            if len(col) == len(saved["clients"]):
+                col.heights = dict(zip(col, saved["heights"]))
+            else:
+                col.heights = {c: 100 for c in col}
+            columns.append(col)
+        if len(columns) != len(state["columns"]):
+            for col in columns:
+                col.width = 100
+        self.columns = columns or [_Column(self.split, self.insert_position)]
+        self.current = min(state["current"], len(self.columns) - 1)
+        unsaved = set(windows.values())
+        for client in added:
+            if client in unsaved:
+                self.add(client)
+
     def info(self):
         d = Layout.info(self)
         d["clients"] = []
@@ -202,56 +236,60 @@ class Columns(Layout):
         return self.columns[self.current].cw
 
     def configure(self, client, screen):
+        self.configure_from_plan(client, screen)
+
+    def plan(self, windows, screen):
+        # the column and the offsets of every client, in one pass
+        positions = {}
         pos = 0
         for col in self.columns:
-            if client in col:
-                break
-            pos += col.width
-        else:
-            client.hide()
-            return
-        if client.has_focus:
-            color = self.group.qtile.color_pixel(self.border_focus if col.split
-                                                 else self.border_focus_stack)
-        else:
-            color = self.group.qtile.color_pixel(self.border_normal if col.split
-                                                 else self.border_normal_stack)
-        if len(self.columns) == 1 and (len(col) == 1 or not col.split):
-            border = 0
-        else:
-            border = self.border_width
-        width = int(0.5 + col.width * screen.width * 0.01 / len(self.columns))
-        x = screen.x + int(0.5 + pos * screen.width * 0.01 / len(self.columns))
-        if col.split:
-            pos = 0
+            cpos = 0
             for c in col:
-                if client == c:
-                    break
-                pos += col.heights[c]
-            height = int(
-                0.5 + col.heights[client] * screen.height * 0.01 / len(col))
-            y = screen.y + int(0.5 + pos * screen.height * 0.01 / len(col))
-            client.place(
+                positions[c] = (col, pos, cpos)
+                cpos += col.heights[c]
+            pos += col.width
+        colors = {}
+        ncols = len(self.columns)
+        plan = []
+        for client in windows:
+            if client not in positions:
+                plan.append(hidden(client))
+                continue
+            col, pos, cpos = positions[client]
+            if not col.split and client != col.cw:
+                plan.append(hidden(client))
+                continue
+            if client.has_focus:
+                color = self.border_focus if col.split \
+                    else self.border_focus_stack
+            else:
+                color = self.border_normal if col.split \
+                    else self.border_normal_stack
+            if color not in colors:
+                colors[color] = self.group.qtile.color_pixel(color)
+            if ncols == 1 and (len(col) == 1 or not col.split):
+                border = 0
+            else:
+                border = self.border_width
+            width = int(0.5 + col.width * screen.width * 0.01 / ncols)
+            x = screen.x + int(0.5 + pos * screen.width * 0.01 / ncols)
+            if col.split:
+                height = int(
+                    0.5 + col.heights[client] * screen.height * 0.01 / len(col))
+                y = screen.y + int(0.5 + cpos * screen.height * 0.01 / len(col))
+            else:
+                height = screen.height
+                y = screen.y
+            plan.append(Placement(
+                client,
                 x,
                 y,
                 width - 2 * border,
                 height - 2 * border,
                 border,
-                color,
-                margin=self.margin)
-            client.unhide()
-        elif client == col.cw:
-            client.place(
-                x,
-                screen.y,
-                width - 2 * border,
-                screen.height - 2 * border,
-                border,
-                color,
-                margin=self.margin)
-            client.unhide()
-        else:
-            client.hide()
+                colors[color],
+                margin=self.margin))
+        return plan
 
     def focus_first(self):
         """Returns first client in first column of layout"""
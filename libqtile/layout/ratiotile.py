@@ -27,9 +27,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import functools
 import math
 
-from .base import _SimpleLayoutBase
+from .base import Placement, _SimpleLayoutBase, hidden
 
 
 ROWCOL = 1  # do rows at a time left to right top down
@@ -38,6 +39,49 @@ COLROW = 2  # do cols top to bottom, left to right
 GOLDEN_RATIO = 1.618
 
 
+def _possible_grids(num_windows):
+    if num_windows < 2:
+        end = 2
+    else:
+        end = num_windows // 2 + 1
+    for rows in range(1, end):
+        cols = int(math.ceil(num_windows / rows))
+        yield (rows, cols, ROWCOL)
+        if rows != cols:
+            # also want the reverse test
+            yield (cols, rows, COLROW)
+
+
+@functools.lru_cache(maxsize=1024)
+def _best_grid(ratio, num_windows, width, height):
+    best_ratio = None
+    best_rows_cols_orientation = None
+    for rows, cols, orientation in _possible_grids(num_windows):
+
+        sample_width = width / cols
+        sample_height = height / rows
+        sample_ratio = sample_width / sample_height
+        diff = abs(sample_ratio - ratio)
+        if best_ratio is None or diff < best_ratio:
+            best_ratio = diff
+            best_rows_cols_orientation = (rows, cols, orientation)
+
+    return best_rows_cols_orientation
+
+
+@functools.lru_cache(maxsize=128)
+def grid_sizes(num_windows, width, height, ratio, fancy):
+    """The rectangles of num_windows tiles in a width x height area
+
+    Solutions are cached, so laying out the same number of windows on a
+    screen of the same size doesn't search the possible grids again.
+    """
+    gi = GridInfo(ratio, num_windows, width, height)
+    if fancy:
+        return tuple(gi.get_sizes_advanced(width, height))
+    return tuple(gi.get_sizes(width, height))
+
+
 class GridInfo:
     """
     Calculates sizes for grids
@@ -68,34 +112,13 @@ class GridInfo:
 
     def calc(self, num_windows, width, height):
         """returns (rows, cols, orientation) tuple given input"""
-        best_ratio = None
-        best_rows_cols_orientation = None
-        for rows, cols, orientation in self._possible_grids(num_windows):
-
-            sample_width = width / cols
-            sample_height = height / rows
-            sample_ratio = sample_width / sample_height
-            diff = abs(sample_ratio - self.ratio)
-            if best_ratio is None or diff < best_ratio:
-                best_ratio = diff
-                best_rows_cols_orientation = (rows, cols, orientation)
-
-        return best_rows_cols_orientation
+        return _best_grid(self.ratio, num_windows, width, height)
 
     def _possible_grids(self, num_windows):
         """
         iterates over possible grids given a number of windows
         """
-        if num_windows < 2:
-            end = 2
-        else:
-            end = num_windows // 2 + 1
-        for rows in range(1, end):
-            cols = int(math.ceil(num_windows / rows))
-            yield (rows, cols, ROWCOL)
-            if rows != cols:
-                # also want the reverse test
-                yield (cols, rows, COLROW)
+        return _possible_grids(num_windows)
 
     def get_sizes_advanced(self, total_width, total_height,
                            xoffset=0, yoffset=0):
@@ -221,72 +244,50 @@ class RatioTile(_SimpleLayoutBase):
     def __init__(self, **config):
         _SimpleLayoutBase.__init__(self, **config)
         self.add_defaults(RatioTile.defaults)
-        self.dirty = True  # need to recalculate
         self.layout_info = []
-        self.last_size = None
-        self.last_screen = None
 
     def clone(self, group):
         return _SimpleLayoutBase.clone(self, group)
 
     def add(self, w):
-        self.dirty = True
         self.clients.append_head(w)
 
-    def remove(self, w):
-        self.dirty = True
-        return _SimpleLayoutBase.remove(self, w)
-
     def configure(self, win, screen):
-        # force recalc
-        if not self.last_screen or self.last_screen != screen:
-            self.last_screen = screen
-            self.dirty = True
-        if self.last_size and not self.dirty:
-            if screen.width != self.last_size[0] or \
-                    screen.height != self.last_size[1]:
-                self.dirty = True
-        if self.dirty:
-            gi = GridInfo(
-                self.ratio,
-                len(self.clients),
-                screen.width,
-                screen.height
-            )
-            self.last_size = (screen.width, screen.height)
-            if self.fancy:
-                method = gi.get_sizes_advanced
-            else:
-                method = gi.get_sizes
+        self.configure_from_plan(win, screen)
 
-            self.layout_info = method(
+    def plan(self, windows, screen):
+        if not self.clients:
+            sizes = ()
+        else:
+            sizes = grid_sizes(
+                len(self.clients),
                 screen.width,
                 screen.height,
-                screen.x,
-                screen.y
+                self.ratio,
+                self.fancy,
             )
-
-            self.dirty = False
-        try:
-            idx = self.clients.index(win)
-        except ValueError:
-            win.hide()
-            return
-        x, y, w, h = self.layout_info[idx]
-        if win.has_focus:
-            bc = self.group.qtile.color_pixel(self.border_focus)
-        else:
-            bc = self.group.qtile.color_pixel(self.border_normal)
-        win.place(
-            x,
-            y,
-            w - self.border_width * 2,
-            h - self.border_width * 2,
-            self.border_width,
-            bc,
-            margin=self.margin,
-        )
-        win.unhide()
+        self.layout_info = [
+            (x + screen.x, y + screen.y, w, h) for x, y, w, h in sizes
+        ]
+        focus_bc = self.group.qtile.color_pixel(self.border_focus)
+        normal_bc = self.group.qtile.color_pixel(self.border_normal)
+        plan = []
+        for win in windows:
+            if win not in self.clients:
+                plan.append(hidden(win))
+                continue
+            x, y, w, h = self.layout_info[self.clients.index(win)]
+            plan.append(Placement(
+                win,
+                x,
+                y,
+                w - self.border_width * 2,
+                h - self.border_width * 2,
+                self.border_width,
+                focus_bc if win.has_focus else normal_bc,
+                margin=self.margin,
+            ))
+        return plan
 
     def info(self):
         d = _SimpleLayoutBase.info(self)
@@ -17,7 +17,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from .base import Layout, _ClientList
+from .base import Layout, Placement, _ClientList, hidden
 from .. import utils
 
 
@@ -206,39 +206,41 @@ class Stack(Layout):
                 return n.cw
 
     def configure(self, client, screen):
-        for i, s in enumerate(self.stacks):
-            if client in s:
-                break
-        else:
-            client.hide()
-            return
-
-        if client.has_focus:
-            px = self.group.qtile.color_pixel(self.border_focus)
-        else:
-            px = self.group.qtile.color_pixel(self.border_normal)
+        self.configure_from_plan(client, screen)
 
+    def plan(self, windows, screen):
+        # the stack and the index of every client, in one pass
+        positions = {}
+        for i, s in enumerate(self.stacks):
+            for j, c in enumerate(s):
+                positions[c] = (i, s, j)
+        focus_px = self.group.qtile.color_pixel(self.border_focus)
+        normal_px = self.group.qtile.color_pixel(self.border_normal)
         column_width = int(screen.width / len(self.stacks))
-        xoffset = screen.x + i * column_width
         window_width = column_width - 2 * self.border_width
-
-        if s.split:
-            column_height = int(screen.height / len(s))
-            window_height = column_height - 2 * self.border_width
-            yoffset = screen.y + s.index(client) * column_height
-            client.place(
-                xoffset,
-                yoffset,
-                window_width,
-                window_height,
-                self.border_width,
-                px,
-                margin=self.margin,
-            )
-            client.unhide()
-        else:
-            if client == s.cw:
-                client.place(
+        plan = []
+        for client in windows:
+            if client not in positions:
+                plan.append(hidden(client))
+                continue
+            i, s, j = positions[client]
+            px = focus_px if client.has_focus else normal_px
+            xoffset = screen.x + i * column_width
+            if s.split:
+                column_height = int(screen.height / len(s))
+                plan.append(Placement(
+                    client,
+                    xoffset,
+                    screen.y + j * column_height,
+                    window_width,
+                    column_height - 2 * self.border_width,
+                    self.border_width,
+                    px,
+                    margin=self.margin,
+                ))
+            elif client == s.cw:
+                plan.append(Placement(
+                    client,
                     xoffset,
                     screen.y,
                     window_width,
@@ -246,10 +248,26 @@ class Stack(Layout):
                     self.border_width,
                     px,
                     margin=self.margin,
-                )
-                client.unhide()
+                ))
             else:
-                client.hide()
+                plan.append(hidden(client))
+        return plan
+
+    def get_state(self):
+        return dict(stacks=[s.get_state() for s in self.stacks])
+
+    def restore_state(self, state, windows):
+        added = list(self.clients)
+        self.stacks = [_WinStack(autosplit=self.autosplit)
+                       for i in range(self.num_stacks)]
+        # the clients of stacks which are gone from the config are added
+        # again like new clients
+        for s, saved in zip(self.stacks, state["stacks"]):
+            s.restore_state(saved, windows)
+        unsaved = set(windows.values())
+        for client in added:
+            if client in unsaved:
+                self.add(client)
 
     def info(self):
         d = Layout.info(self)
@@ -358,6 +358,7 @@ class TreeTab(Layout):
         c._focused = None
         c._panel = None
         c._tree = Root(self.sections)
+        c._nodes = {}
         return c
 
     def _get_window(self):
@@ -462,6 +463,56 @@ class TreeTab(Layout):
         if self._drawer is not None:
             self._drawer.finalize()
 
+    def get_state(self):
+        def save(node):
+            return [
+                node.window.window.wid,
+                node.expanded,
+                [save(child) for child in node.children],
+            ]
+        return dict(
+            sections=[
+                [section.title, section.expanded,
+                 [save(node) for node in section.children]]
+                for section in self._tree.children
+            ],
+            focused=self._focused.window.wid if self._focused else None,
+        )
+
+    def restore_state(self, state, windows):
+        def restore(parent, saved):
+            wid, expanded, children = saved
+            client = windows.pop(wid, None)
+            if client is not None:
+                node = Window(client)
+                node.expanded = expanded
+                parent.add(node)
+                self._nodes[client] = node
+                parent = node
+            # the children of a window which is gone move up a level
+            for child in children:
+                restore(parent, child)
+
+        added = list(self._nodes)
+        focused = windows.get(state["focused"])
+        self._tree = Root(self.sections)
+        self._nodes = {}
+        # the windows of sections which are gone from the config are added
+        # again like new windows
+        for title, expanded, nodes in state["sections"]:
+            section = self._tree.sections.get(title)
+            if section is None:
+                continue
+            section.expanded = expanded
+            for saved in nodes:
+                restore(section, saved)
+        self._focused = focused if focused in self._nodes else None
+        unsaved = set(windows.values())
+        for client in added:
+            if client in unsaved:
+                self.add(client)
+        self.draw_panel()
+
     def info(self):
         d = Layout.info(self)
         d["clients"] = [x.name for x in self._nodes]
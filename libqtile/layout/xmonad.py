@@ -33,7 +33,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .base import _SimpleLayoutBase
+from .base import Placement, _SimpleLayoutBase, hidden
+import itertools
 import math
 
 
@@ -266,40 +267,53 @@ class MonadTall(_SimpleLayoutBase):
 
     def configure(self, client, screen):
         "Position client based on order and sizes"
+        self.configure_from_plan(client, screen)
+
+    def plan(self, windows, screen):
+        "Position all windows based on order and sizes"
         # if no sizes or normalize flag is set, normalize
         if not self.relative_sizes or self.do_normalize:
             self.cmd_normalize(False)
 
-        # if client not in this layout
-        if not self.clients or client not in self.clients:
-            client.hide()
-            return
-
-        # determine focus border-color
-        if client.has_focus:
-            px = self.group.qtile.color_pixel(self.border_focus)
-        else:
-            px = self.group.qtile.color_pixel(self.border_normal)
-
-        # single client - fullscreen
-        if len(self.clients) == 1:
-            client.place(
-                self.group.screen.dx,
-                self.group.screen.dy,
-                self.group.screen.dwidth - 2 * self.single_border_width,
-                self.group.screen.dheight - 2 * self.single_border_width,
-                self.single_border_width,
-                px,
-                margin=self.single_margin,
-            )
-            client.unhide()
-            return
-        cidx = self.clients.index(client)
-        self._configure_specific(client, screen, px, cidx)
-        client.unhide()
-
-    def _configure_specific(self, client, screen, px, cidx):
-        """Specific configuration for xmonad tall."""
+        focus_px = self.group.qtile.color_pixel(self.border_focus)
+        normal_px = self.group.qtile.color_pixel(self.border_normal)
+        # offsets[i] is the relative offset of the i-th secondary client
+        offsets = list(itertools.accumulate([0] + self.relative_sizes))
+
+        plan = []
+        for client in windows:
+            # if client not in this layout
+            if client not in self.clients:
+                plan.append(hidden(client))
+                continue
+            cidx = self.clients.index(client)
+
+            # determine focus border-color
+            px = focus_px if client.has_focus else normal_px
+
+            # single client - fullscreen
+            if len(self.clients) == 1:
+                plan.append(Placement(
+                    client,
+                    self.group.screen.dx,
+                    self.group.screen.dy,
+                    self.group.screen.dwidth - 2 * self.single_border_width,
+                    self.group.screen.dheight - 2 * self.single_border_width,
+                    self.single_border_width,
+                    px,
+                    margin=self.single_margin,
+                ))
+                continue
+            offset = offsets[cidx - 1] if cidx > 0 else 0
+            plan.append(self._plan_specific(client, px, cidx, offset))
+        return plan
+
+    def _plan_specific(self, client, px, cidx, offset):
+        """Specific placement for xmonad tall.
+
+        offset is the sum of the relative sizes of the secondary clients
+        before this one.
+        """
         # calculate main/secondary pane size
         width_main = int(self.group.screen.dwidth * self.ratio)
         width_shared = self.group.screen.dwidth - width_main
@@ -326,9 +340,7 @@ class MonadTall(_SimpleLayoutBase):
             width = width_shared - 2 * self.border_width
             # ypos is the sum of all clients above it
             ypos = self.group.screen.dy + \
-                self._get_absolute_size_from_relative(
-                    sum(self.relative_sizes[:cidx - 1])
-                )
+                self._get_absolute_size_from_relative(offset)
             # get height from precalculated height list
             height = self._get_absolute_size_from_relative(
                 self.relative_sizes[cidx - 1]
@@ -338,7 +350,8 @@ class MonadTall(_SimpleLayoutBase):
                 ypos -= self.margin
                 height += self.margin
             # place client based on calculated dimensions
-            client.place(
+            return Placement(
+                client,
                 xpos,
                 ypos,
                 width,
@@ -350,7 +363,8 @@ class MonadTall(_SimpleLayoutBase):
         else:
             # main client
             width = width_main - 2 * self.border_width
-            client.place(
+            return Placement(
+                client,
                 xpos + self.margin,
                 self.group.screen.dy + self.margin,
                 width - self.margin,
@@ -360,6 +374,20 @@ class MonadTall(_SimpleLayoutBase):
                 px,
             )
 
+    def get_state(self):
+        state = _SimpleLayoutBase.get_state(self)
+        state.update(relative_sizes=self.relative_sizes)
+        return state
+
+    def restore_state(self, state, windows):
+        _SimpleLayoutBase.restore_state(self, state, windows)
+        # the sizes only fit if the same secondary clients are back
+        if len(state["relative_sizes"]) == len(self.clients) - 1:
+            self.relative_sizes = list(state["relative_sizes"])
+            self.do_normalize = False
+        else:
+            self.do_normalize = True
+
     def info(self):
         d = _SimpleLayoutBase.info(self)
         d.update(dict(
@@ -670,7 +698,7 @@ class MonadTall(_SimpleLayoutBase):
         """Get closest window to a point x,y"""
         target = min(
             clients,
-            key=lambda c: math.hypot(c.info()['x'] - x, c.info()['y'] - y)
+            key=lambda c: math.hypot(c.x - x, c.y - y)
         )
         return target
 
@@ -684,7 +712,7 @@ class MonadTall(_SimpleLayoutBase):
         """Swap current window with closest window to the left"""
         win = self.clients.current_client
         x, y = win.x, win.y
-        candidates = [c for c in self.clients if c.info()['x'] < x]
+        candidates = [c for c in self.clients if c.x < x]
         target = self._get_closest(x, y, candidates)
         self.cmd_swap(win, target)
 
@@ -692,7 +720,7 @@ class MonadTall(_SimpleLayoutBase):
         """Swap current window with closest window to the right"""
         win = self.clients.current_client
         x, y = win.x, win.y
-        candidates = [c for c in self.clients if c.info()['x'] > x]
+        candidates = [c for c in self.clients if c.x > x]
         target = self._get_closest(x, y, candidates)
         self.cmd_swap(win, target)
 
@@ -707,7 +735,7 @@ class MonadTall(_SimpleLayoutBase):
         """Focus on the closest window to the left of the current window"""
         win = self.clients.current_client
         x, y = win.x, win.y
-        candidates = [c for c in self.clients if c.info()['x'] < x]
+        candidates = [c for c in self.clients if c.x < x]
         self.clients.current_client = self._get_closest(x, y, candidates)
         self.group.focus(self.clients.current_client)
 
@@ -715,7 +743,7 @@ class MonadTall(_SimpleLayoutBase):
         """Focus on the closest window to the right of the current window"""
         win = self.clients.current_client
         x, y = win.x, win.y
-        candidates = [c for c in self.clients if c.info()['x'] > x]
+        candidates = [c for c in self.clients if c.x > x]
         self.clients.current_client = self._get_closest(x, y, candidates)
         self.group.focus(self.clients.current_client)
 
@@ -855,8 +883,12 @@ class MonadWide(MonadTall):
         else:
             self._grow_secondary(maxed_size)
 
-    def _configure_specific(self, client, screen, px, cidx):
-        """Specific configuration for xmonad wide."""
+    def _plan_specific(self, client, px, cidx, offset):
+        """Specific placement for xmonad wide.
+
+        offset is the sum of the relative sizes of the secondary clients
+        before this one.
+        """
         # calculate main/secondary column widths
         height_main = int(self.group.screen.dheight * self.ratio)
         height_shared = self.group.screen.dheight - height_main
@@ -883,9 +915,7 @@ class MonadWide(MonadTall):
             height = height_shared - 2 * self.border_width
             # xpos is the sum of all clients left of it
             xpos = self.group.screen.dx + \
-                self._get_absolute_size_from_relative(
-                    sum(self.relative_sizes[:cidx - 1])
-                )
+                self._get_absolute_size_from_relative(offset)
             # get width from precalculated witdh list
             width = self._get_absolute_size_from_relative(
                 self.relative_sizes[cidx - 1]
@@ -895,7 +925,8 @@ class MonadWide(MonadTall):
                 xpos -= self.margin
                 width += self.margin
             # place client based on calculated dimensions
-            client.place(
+            return Placement(
+                client,
                 xpos,
                 ypos,
                 width - 2 * self.border_width,
@@ -907,7 +938,8 @@ class MonadWide(MonadTall):
         else:
             # main client
             height = height_main - 2 * self.border_width
-            client.place(
+            return Placement(
+                client,
                 self.group.screen.dx + self.margin,
                 ypos + self.margin,
                 (self.group.screen.dwidth -
@@ -957,7 +989,7 @@ class MonadWide(MonadTall):
         """Swap current window with closest window to the down"""
         win = self.clients.current_client
         x, y = win.x, win.y
-        candidates = [c for c in self.clients.clients if c.info()['y'] > y]
+        candidates = [c for c in self.clients.clients if c.y > y]
         target = self._get_closest(x, y, candidates)
         self.cmd_swap(win, target)
 
@@ -965,7 +997,7 @@ class MonadWide(MonadTall):
         """Swap current window with closest window to the up"""
         win = self.clients.current_client
         x, y = win.x, win.y
-        candidates = [c for c in self.clients if c.info()['y'] < y]
+        candidates = [c for c in self.clients if c.y < y]
         target = self._get_closest(x, y, candidates)
         self.cmd_swap(win, target)
 
@@ -0,0 +1,487 @@
+# Copyright (c) 2019 Qtile contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+    Shared sampling of system metrics for widgets.
+
+    Widgets displaying the same metrics (e.g. a CPUGraph on every screen)
+    subscribe to a Sampler instead of reading /proc themselves. There is one
+    sampler per source and interval, so each source is read and parsed once
+    per tick, however many widgets display it. Files are kept open and re-read
+    in place with pread.
+
+    Widgets showing values which rarely change (e.g. from /sys) use an
+    AdaptivePoller instead, which backs off while the value doesn't change,
+    and can be woken up by kernel uevents.
+"""
+import os
+import platform
+import socket
+import threading
+
+from .log_utils import logger
+
+from typing import Any, Dict, Tuple
+
+
+def _linux_proc(path):
+    if platform.system() == "FreeBSD":
+        return "/compat/linux" + path
+    return path
+
+
+class MetricsFile:
+    """A /proc or /sys file which is kept open and re-read from the start"""
+
+    def __init__(self, path, bufsize=4096):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        self.buffer = bytearray(bufsize)
+        self.lock = threading.Lock()
+
+    def _pread(self):
+        if hasattr(os, "preadv"):
+            return os.preadv(self.fd, [self.buffer], 0)
+        data = os.pread(self.fd, len(self.buffer), 0)
+        self.buffer[:len(data)] = data
+        return len(data)
+
+    def read(self):
+        with self.lock:
+            while True:
+                size = self._pread()
+                if size < len(self.buffer):
+                    return str(memoryview(self.buffer)[:size], "utf-8")
+                # the file may be longer than our buffer, grow it and retry
+                self.buffer = bytearray(len(self.buffer) * 2)
+
+    def close(self):
+        os.close(self.fd)
+
+
+_files: Dict[str, MetricsFile] = {}
+
+
+def read_file(path):
+    """Read a small file such as a sysfs attribute
+
+    The file is kept open and re-read with pread on the next call.
+    """
+    file = _files.get(path)
+    if file is None:
+        file = _files[path] = MetricsFile(path)
+    try:
+        return file.read()
+    except OSError:
+        # e.g. the device went away, reopen on the next read
+        del _files[path]
+        file.close()
+        raise
+
+
+def parse_stat(text):
+    """Parse the cpu lines of /proc/stat into lists of jiffies"""
+    stat = {}
+    for line in text.splitlines():
+        if not line.startswith("cpu"):
+            continue
+        name, *values = line.split()
+        stat[name] = [int(i) for i in values]
+    return stat
+
+
+def parse_meminfo(text):
+    """Parse /proc/meminfo into a dict of values in kB"""
+    val = {}
+    for line in text.splitlines():
+        if line.lstrip().startswith("total") or ":" not in line:
+            continue
+        key, tail = line.split(":", 1)
+        val[key.strip()] = int(tail.split()[0])
+    val['MemUsed'] = val['MemTotal'] - val['MemFree']
+    return val
+
+
+def parse_net_dev(text):
+    """Parse /proc/net/dev into received and transmitted bytes per interface"""
+    interfaces = {}
+    for line in text.splitlines()[2:]:
+        name, _, counters = line.partition(":")
+        counters = counters.split()
+        interfaces[name.strip()] = {
+            'down': float(counters[0]),
+            'up': float(counters[8]),
+        }
+    return interfaces
+
+
+class FileSource:
+    """A metrics source parsed from the contents of a file"""
+    blocking = False
+
+    def __init__(self, path, parse):
+        self.path = path
+        self.parse = parse
+        self.file = None
+
+    def sample(self):
+        if self.file is None:
+            self.file = MetricsFile(self.path)
+        try:
+            return self.parse(self.file.read())
+        except OSError:
+            # e.g. a network interface went away, reopen on the next sample
+            self.close()
+            raise
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class StatvfsSource:
+    """File system statistics of a mount point
+
+    statvfs may block on network file systems, so it is sampled in the
+    executor.
+    """
+    blocking = True
+
+    def __init__(self, path):
+        self.path = path
+
+    def sample(self):
+        return os.statvfs(self.path)
+
+    def close(self):
+        pass
+
+
+_sources: Dict[Tuple, Any] = {}
+
+
+def _source(key, factory):
+    source = _sources.get(key)
+    if source is None:
+        source = _sources[key] = factory()
+    return source
+
+
+def file_source(path, parse, shared=True):
+    """Get the shared source for a file and parser, or a new one"""
+    if not shared:
+        return FileSource(path, parse)
+    return _source(("file", path, parse), lambda: FileSource(path, parse))
+
+
+def proc_stat(shared=True):
+    return file_source(_linux_proc("/proc/stat"), parse_stat, shared)
+
+
+def meminfo(shared=True):
+    return file_source(_linux_proc("/proc/meminfo"), parse_meminfo, shared)
+
+
+def net_dev(shared=True):
+    return file_source(_linux_proc("/proc/net/dev"), parse_net_dev, shared)
+
+
+def statvfs(path, shared=True):
+    if not shared:
+        return StatvfsSource(path)
+    return _source(("statvfs", path), lambda: StatvfsSource(path))
+
+
+def sample_once(source):
+    """Sample a source which isn't shared, and close it
+
+    For values read outside of a sampler, e.g. the initial value of a
+    widget: shared sources are only closed once no sampler uses them, so a
+    widget which never subscribes would keep them open.
+    """
+    try:
+        return source.sample()
+    finally:
+        source.close()
+
+
+def _release_source(source):
+    """Close a shared source and forget it, unless a sampler still uses it"""
+    if any(sampler.source is source for sampler in _samplers.values()):
+        return
+    for key, value in list(_sources.items()):
+        if value is source:
+            del _sources[key]
+            source.close()
+
+
+class Sampler:
+    """Samples a source every interval and publishes it to the subscribers
+
+    Subscribers are called with the sampled value, or with None when the
+    source could not be read.
+    """
+
+    def __init__(self, qtile, source, interval):
+        self.qtile = qtile
+        self.source = source
+        self.interval = interval
+        self.subscribers = []
+        self.value = None
+        self._timer = None
+        self._pending = False
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        if self._timer is None:
+            self._schedule()
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+        if not self.subscribers:
+            self.stop()
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def sample(self):
+        """Read the source now, without publishing the value"""
+        try:
+            self.value = self.source.sample()
+        except OSError:
+            self.value = None
+        return self.value
+
+    def publish(self, value):
+        for callback in list(self.subscribers):
+            try:
+                callback(value)
+            except Exception:
+                logger.exception("metrics subscriber %s failed", callback)
+
+    def _schedule(self):
+        self._timer = self.qtile.call_later(self.interval, self._tick)
+
+    def _tick(self):
+        self._schedule()
+        if not self.source.blocking:
+            self.publish(self.sample())
+        elif not self._pending:
+            self._pending = True
+            future = self.qtile.run_in_executor(self.sample)
+            future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        self._pending = False
+        try:
+            value = future.result()
+        except Exception:
+            logger.exception("sampling %s failed", self.source)
+            value = None
+        self.qtile.call_soon(self.publish, value)
+
+
+# (qtile, source, interval) -> Sampler
+_samplers: Dict[Tuple, 'Sampler'] = {}
+
+
+def subscribe(qtile, source, interval, callback):
+    """Subscribe callback to the shared sampler of source at interval"""
+    key = (qtile, source, interval)
+    sampler = _samplers.get(key)
+    if sampler is None:
+        sampler = _samplers[key] = Sampler(qtile, source, interval)
+    sampler.subscribe(callback)
+    return sampler
+
+
+def unsubscribe(sampler, callback):
+    sampler.unsubscribe(callback)
+    if not sampler.subscribers:
+        _samplers.pop((sampler.qtile, sampler.source, sampler.interval), None)
+        _release_source(sampler.source)
+
+
+class AdaptivePoller:
+    """Calls poll every interval and callback when its value changes
+
+    While the value doesn't change, the interval doubles up to max_interval.
+    It is reset when the value changes, or when trigger() is called, e.g.
+    because a uevent said the value is likely to have changed.
+    """
+
+    def __init__(self, qtile, poll, callback, interval, max_interval=None):
+        self.qtile = qtile
+        self.poll = poll
+        self.callback = callback
+        self.interval = interval
+        self.max_interval = max_interval or interval
+        self.delay = interval
+        self.value = None
+        self._polled = False
+        self._timer = None
+
+    def start(self):
+        self._run()
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def trigger(self, *args):
+        self.delay = self.interval
+        self._run(backoff=False)
+
+    def _run(self, backoff=True):
+        self.stop()
+        try:
+            try:
+                value = self.poll()
+            except Exception:
+                logger.exception("polling %s failed", self.poll)
+                if not self._polled:
+                    # there is no value to show yet
+                    return
+                value = self.value
+            if not self._polled or value != self.value:
+                self._polled = True
+                self.value = value
+                self.delay = self.interval
+                self.callback(value)
+            elif backoff and self.delay is not None:
+                self.delay = min(self.delay * 2, self.max_interval)
+        finally:
+            # a failing callback doesn't stop the polling
+            if self.delay is not None:
+                self._timer = self.qtile.call_later(self.delay, self._run)
+
+
+NETLINK_KOBJECT_UEVENT = 15
+
+
+class UeventMonitor:
+    """Dispatches the kernel uevents of a subsystem to its subscribers
+
+    Subscribers are called with a dict of the uevent properties, e.g.
+    SUBSYSTEM, ACTION and DEVPATH.
+    """
+
+    def __init__(self, qtile):
+        self.qtile = qtile
+        self.subscribers: Dict[str, list] = {}
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM,
+                                  NETLINK_KOBJECT_UEVENT)
+        try:
+            # group 1 gets the uevents from the kernel
+            self.sock.bind((0, 1))
+            self.sock.setblocking(False)
+        except OSError:
+            self.sock.close()
+            raise
+        qtile.add_reader(self.sock.fileno(), self._on_readable)
+
+    @staticmethod
+    def parse(data):
+        # "ACTION@DEVPATH\0KEY=VALUE\0KEY=VALUE..."
+        props = {}
+        for field in data.split(b"\0")[1:]:
+            key, sep, value = field.partition(b"=")
+            if sep:
+                props[key.decode()] = value.decode(errors="replace")
+        return props
+
+    def _on_readable(self):
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                # e.g. ENOBUFS after an event storm, we only lost events
+                logger.debug("reading uevents failed", exc_info=True)
+                return
+            props = self.parse(data)
+            subscribers = self.subscribers.get(props.get("SUBSYSTEM"), ())
+            for callback in list(subscribers):
+                try:
+                    callback(props)
+                except Exception:
+                    logger.exception("uevent subscriber %s failed", callback)
+
+    def subscribe(self, subsystem, callback):
+        self.subscribers.setdefault(subsystem, []).append(callback)
+
+    def unsubscribe(self, subsystem, callback):
+        callbacks = self.subscribers.get(subsystem, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self.subscribers.pop(subsystem, None)
+
+    def close(self):
+        self.qtile.remove_reader(self.sock.fileno())
+        self.sock.close()
+
+
+# qtile -> UeventMonitor
+_uevent_monitors: Dict[Any, UeventMonitor] = {}
+
+
+def subscribe_uevents(qtile, subsystem, callback):
+    """Call callback on the uevents of subsystem, e.g. "power_supply"
+
+    Returns False when uevents are not available on this system.
+    """
+    monitor = _uevent_monitors.get(qtile)
+    if monitor is None:
+        try:
+            monitor = _uevent_monitors[qtile] = UeventMonitor(qtile)
+        except (AttributeError, OSError):
+            # AF_NETLINK only exists on Linux
+            logger.debug("uevents are not available", exc_info=True)
+            return False
+    monitor.subscribe(subsystem, callback)
+    return True
+
+
+def unsubscribe_uevents(qtile, subsystem, callback):
+    monitor = _uevent_monitors.get(qtile)
+    if monitor is not None:
+        monitor.unsubscribe(subsystem, callback)
+        if not monitor.subscribers:
+            del _uevent_monitors[qtile]
+            monitor.close()
+
+
+def finalize(qtile):
+    """Stop the samplers and uevent monitor of qtile, closing their sources"""
+    for key, sampler in list(_samplers.items()):
+        if key[0] is qtile:
+            del _samplers[key]
+            sampler.stop()
+            _release_source(sampler.source)
+    monitor = _uevent_monitors.pop(qtile, None)
+    if monitor is not None:
+        monitor.close()
@@ -0,0 +1,412 @@
+# Copyright (c) 2019 Qtile contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+    Event driven access to ALSA mixers for the volume widgets.
+
+    AlsaMixer talks to libasound through ctypes and hands its poll
+    descriptors to the event loop, so volume changes are pushed to the
+    widgets. Without libasound, AmixerMixer runs one long-lived
+    ``alsactl monitor`` process to learn about changes, and only runs amixer
+    when the volume actually changed or is being set.
+"""
+import ctypes
+import ctypes.util
+import os
+import re
+import shutil
+import subprocess
+from collections import namedtuple
+
+from .log_utils import logger
+
+from typing import Dict, Tuple
+
+MixerStatus = namedtuple('MixerStatus', ('volume', 'muted'))
+
+# published instead of a status when the connection to the mixer is lost
+LOST = object()
+
+re_vol = re.compile(r'\[(\d?\d?\d?)%\]')
+
+
+class MixerError(Exception):
+    pass
+
+
+class _PollFd(ctypes.Structure):
+    _fields_ = [
+        ("fd", ctypes.c_int),
+        ("events", ctypes.c_short),
+        ("revents", ctypes.c_short),
+    ]
+
+
+_libasound = None
+
+
+def _get_libasound():
+    global _libasound
+    if _libasound is not None:
+        return _libasound
+    name = ctypes.util.find_library("asound")
+    if name is None:
+        raise MixerError("libasound not found")
+    lib = ctypes.CDLL(name)
+    p = ctypes.c_void_p
+    long_p = ctypes.POINTER(ctypes.c_long)
+    int_p = ctypes.POINTER(ctypes.c_int)
+    signatures = {
+        "snd_mixer_open": ([ctypes.POINTER(p), ctypes.c_int], ctypes.c_int),
+        "snd_mixer_attach": ([p, ctypes.c_char_p], ctypes.c_int),
+        "snd_mixer_selem_register": ([p, p, p], ctypes.c_int),
+        "snd_mixer_load": ([p], ctypes.c_int),
+        "snd_mixer_close": ([p], ctypes.c_int),
+        "snd_mixer_handle_events": ([p], ctypes.c_int),
+        "snd_mixer_poll_descriptors_count": ([p], ctypes.c_int),
+        "snd_mixer_poll_descriptors": (
+            [p, ctypes.POINTER(_PollFd), ctypes.c_uint], ctypes.c_int),
+        "snd_mixer_selem_id_malloc": ([ctypes.POINTER(p)], ctypes.c_int),
+        "snd_mixer_selem_id_free": ([p], None),
+        "snd_mixer_selem_id_set_index": ([p, ctypes.c_uint], None),
+        "snd_mixer_selem_id_set_name": ([p, ctypes.c_char_p], None),
+        "snd_mixer_find_selem": ([p, p], p),
+        "snd_mixer_selem_get_playback_volume_range": (
+            [p, long_p, long_p], ctypes.c_int),
+        "snd_mixer_selem_get_playback_volume": (
+            [p, ctypes.c_int, long_p], ctypes.c_int),
+        "snd_mixer_selem_set_playback_volume_all": (
+            [p, ctypes.c_long], ctypes.c_int),
+        "snd_mixer_selem_has_playback_switch": ([p], ctypes.c_int),
+        "snd_mixer_selem_get_playback_switch": (
+            [p, ctypes.c_int, int_p], ctypes.c_int),
+        "snd_mixer_selem_set_playback_switch_all": (
+            [p, ctypes.c_int], ctypes.c_int),
+    }
+    for func, (argtypes, restype) in signatures.items():
+        getattr(lib, func).argtypes = argtypes
+        getattr(lib, func).restype = restype
+    _libasound = lib
+    return lib
+
+
+def _device_name(cardid, device):
+    # amixer -c <card> -D <device> uses the device, like here
+    if device is not None:
+        return device
+    if cardid is not None:
+        return "hw:%s" % cardid
+    return "default"
+
+
+class AlsaMixer:
+    """A simple mixer element of libasound"""
+    # reading the volume doesn't block, it is cached by libasound
+    blocking = False
+
+    def __init__(self, cardid, device, channel):
+        self.lib = lib = _get_libasound()
+        self.handle = ctypes.c_void_p()
+        self._check(lib.snd_mixer_open(ctypes.byref(self.handle), 0), "open")
+        try:
+            name = _device_name(cardid, device).encode()
+            self._check(lib.snd_mixer_attach(self.handle, name), "attach")
+            self._check(lib.snd_mixer_selem_register(self.handle, None, None),
+                        "register")
+            self._check(lib.snd_mixer_load(self.handle), "load")
+            self.elem = self._find(channel)
+        except MixerError:
+            lib.snd_mixer_close(self.handle)
+            raise
+        low, high = ctypes.c_long(), ctypes.c_long()
+        lib.snd_mixer_selem_get_playback_volume_range(
+            self.elem, ctypes.byref(low), ctypes.byref(high))
+        self.min = low.value
+        self.max = high.value
+        self.has_switch = bool(
+            lib.snd_mixer_selem_has_playback_switch(self.elem))
+
+    @staticmethod
+    def _check(ret, what):
+        if ret < 0:
+            raise MixerError("snd_mixer_%s failed: %d" % (what, ret))
+
+    def _find(self, channel):
+        sid = ctypes.c_void_p()
+        self._check(self.lib.snd_mixer_selem_id_malloc(ctypes.byref(sid)),
+                    "selem_id_malloc")
+        try:
+            self.lib.snd_mixer_selem_id_set_index(sid, 0)
+            self.lib.snd_mixer_selem_id_set_name(sid, channel.encode())
+            elem = self.lib.snd_mixer_find_selem(self.handle, sid)
+        finally:
+            self.lib.snd_mixer_selem_id_free(sid)
+        if not elem:
+            raise MixerError("no mixer element %s" % channel)
+        return elem
+
+    def fds(self):
+        count = self.lib.snd_mixer_poll_descriptors_count(self.handle)
+        pollfds = (_PollFd * count)()
+        count = self.lib.snd_mixer_poll_descriptors(self.handle, pollfds,
+                                                    count)
+        return [pollfds[i].fd for i in range(max(count, 0))]
+
+    def handle_events(self):
+        return self.lib.snd_mixer_handle_events(self.handle) >= 0
+
+    def _raw_volume(self):
+        value = ctypes.c_long()
+        self.lib.snd_mixer_selem_get_playback_volume(self.elem, 0,
+                                                     ctypes.byref(value))
+        return value.value
+
+    def _percent(self, raw):
+        if self.max <= self.min:
+            return 0
+        return int(round((raw - self.min) * 100 / (self.max - self.min)))
+
+    def status(self):
+        muted = False
+        if self.has_switch:
+            switch = ctypes.c_int()
+            self.lib.snd_mixer_selem_get_playback_switch(
+                self.elem, 0, ctypes.byref(switch))
+            muted = not switch.value
+        return MixerStatus(self._percent(self._raw_volume()), muted)
+
+    def change_volume(self, step):
+        raw = self._raw_volume()
+        percent = min(max(self._percent(raw) + step, 0), 100)
+        new = self.min + int(round(percent * (self.max - self.min) / 100))
+        if new == raw and step:
+            # small ranges may need more than step percent to move at all
+            new = min(max(raw + (1 if step > 0 else -1), self.min), self.max)
+        self.lib.snd_mixer_selem_set_playback_volume_all(self.elem, new)
+
+    def toggle_mute(self):
+        if self.has_switch:
+            self.lib.snd_mixer_selem_set_playback_switch_all(
+                self.elem, int(self.status().muted))
+
+    def close(self):
+        self.lib.snd_mixer_close(self.handle)
+
+
+class AmixerMixer:
+    """A mixer read and set with amixer, watched with alsactl monitor"""
+    blocking = True
+
+    def __init__(self, cardid, device, channel):
+        if shutil.which("amixer") is None or shutil.which("alsactl") is None:
+            raise MixerError("amixer or alsactl not found")
+        self.cardid = cardid
+        self.device = device
+        self.channel = channel
+        monitor = ["alsactl", "monitor"]
+        if cardid is not None:
+            monitor.append(str(cardid))
+        self.monitor = subprocess.Popen(monitor, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL)
+        os.set_blocking(self.monitor.stdout.fileno(), False)
+
+    def _command(self, *args):
+        cmd = ['amixer']
+        if self.cardid is not None:
+            cmd.extend(['-c', str(self.cardid)])
+        if self.device is not None:
+            cmd.extend(['-D', str(self.device)])
+        cmd.extend(args)
+        return cmd
+
+    def fds(self):
+        return [self.monitor.stdout.fileno()]
+
+    def handle_events(self):
+        try:
+            # the lines only tell that some control changed
+            return os.read(self.monitor.stdout.fileno(), 4096) != b""
+        except BlockingIOError:
+            return True
+
+    def status(self):
+        try:
+            out = subprocess.check_output(
+                self._command('sget', self.channel)).decode()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        match = re_vol.search(out)
+        if not match:
+            return None
+        return MixerStatus(int(match.groups()[0]), '[off]' in out)
+
+    def change_volume(self, step):
+        change = '%d%%%s' % (abs(step), '+' if step > 0 else '-')
+        subprocess.call(self._command('-q', 'sset', self.channel, change))
+
+    def toggle_mute(self):
+        subprocess.call(self._command('-q', 'sset', self.channel, 'toggle'))
+
+    def close(self):
+        self.monitor.terminate()
+        self.monitor.wait()
+
+
+def open_mixer(cardid, device, channel):
+    """Open the best available mixer, None if there is none"""
+    for backend in (AlsaMixer, AmixerMixer):
+        try:
+            return backend(cardid, device, channel)
+        except (MixerError, OSError) as e:
+            logger.debug("%s unavailable: %s", backend.__name__, e)
+    return None
+
+
+class MixerWatcher:
+    """Publishes the status of a mixer to the subscribers when it changes
+
+    Subscribers are called with a MixerStatus, or None when the status could
+    not be read. When the connection to the mixer is lost, e.g. because
+    ``alsactl monitor`` died, they are called with LOST instead and the
+    watcher is stopped, subscribing again opens the mixer again.
+    """
+
+    def __init__(self, qtile, mixer):
+        self.qtile = qtile
+        self.mixer = mixer
+        self.subscribers = []
+        self.status = None
+        self._fds = []
+        self._pending = False
+        self._stopped = False
+
+    def start(self):
+        self._fds = self.mixer.fds()
+        for fd in self._fds:
+            self.qtile.add_reader(fd, self._on_event)
+        self.refresh()
+
+    def stop(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        for fd in self._fds:
+            self.qtile.remove_reader(fd)
+        self._fds = []
+        self.mixer.close()
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        if self.status is not None:
+            callback(self.status)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def _on_event(self):
+        if not self.mixer.handle_events():
+            logger.warning("lost the connection to the mixer")
+            _forget(self)
+            self.stop()
+            self.publish(LOST)
+            self.subscribers = []
+            return
+        self.refresh()
+
+    def refresh(self):
+        """Read the status and publish it if it changed"""
+        if not self.mixer.blocking:
+            self.publish(self.mixer.status())
+        elif not self._pending:
+            self._pending = True
+            future = self.qtile.run_in_executor(self.mixer.status)
+            future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        self._pending = False
+        try:
+            status = future.result()
+        except Exception:
+            logger.exception("reading the mixer failed")
+            status = None
+        self.qtile.call_soon(self.publish, status)
+
+    def publish(self, status):
+        if self._stopped and status is not LOST:
+            return
+        if status == self.status and status is not None:
+            return
+        self.status = status
+        for callback in list(self.subscribers):
+            try:
+                callback(status)
+            except Exception:
+                logger.exception("mixer subscriber %s failed", callback)
+
+    def change_volume(self, step):
+        self.mixer.change_volume(step)
+        self.refresh()
+
+    def toggle_mute(self):
+        self.mixer.toggle_mute()
+        self.refresh()
+
+
+# (qtile, cardid, device, channel) -> MixerWatcher
+_watchers: Dict[Tuple, MixerWatcher] = {}
+
+
+def subscribe(qtile, cardid, device, channel, callback):
+    """Subscribe callback to the shared watcher of a mixer element
+
+    Returns the watcher, or None if no mixer backend is available.
+    """
+    key = (qtile, cardid, device, channel)
+    watcher = _watchers.get(key)
+    if watcher is None:
+        mixer = open_mixer(cardid, device, channel)
+        if mixer is None:
+            return None
+        watcher = _watchers[key] = MixerWatcher(qtile, mixer)
+        watcher.start()
+    watcher.subscribe(callback)
+    return watcher
+
+
+def _forget(watcher):
+    for key, value in list(_watchers.items()):
+        if value is watcher:
+            del _watchers[key]
+
+
+def unsubscribe(watcher, callback):
+    watcher.unsubscribe(callback)
+    if not watcher.subscribers:
+        watcher.stop()
+        _forget(watcher)
+
+
+def finalize(qtile):
+    """Stop the watchers of qtile"""
+    for key, watcher in list(_watchers.items()):
+        if key[0] is qtile:
+            del _watchers[key]
+            watcher.stop()
@@ -98,7 +98,7 @@ def make_qtile():
         '--with-state',
         default=None,
         dest='state',
-        help='Pickled QtileState object (typically used only internally)',
+        help='Path of a saved QtileState (typically used only internally)',
     )
     options = parser.parse_args()
     log_level = getattr(logging, options.log_level)
@@ -0,0 +1,85 @@
+# Copyright (c) 2019 Qtile contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+    A uniform grid over rectangles, to find the screens and windows under a
+    point without testing all of them.
+"""
+from typing import Any, Dict, Tuple
+
+
+class RectIndex:
+    """Rectangles indexed by the grid cells they overlap
+
+    Rectangles are given by their edges (x1, y1, x2, y2) and contain the
+    points on their edges. A point query only tests the rectangles of the
+    cell the point is in.
+    """
+
+    def __init__(self, cell_size=512):
+        self.cell_size = cell_size
+        self._rects: Dict[Any, Tuple[int, int, int, int]] = {}
+        self._cells: Dict[Tuple[int, int], Dict[Any, None]] = {}
+
+    def _cells_of(self, rect):
+        x1, y1, x2, y2 = rect
+        size = self.cell_size
+        for cx in range(int(x1 // size), int(x2 // size) + 1):
+            for cy in range(int(y1 // size), int(y2 // size) + 1):
+                yield cx, cy
+
+    def update(self, key, x1, y1, x2, y2):
+        """Add key with the given edges, or move it there"""
+        rect = (x1, y1, x2, y2)
+        old = self._rects.get(key)
+        if old == rect:
+            return
+        if old is not None:
+            self.remove(key)
+        self._rects[key] = rect
+        for cell in self._cells_of(rect):
+            self._cells.setdefault(cell, {})[key] = None
+
+    def remove(self, key):
+        rect = self._rects.pop(key, None)
+        if rect is None:
+            return
+        for cell in self._cells_of(rect):
+            keys = self._cells[cell]
+            del keys[key]
+            if not keys:
+                del self._cells[cell]
+
+    def at(self, x, y):
+        """The keys whose rectangle contains x, y, oldest update first"""
+        size = self.cell_size
+        keys = self._cells.get((int(x // size), int(y // size)), ())
+        result = []
+        for key in keys:
+            x1, y1, x2, y2 = self._rects[key]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                result.append(key)
+        return result
+
+    def __contains__(self, key):
+        return key in self._rects
+
+    def __len__(self):
+        return len(self._rects)
@@ -18,6 +18,26 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import marshal
+import mmap
+import struct
+
+from . import window
+from .log_utils import logger
+
+# bump when the saved attributes change, files of another version are ignored
+STATE_VERSION = 1
+
+# magic, version and length of the marshalled attributes
+_HEADER = struct.Struct("<4sHI")
+_MAGIC = b"QTST"
+
+# the attributes saved in state files
+_FIELDS = (
+    "groups", "screens", "current_screen", "layouts", "windows",
+    "focus_history",
+)
+
 
 class QtileState:
     """Represents the state of the qtile object
@@ -26,15 +46,32 @@ class QtileState:
     which doesn't fit nicely into X atoms can go here.
     """
     def __init__(self, qtile):
-        # Note: window state is saved and restored via _NET_WM_STATE, so
-        # the only thing we need to restore here is the layout and screen
-        # configurations.
+        # Note: minimized, maximized and fullscreen windows are saved and
+        # restored via _NET_WM_STATE, the rest is saved here.
         self.groups = []
         self.screens = {}
         self.current_screen = 0
+        # group name -> [(layout name, state version, state)] of each layout
+        self.layouts = {}
+        # window id -> (group name, floating, x, y, width, height)
+        self.windows = {}
+        # group name -> window ids, in the order they last had focus
+        self.focus_history = {}
 
         for group in qtile.groups:
             self.groups.append((group.name, group.layout.name, group.label))
+            self.layouts[group.name] = [
+                (layout.name, layout.state_version, layout.get_state())
+                for layout in group.layouts
+            ]
+            self.focus_history[group.name] = [
+                win.window.wid for win in group.focus_history
+            ]
+            for win in group.windows:
+                self.windows[win.window.wid] = (
+                    group.name, win._float_state == window.FLOATING,
+                    win.x, win.y, win.width, win.height
+                )
         for index, screen in enumerate(qtile.screens):
             self.screens[index] = screen.group.name
             if screen == qtile.current_screen:
@@ -59,3 +96,82 @@ class QtileState:
                 pass  # group or screen missing
 
         qtile.focus_screen(self.current_screen)
+
+    def apply_windows(self, qtile):
+        """
+        Put the windows back in their groups, floating state, layouts and
+        focus history, once the windows are managed again. The groups are
+        left to be laid out by the caller.
+        """
+        # state saved by a version of qtile which didn't save windows
+        saved_windows = getattr(self, "windows", {})
+        saved_history = getattr(self, "focus_history", {})
+        saved_layouts = getattr(self, "layouts", {})
+
+        managed = [win for group in qtile.groups for win in group.windows]
+        for win in managed:
+            wid = win.window.wid
+            saved = saved_windows.get(wid)
+            if saved is None:
+                continue
+            group, floating, x, y, width, height = saved
+            try:
+                if group in qtile.groups_map and group != win.group.name:
+                    win.togroup(group)
+                if floating and not win.floating:
+                    win._enablefloating(x, y, width, height)
+                elif not floating and win._float_state == window.FLOATING:
+                    win.floating = False
+            except:  # noqa: E722
+                logger.exception("failed restoring window %s", wid)
+
+        for group in qtile.groups:
+            order = {
+                wid: i for i, wid in enumerate(saved_history.get(group.name, ()))
+            }
+            # windows which weren't saved count as focused least recently
+            group.focus_history.sort(
+                key=lambda win: order.get(win.window.wid, -1)
+            )
+            windows = {
+                win.window.wid: win for win in group.windows
+                if not win.floating
+            }
+            saved = saved_layouts.get(group.name, ())
+            for layout, (name, version, state) in zip(group.layouts, saved):
+                if state is None or layout.name != name or \
+                        layout.state_version != version:
+                    continue
+                try:
+                    layout.restore_state(state, dict(windows))
+                except:  # noqa: E722
+                    logger.exception("failed restoring layout %s", name)
+
+    def save(self, file):
+        """Write this state to the given binary file"""
+        payload = marshal.dumps({name: getattr(self, name) for name in _FIELDS})
+        file.write(_HEADER.pack(_MAGIC, STATE_VERSION, len(payload)))
+        file.write(payload)
+
+    @classmethod
+    def load(cls, path):
+        """Read a state written by save()
+
+        Raises ValueError if the file isn't a state file of this version.
+        """
+        with open(path, "rb") as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if len(buf) < _HEADER.size:
+                raise ValueError("truncated state file")
+            magic, version, length = _HEADER.unpack_from(buf)
+            if magic != _MAGIC or version != STATE_VERSION:
+                raise ValueError("not a version %d state file" % STATE_VERSION)
+            end = _HEADER.size + length
+            if len(buf) < end:
+                raise ValueError("truncated state file")
+            with memoryview(buf) as view, view[_HEADER.size:end] as payload:
+                data = marshal.loads(payload)
+        state = cls.__new__(cls)
+        for name in _FIELDS:
+            setattr(state, name, data[name])
+        return state
@@ -20,6 +20,8 @@
 
 import functools
 import os
+import stat
+import tempfile
 import warnings
 import traceback
 import importlib
@@ -157,6 +159,41 @@ def get_cache_dir():
     return cache_directory
 
 
+def get_runtime_dir():
+    """
+    Returns the runtime directory, for files which don't outlive the session,
+    and create if it doesn't exists
+
+    Raises QtileError if the directory is not private to the user, e.g. if
+    another user created it in /tmp first.
+    """
+
+    runtime_directory = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_directory:
+        runtime_directory = os.path.join(runtime_directory, 'qtile')
+    else:
+        # if variable wasn't set, use a private directory in /tmp
+        runtime_directory = os.path.join(
+            tempfile.gettempdir(), 'qtile-%d' % os.getuid()
+        )
+    try:
+        os.makedirs(os.path.dirname(runtime_directory), exist_ok=True)
+        os.mkdir(runtime_directory, 0o700)
+    except FileExistsError:
+        pass
+    else:
+        # in spite of the umask
+        os.chmod(runtime_directory, 0o700)
+    # not following symlinks, which anyone can create in /tmp
+    st = os.lstat(runtime_directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or \
+            stat.S_IMODE(st.st_mode) != 0o700:
+        raise QtileError(
+            "%s is not a directory private to the user" % runtime_directory
+        )
+    return runtime_directory
+
+
 def describe_attributes(obj, attrs, func=lambda x: x):
     """
     Helper for __repr__ functions to list attributes with truthy values only
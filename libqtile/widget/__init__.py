@@ -20,15 +20,83 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import importlib
+import sys
+
 from ..utils import safe_import as safe_import_
 from .import_error import make_error
 
-from .clock import Clock  # noqa: F401
-from .groupbox import AGroupBox, GroupBox  # noqa: F401
-from .prompt import Prompt  # noqa: F401
-from .systray import Systray  # noqa: F401
-from .textbox import TextBox  # noqa: F401
-from .windowname import WindowName  # noqa: F401
+# widget name -> module defining it; widgets, and their optional dependencies,
+# are imported on first use, so a config only pays for the widgets it uses
+_widgets = {
+    "AGroupBox": "groupbox",
+    "Backlight": "backlight",
+    "Battery": "battery",
+    "BatteryIcon": "battery",
+    "BitcoinTicker": "bitcoin_ticker",
+    "CPUGraph": "graph",
+    "Canto": "canto",
+    "CapsNumLockIndicator": "caps_num_lock_indicator",
+    "CheckUpdates": "check_updates",
+    "Clipboard": "clipboard",
+    "Clock": "clock",
+    "Cmus": "cmus",
+    "Countdown": "countdown",
+    "CurrentKeyMap": "currentkeymap",
+    "CurrentLayout": "currentlayout",
+    "CurrentLayoutIcon": "currentlayout",
+    "CurrentScreen": "currentscreen",
+    "DF": "df",
+    "DebugInfo": "debuginfo",
+    "GenPollText": "generic_poll_text",
+    "GenPollUrl": "generic_poll_text",
+    "GmailChecker": "gmail_checker",
+    "GroupBox": "groupbox",
+    "HDDBusyGraph": "graph",
+    "HDDGraph": "graph",
+    "IdleRPG": "idlerpg",
+    "Image": "image",
+    "Image2": "image2",
+    "ImapWidget": "imapwidget",
+    "KeyboardKbdd": "keyboardkbdd",
+    "KeyboardLayout": "keyboardlayout",
+    "KhalCalendar": "khal_calendar",
+    "LaunchBar": "launchbar",
+    "Maildir": "maildir",
+    "Memory": "memory",
+    "MemoryGraph": "graph",
+    "Moc": "moc",
+    "Mpd": "mpdwidget",
+    "Mpd2": "mpd2widget",
+    "Mpris": "mpriswidget",
+    "Mpris2": "mpris2widget",
+    "Net": "net",
+    "NetGraph": "graph",
+    "Notify": "notify",
+    "Pacman": "pacman",
+    "Pomodoro": "pomodoro",
+    "Prompt": "prompt",
+    "Sep": "sep",
+    "She": "she",
+    "Spacer": "spacer",
+    "StatUpImage": "statusupdated",
+    "StatUpText": "statusupdated",
+    "StockTicker": "stock_ticker",
+    "SwapGraph": "graph",
+    "Systray": "systray",
+    "TaskList": "tasklist",
+    "TextBox": "textbox",
+    "ThermalSensor": "sensors",
+    "Volume": "volume",
+    "VolumeImg": "volumeimg",
+    "Wallpaper": "wallpaper",
+    "WindowName": "windowname",
+    "WindowTabs": "windowtabs",
+    "Wlan": "wlan",
+    "YahooWeather": "yahoo_weather",
+}
+
+__all__ = list(_widgets)
 
 
 def safe_import(module_name, class_name):
@@ -36,54 +104,26 @@ def safe_import(module_name, class_name):
                  fallback=make_error)
 
 
-safe_import("backlight", "Backlight")
-safe_import("battery", ["Battery", "BatteryIcon"])
-safe_import("currentlayout", ["CurrentLayout", "CurrentLayoutIcon"])
-safe_import("currentscreen", "CurrentScreen")
-safe_import("debuginfo", "DebugInfo")
-safe_import("graph", ["CPUGraph", "MemoryGraph", "SwapGraph", "NetGraph",
-                      "HDDGraph", "HDDBusyGraph"])
-safe_import("maildir", "Maildir")
-safe_import("notify", "Notify")
-safe_import("sensors", "ThermalSensor")
-safe_import("sep", "Sep")
-safe_import("she", "She")
-safe_import("spacer", "Spacer")
-safe_import("generic_poll_text", ["GenPollText", "GenPollUrl"])
-safe_import("volume", "Volume")
-safe_import("windowtabs", "WindowTabs")
-safe_import("keyboardlayout", "KeyboardLayout")
-safe_import("df", "DF")
-safe_import("image", "Image")
-safe_import("gmail_checker", "GmailChecker")
-safe_import("clipboard", "Clipboard")
-safe_import("countdown", "Countdown")
-safe_import("tasklist", "TaskList")
-safe_import("pacman", "Pacman")
-safe_import("launchbar", "LaunchBar")
-safe_import("canto", "Canto")
-safe_import("mpriswidget", "Mpris")
-safe_import("mpris2widget", "Mpris2")
-safe_import("mpdwidget", "Mpd")
-safe_import("mpd2widget", "Mpd2")
-safe_import("yahoo_weather", "YahooWeather")
-safe_import("bitcoin_ticker", "BitcoinTicker")
-safe_import("wlan", "Wlan")
-safe_import("khal_calendar", "KhalCalendar")
-safe_import("imapwidget", "ImapWidget")
-safe_import("net", "Net")
-safe_import("keyboardkbdd", "KeyboardKbdd")
-safe_import("cmus", "Cmus")
-safe_import("wallpaper", "Wallpaper")
-safe_import("check_updates", "CheckUpdates")
-safe_import("moc", "Moc")
-safe_import("memory", "Memory")
-safe_import("idlerpg", "IdleRPG")
-safe_import("pomodoro", "Pomodoro")
-safe_import("stock_ticker", "StockTicker")
-safe_import("caps_num_lock_indicator", "CapsNumLockIndicator")
+def __getattr__(name):
+    module_name = _widgets.get(name)
+    if module_name is not None:
+        safe_import(module_name, name)
+        return globals()[name]
+    if not name.startswith("_"):
+        # a submodule, e.g. widget.base
+        try:
+            return importlib.import_module("." + name, __name__)
+        except ModuleNotFoundError as e:
+            if e.name != __name__ + "." + name:
+                raise
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_widgets))
+
 
-safe_import("statusupdated", ["StatUpText", "StatUpImage"])
-safe_import("currentkeymap", "CurrentKeyMap")
-safe_import("volumeimg", "VolumeImg")
-safe_import("image2", "Image2")
+# module __getattr__ is only supported from python 3.7
+if sys.version_info < (3, 7):
+    for _name in _widgets:
+        __getattr__(_name)
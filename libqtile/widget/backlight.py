@@ -24,6 +24,7 @@
 import os
 import shlex
 from . import base
+from .. import metrics
 
 from typing import Dict
 
@@ -52,6 +53,8 @@ class Backlight(base.InLoopPollText):
             'maximum brightness in /sys/class/backlight/backlight_name'
         ),
         ('update_interval', .2, 'The delay in seconds between updates'),
+        ('max_update_interval', 5, 'The delay in seconds between updates '
+            'grows up to this while the brightness does not change'),
         ('step', 10, 'Percent of backlight every scroll changed'),
         ('format', '{percent: 2.0%}', 'Display format'),
         ('change_command', 'xbacklight -set {0}', 'Execute command to change value')
@@ -61,11 +64,27 @@ class Backlight(base.InLoopPollText):
         base.InLoopPollText.__init__(self, **config)
         self.add_defaults(Backlight.defaults)
         self.future = None
+        self.poller = None
+
+    def timer_setup(self):
+        self.poller = metrics.AdaptivePoller(
+            self.qtile, self.poll, self.update, self.update_interval,
+            self.max_update_interval
+        )
+        # sent when the brightness is changed by the hardware, e.g. hotkeys
+        metrics.subscribe_uevents(self.qtile, "backlight", self.poller.trigger)
+        self.poller.start()
+
+    def finalize(self):
+        if self.poller is not None:
+            metrics.unsubscribe_uevents(self.qtile, "backlight",
+                                        self.poller.trigger)
+            self.poller.stop()
+        base.InLoopPollText.finalize(self)
 
     def _load_file(self, name):
         path = os.path.join(BACKLIGHT_DIR, self.backlight_name, name)
-        with open(path, 'r') as f:
-            return f.read().strip()
+        return metrics.read_file(path).strip()
 
     def _get_info(self):
         info = {
@@ -100,3 +119,6 @@ class Backlight(base.InLoopPollText):
         if new != now:
             self.future = self.qtile.run_in_executor(self.change_backlight,
                                                      new)
+            if self.poller is not None:
+                self.future.add_done_callback(
+                    lambda future: self.qtile.call_soon(self.poller.trigger))
@@ -31,11 +31,15 @@
 
 from libqtile.log_utils import logger
 from .. import command, bar, configurable, drawer, confreader
+import asyncio
+import concurrent.futures
+import random
 import subprocess
-import threading
+import time
 import warnings
+import weakref
 
-from typing import Any, List, Tuple
+from typing import Any, List, Set, Tuple
 
 
 # Each widget class must define which bar orientation(s) it supports by setting
@@ -117,6 +121,7 @@ class _Widget(command.CommandObject, configurable.Configurable):
             self.length_type = bar.STATIC
             self.length = length
         self.configured = False
+        self._tasks: Set[asyncio.Future] = set()
 
     @property
     def length(self):
@@ -184,6 +189,8 @@ class _Widget(command.CommandObject, configurable.Configurable):
             self.qtile.call_soon(self.timer_setup)
 
     def finalize(self):
+        for task in list(self._tasks):
+            task.cancel()
         if hasattr(self, 'layout') and self.layout:
             self.layout.finalize()
         self.drawer.finalize()
@@ -256,6 +263,16 @@ class _Widget(command.CommandObject, configurable.Configurable):
         return self.qtile.call_later(seconds, self._wrapper, method,
                                      *method_args)
 
+    def create_task(self, coro):
+        """
+            Schedule a coroutine on the event loop. The task is cancelled when
+            the widget is finalized.
+        """
+        task = self.qtile.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
     def call_process(self, command, **kwargs):
         """
             This method uses `subprocess.check_output` to run the given command
@@ -381,6 +398,17 @@ class _TextBox(_Widget):
         )
         self.drawer.draw(offsetx=self.offsetx, width=self.width)
 
+    def update(self, text):
+        old_width = self.layout.width
+        if self.text != text:
+            self.text = text
+            # If our width hasn't changed, we just draw ourselves. Otherwise,
+            # we draw the whole bar.
+            if self.layout.width == old_width:
+                self.draw()
+            else:
+                self.bar.draw()
+
     def cmd_set_font(self, font=UNSPECIFIED, fontsize=UNSPECIFIED,
                      fontshadow=UNSPECIFIED):
         """
@@ -448,35 +476,162 @@ class InLoopPollText(_TextBox):
         text = self.poll()
         self.update(text)
 
-    def update(self, text):
-        old_width = self.layout.width
-        if self.text != text:
-            self.text = text
-            # If our width hasn't changed, we just draw ourselves. Otherwise,
-            # we draw the whole bar.
-            if self.layout.width == old_width:
-                self.draw()
-            else:
-                self.bar.draw()
+
+# The minimum number of threads shared by all ThreadedPollText widgets. The
+# pool grows to a thread per polling widget: each widget has at most one poll
+# in flight, so a poll hanging on I/O only holds up its own widget.
+POLL_WORKERS = 4
+
+_pollers: 'weakref.WeakSet[ThreadedPollText]' = weakref.WeakSet()
+_poll_executor = None
+_poll_executor_size = 0
+
+
+def _get_poll_executor(widget):
+    """Get the shared pool, growing it if widget is a new polling widget"""
+    global _poll_executor, _poll_executor_size
+    _pollers.add(widget)
+    if _poll_executor is None or _poll_executor_size < len(_pollers):
+        old = _poll_executor
+        # grow by doubling, rather than for every widget on startup
+        _poll_executor_size = max(POLL_WORKERS, 2 * len(_pollers))
+        _poll_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=_poll_executor_size,
+            thread_name_prefix="qtile-poll",
+        )
+        if old is not None:
+            # the polls in flight still complete
+            old.shutdown(wait=False)
+    return _poll_executor
 
 
 class ThreadedPollText(InLoopPollText):
     """ A common interface for polling some REST URL, munging the data, and
-    rendering the result in a text box. """
+    rendering the result in a text box.
+
+    Polls run on a thread pool shared by all these widgets, with a thread
+    per widget at most. A widget only ever has one poll in flight: ticks
+    that happen while the previous poll is still running are skipped. """
+    defaults: List[Tuple[str, Any, str]] = [
+        ("poll_jitter", 0.1, "Randomly vary each update interval by up to "
+            "this fraction of it, so that widgets don't all poll at once."),
+    ]
+
     def __init__(self, **config):
         InLoopPollText.__init__(self, **config)
+        self.add_defaults(ThreadedPollText.defaults)
+        self._poll_future = None
+        self.poll_stats = dict(polls=0, skipped=0, errors=0, last=0.0,
+                               max=0.0, total=0.0)
+
+    def timer_setup(self):
+        self.tick()
+        if self.update_interval is not None:
+            jitter = self.update_interval * self.poll_jitter
+            self.timeout_add(
+                self.update_interval + random.uniform(-jitter, jitter),
+                self.timer_setup
+            )
 
     def tick(self):
-        def worker():
-            try:
-                text = self.poll()
-                if self.qtile is not None:
-                    self.qtile.call_soon_threadsafe(self.update, text)
-            except:  # noqa: E722
-                logger.exception("problem polling to update widget %s", self.name)
-        # TODO: There are nice asyncio constructs for this sort of thing, I
-        # think...
-        threading.Thread(target=worker).start()
+        if self._poll_future is not None and not self._poll_future.done():
+            self.poll_stats['skipped'] += 1
+            return
+        self._poll_future = _get_poll_executor(self).submit(self._worker)
+
+    def _worker(self):
+        start = time.monotonic()
+        try:
+            text = self.poll()
+            if self.qtile is not None:
+                self.qtile.call_soon_threadsafe(self.update, text)
+        except:  # noqa: E722
+            self.poll_stats['errors'] += 1
+            logger.exception("problem polling to update widget %s", self.name)
+        finally:
+            elapsed = time.monotonic() - start
+            stats = self.poll_stats
+            stats['polls'] += 1
+            stats['last'] = elapsed
+            stats['max'] = max(stats['max'], elapsed)
+            stats['total'] += elapsed
+
+    def finalize(self):
+        _pollers.discard(self)
+        InLoopPollText.finalize(self)
+
+    def info(self):
+        d = InLoopPollText.info(self)
+        d['poll_stats'] = dict(self.poll_stats)
+        return d
+
+
+class AsyncPollText(_TextBox):
+    """ A common interface for polling information with a coroutine and
+    rendering the result in a text box.
+
+    poll() is a coroutine running on the event loop, so widgets waiting on
+    network I/O don't need a thread. Polls taking longer than poll_timeout
+    are cancelled. After a failed poll, the next one is delayed exponentially
+    up to max_backoff seconds. If update_interval is None, the widget polls
+    only once. """
+
+    defaults: List[Tuple[str, Any, str]] = [
+        ("update_interval", 600, "Update interval in seconds, if none, the "
+            "widget only polls once."),
+        ("poll_timeout", 30, "Seconds after which a poll is cancelled, if "
+            "none, polls never time out."),
+        ("max_backoff", 600, "Maximum delay in seconds between polls after "
+            "failed polls."),
+    ]
+
+    def __init__(self, **config):
+        _TextBox.__init__(self, 'N/A', width=bar.CALCULATED, **config)
+        self.add_defaults(AsyncPollText.defaults)
+        self.failures = 0
+
+    def timer_setup(self):
+        self.create_task(self._poll_loop())
+
+    def button_press(self, x, y, button):
+        self.tick()
+
+    async def poll(self):
+        return 'N/A'
+
+    def tick(self):
+        return self.create_task(self._poll_once())
+
+    def next_delay(self):
+        if self.update_interval is None or not self.failures:
+            return self.update_interval
+        return min(self.update_interval * 2 ** self.failures, self.max_backoff)
+
+    async def _poll_once(self):
+        try:
+            text = await asyncio.wait_for(self.poll(), self.poll_timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.failures += 1
+            logger.warning("poll of widget %s timed out", self.name)
+            return False
+        except Exception:
+            self.failures += 1
+            logger.exception("problem polling to update widget %s", self.name)
+            return False
+        self.failures = 0
+        if self.qtile is not None:
+            self.qtile.call_soon(self.update, text)
+        return True
+
+    async def _poll_loop(self):
+        while True:
+            await self._poll_once()
+            delay = self.next_delay()
+            if delay is None:
+                return
+            await asyncio.sleep(delay)
 
 
 class ThreadPoolText(_TextBox):
@@ -525,18 +680,6 @@ class ThreadPoolText(_TextBox):
         future = self.qtile.run_in_executor(self.poll)
         future.add_done_callback(on_done)
 
-    def update(self, text):
-        old_width = self.layout.width
-        if self.text == text:
-            return
-
-        self.text = text
-
-        if self.layout.width == old_width:
-            self.draw()
-        else:
-            self.bar.draw()
-
     def poll(self):
         pass
 
@@ -29,7 +29,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import os
-from libqtile import bar
+from libqtile import bar, metrics
 from libqtile.log_utils import logger
 from . import base
 from .. import images
@@ -96,17 +96,36 @@ class _Battery(base._TextBox):
             ' power draw in /sys/class/power_supply/battery_name'
         ),
         ('update_delay', 60, 'The delay in seconds between updates'),
+        ('max_update_delay', 600, 'The delay in seconds between updates '
+            'grows up to this while the widget does not change'),
     ]
 
     def __init__(self, **config):
         base._TextBox.__init__(self, "BAT", bar.CALCULATED, **config)
         self.add_defaults(_Battery.defaults)
+        self.poller = None
+
+    def timer_setup(self):
+        self.poller = metrics.AdaptivePoller(
+            self.qtile, self.poll, self.update, self.update_delay,
+            self.max_update_delay
+        )
+        # e.g. plugging in the AC adapter, which is another power supply
+        metrics.subscribe_uevents(self.qtile, "power_supply",
+                                  self.poller.trigger)
+        self.poller.start()
+
+    def finalize(self):
+        if self.poller is not None:
+            metrics.unsubscribe_uevents(self.qtile, "power_supply",
+                                        self.poller.trigger)
+            self.poller.stop()
+        base._TextBox.finalize(self)
 
     def _load_file(self, name):
         try:
             path = os.path.join(BAT_DIR, self.battery_name, name)
-            with open(path, 'r') as f:
-                return f.read().strip()
+            return metrics.read_file(path).strip()
         except IOError:
             if name == 'current_now':
                 return 0
@@ -179,18 +198,15 @@ class Battery(_Battery):
         _Battery.__init__(self, **config)
         self.add_defaults(Battery.defaults)
 
-    def timer_setup(self):
-        update_delay = self.update()
-        if update_delay is None and self.update_delay is not None:
-            self.timeout_add(self.update_delay, self.timer_setup)
-        elif update_delay:
-            self.timeout_add(update_delay, self.timer_setup)
-
     def _configure(self, qtile, bar):
         if self.configured:
-            self.update()
+            self.update(self.poll())
         _Battery._configure(self, qtile, bar)
 
+    def poll(self):
+        text = self._get_text()
+        return text, self.layout.colour
+
     def _get_text(self):
         info = self._get_info()
         if info is False:
@@ -247,11 +263,14 @@ class Battery(_Battery):
             min=min
         )
 
-    def update(self):
-        ntext = self._get_text()
+    def update(self, value):
+        ntext, _ = value
         if ntext != self.text:
             self.text = ntext
             self.bar.draw()
+        else:
+            # the colour may have changed
+            self.draw()
 
 
 class BatteryIcon(_Battery):
@@ -284,15 +303,14 @@ class BatteryIcon(_Battery):
         self.surfaces = {}
         self.current_icon = 'battery-missing'
 
-    def timer_setup(self):
-        self.update()
-        self.timeout_add(self.update_delay, self.timer_setup)
-
     def _configure(self, qtile, bar):
         base._TextBox._configure(self, qtile, bar)
         if self.theme_path:
             self.setup_images()
 
+    def poll(self):
+        return self._get_icon_key()
+
     def _get_icon_key(self):
         key = 'battery'
         info = self._get_info()
@@ -315,8 +333,7 @@ class BatteryIcon(_Battery):
                 key += '-charged'
         return key
 
-    def update(self):
-        icon = self._get_icon_key()
+    def update(self, icon):
         if icon != self.current_icon:
             self.current_icon = icon
             self.draw()
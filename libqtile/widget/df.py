@@ -18,7 +18,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import os
+from libqtile import metrics
 from . import base
 
 
@@ -49,6 +49,27 @@ class DF(base.ThreadedPollText):
         self.add_defaults(DF.defaults)
         self.user_free = 0
         self.calc = self.measures[self.measure]
+        self._sampler = None
+
+    def timer_setup(self):
+        if self.update_interval is None:
+            base.ThreadedPollText.timer_setup(self)
+            return
+        self.tick()
+        self._sampler = metrics.subscribe(
+            self.qtile, metrics.statvfs(self.partition), self.update_interval,
+            self.on_sample
+        )
+
+    def finalize(self):
+        if self._sampler is not None:
+            metrics.unsubscribe(self._sampler, self.on_sample)
+            self._sampler = None
+        base.ThreadedPollText.finalize(self)
+
+    def on_sample(self, statvfs):
+        if statvfs is not None:
+            self.update(self._format(statvfs))
 
     def draw(self):
         if self.user_free <= self.warn_space:
@@ -59,8 +80,11 @@ class DF(base.ThreadedPollText):
         base.ThreadedPollText.draw(self)
 
     def poll(self):
-        statvfs = os.statvfs(self.partition)
+        return self._format(metrics.sample_once(
+            metrics.statvfs(self.partition, shared=False)
+        ))
 
+    def _format(self, statvfs):
         size = statvfs.f_frsize * statvfs.f_blocks // self.calc
         free = statvfs.f_frsize * statvfs.f_bfree // self.calc
         self.user_free = statvfs.f_frsize * statvfs.f_bavail // self.calc
@@ -36,8 +36,11 @@ class GenPollText(base.ThreadedPollText):
         return self.func()
 
 
-class GenPollUrl(base.ThreadedPollText):
-    """A generic text widget that polls an url and parses it using parse function"""
+class GenPollUrl(base.AsyncPollText):
+    """A generic text widget that polls an url and parses it using parse function
+
+    The url is fetched in the event loop's executor, so a slow server doesn't
+    hold up qtile, and the poll is given up after poll_timeout seconds."""
     orientations = base.ORIENTATION_HORIZONTAL
     defaults: List[Tuple[str, Any, str]] = [
         ('url', None, 'Url'),
@@ -50,14 +53,16 @@ class GenPollUrl(base.ThreadedPollText):
     ]
 
     def __init__(self, **config):
-        base.ThreadedPollText.__init__(self, **config)
+        base.AsyncPollText.__init__(self, **config)
         self.add_defaults(GenPollUrl.defaults)
 
     def fetch(self, url, data=None, headers=None, is_json=True, is_xml=False):
         if headers is None:
             headers = {}
         req = Request(url, data, headers)
-        res = urlopen(req)
+        # the poll is cancelled after poll_timeout, give up the request too
+        # rather than leaving it hanging in the executor
+        res = urlopen(req, timeout=self.poll_timeout)
         charset = res.headers.get_content_charset()
 
         body = res.read()
@@ -71,7 +76,12 @@ class GenPollUrl(base.ThreadedPollText):
             body = xmlparse(body)
         return body
 
-    def poll(self):
+    async def poll(self):
+        # subclasses may look up the url itself with fetch(), so everything
+        # blocking runs in the executor
+        return await self.qtile.run_in_executor(self.poll_url)
+
+    def poll_url(self):
         if not self.parse or not self.url:
             return "Invalid config"
 
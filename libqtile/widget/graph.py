@@ -31,13 +31,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import array
+import itertools
+import math
+
 import cairocffi
 
 from . import base
+from libqtile import metrics
 from libqtile.log_utils import logger
-from os import statvfs
 import time
-import platform
 
 __all__ = [
     'CPUGraph',
@@ -49,6 +52,44 @@ __all__ = [
 ]
 
 
+class _RingBuffer:
+    """Fixed size store of graph samples, indexed from the newest sample"""
+
+    def __init__(self, size, value=0):
+        self._data = array.array('d', [value]) * size
+        self._head = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        size = len(self._data)
+        if not -size <= index < size:
+            raise IndexError("sample index out of range")
+        return self._data[(self._head + index) % size]
+
+    def __iter__(self):
+        return itertools.chain(self._data[self._head:], self._data[:self._head])
+
+    def push(self, value, count=1):
+        size = len(self._data)
+        for _ in range(min(count, size)):
+            self._head = (self._head - 1) % size
+            self._data[self._head] = value
+
+    def fill(self, value):
+        self._data = array.array('d', [value]) * len(self._data)
+        self._head = 0
+
+    def max(self):
+        return max(self._data)
+
+    def oldest_first(self):
+        data = self._data[self._head:] + self._data[:self._head]
+        data.reverse()
+        return data
+
+
 class _Graph(base._Widget):
     fixed_upper_bound = False
     defaults = [
@@ -63,18 +104,47 @@ class _Graph(base._Widget):
         ("type", "linefill", "'box', 'line', 'linefill'"),
         ("line_width", 3, "Line width"),
         ("start_pos", "bottom", "Drawer starting position ('bottom'/'top')"),
+        (
+            "incremental",
+            False,
+            "Scroll the drawn graph and only draw the newest sample on "
+            "updates. Only used when the distance between samples is a whole "
+            "number of pixels, e.g. when samples matches the graph width."
+        ),
     ]
 
     def __init__(self, width=100, **config):
         base._Widget.__init__(self, width, **config)
         self.add_defaults(_Graph.defaults)
-        self.values = [0] * self.samples
+        self.values = _RingBuffer(self.samples)
         self.maxvalue = 0
         self.oldtime = time.time()
         self.lag_cycles = 0
+        self._drawn = None
+        self._sampler = None
+
+    def metrics_source(self):
+        """The shared metrics source to sample, None to poll update_graph()
+
+        Graphs with a source get each sample passed to update_graph(),
+        or None when the source couldn't be read.
+        """
+        return None
 
     def timer_setup(self):
-        self.timeout_add(self.frequency, self.update)
+        source = self.metrics_source()
+        if source is None:
+            self.timeout_add(self.frequency, self.update)
+        else:
+            self._sampler = metrics.subscribe(
+                self.qtile, source, self.frequency, self.on_sample
+            )
+
+    def finalize(self):
+        if self._sampler is not None:
+            metrics.unsubscribe(self._sampler, self.on_sample)
+            self._sampler = None
+        base._Widget.finalize(self)
 
     @property
     def graphwidth(self):
@@ -88,7 +158,6 @@ class _Graph(base._Widget):
         step = self.graphwidth / float(self.samples)
         self.drawer.set_source_rgb(self.graph_color)
         for val in values:
-            val = self.val(val)
             self.drawer.fillrect(x, y - val, step, val)
             x += step
 
@@ -98,7 +167,7 @@ class _Graph(base._Widget):
         self.drawer.set_source_rgb(self.graph_color)
         self.drawer.ctx.set_line_width(self.line_width)
         for val in values:
-            self.drawer.ctx.line_to(x, y - self.val(val))
+            self.drawer.ctx.line_to(x, y - val)
             x += step
         self.drawer.ctx.stroke()
 
@@ -108,7 +177,7 @@ class _Graph(base._Widget):
         self.drawer.set_source_rgb(self.graph_color)
         self.drawer.ctx.set_line_width(self.line_width)
         for index, val in enumerate(values):
-            self.drawer.ctx.line_to(x + index * step, y - self.val(val))
+            self.drawer.ctx.line_to(x + index * step, y - val)
         self.drawer.ctx.stroke_preserve()
         self.drawer.ctx.line_to(
             x + (len(values) - 1) * step,
@@ -126,8 +195,38 @@ class _Graph(base._Widget):
         else:
             raise ValueError("Unknown starting position: %s." % self.start_pos)
 
-    def draw(self):
-        self.drawer.clear(self.background or self.bar.background)
+    def _scale(self):
+        # the factor from a sample to its height in pixels, including the
+        # direction the graph grows in
+        return self.val(self.graphheight / (self.maxvalue or 1))
+
+    def _step(self):
+        if self.type == "box":
+            return self.graphwidth / float(self.samples)
+        elif self.type == "line":
+            return self.graphwidth / float(self.samples - 1)
+        elif self.type == "linefill":
+            return self.graphwidth / float(self.samples - 2)
+        raise ValueError("Unknown graph type: %s." % self.type)
+
+    def _origin(self):
+        x = self.margin_x + self.border_width
+        y = self.margin_y + self.border_width
+        if self.start_pos == 'bottom':
+            y += self.graphheight
+        elif not self.start_pos == 'top':
+            raise ValueError("Unknown starting position: %s." % self.start_pos)
+        return x, y
+
+    def _can_scroll(self):
+        if not self.incremental or self._drawn is None:
+            return False
+        if self._drawn != (self.width, self.bar.height, self._scale()):
+            return False
+        step = self._step()
+        return step >= 1 and step == int(step)
+
+    def _draw_border(self):
         if self.border_width:
             self.drawer.set_source_rgb(self.border_color)
             self.drawer.ctx.set_line_width(self.border_width)
@@ -138,15 +237,8 @@ class _Graph(base._Widget):
                 self.bar.height - self.margin_y * 2 - self.border_width,
             )
             self.drawer.ctx.stroke()
-        x = self.margin_x + self.border_width
-        y = self.margin_y + self.border_width
-        if self.start_pos == 'bottom':
-            y += self.graphheight
-        elif not self.start_pos == 'top':
-            raise ValueError("Unknown starting position: %s." % self.start_pos)
-        k = 1.0 / (self.maxvalue or 1)
-        scaled = [self.graphheight * val * k for val in reversed(self.values)]
 
+    def _draw_values(self, x, y, scaled):
         if self.type == "box":
             self.draw_box(x, y, scaled)
         elif self.type == "line":
@@ -156,6 +248,59 @@ class _Graph(base._Widget):
         else:
             raise ValueError("Unknown graph type: %s." % self.type)
 
+    def draw(self):
+        self.drawer.clear(self.background or self.bar.background)
+        self._draw_border()
+        x, y = self._origin()
+        k = self._scale()
+        self._draw_values(x, y, [val * k for val in self.values.oldest_first()])
+
+        self._drawn = (self.width, self.bar.height, k)
+        self.drawer.draw(offsetx=self.offset, width=self.width)
+
+    def _draw_clipped(self, left, right, first, count):
+        """Draw the widget again between the left and right columns
+
+        Only count samples from the first oldest one are drawn, they have to
+        include every sample reaching into the columns.
+        """
+        ctx = self.drawer.ctx
+        ctx.save()
+        ctx.rectangle(left, 0, right - left, self.bar.height)
+        ctx.clip()
+        self.drawer.clear(self.background or self.bar.background)
+        self._draw_border()
+        x, y = self._origin()
+        k = self._scale()
+        values = self.values.oldest_first()[first:first + count]
+        self._draw_values(
+            x + first * self._step(), y, [val * k for val in values]
+        )
+        ctx.restore()
+
+    def draw_incremental(self):
+        """Scroll the drawn graph by one sample and draw the newest sample"""
+        step = int(self._step())
+        x, _ = self._origin()
+        width = self.graphwidth
+        # the whole height, lines reach into the borders
+        self.drawer.copy_area(x + step, 0, width - step, self.bar.height, x, 0)
+        if self.type == "box":
+            self._draw_clipped(x + width - step, self.width, self.samples - 1, 1)
+        else:
+            # lines and their joins reach into the neighbouring columns, and
+            # the scrolled ends were drawn with a cap instead of a join
+            pad = int(math.ceil(self.line_width / 2.0)) + 1
+            count = min(
+                self.samples,
+                int(math.ceil((pad + self.line_width / 2.0 + 1) / step)) + 2
+            )
+            self._draw_clipped(0, x + pad, 0, count)
+            self._draw_clipped(
+                x + width - step - pad, self.width,
+                self.samples - count, count
+            )
+
         self.drawer.draw(offsetx=self.offset, width=self.width)
 
     def push(self, value):
@@ -164,24 +309,32 @@ class _Graph(base._Widget):
             # the graph samples limit
             self.lag_cycles = 1
 
-        self.values = ([value] * min(self.samples, self.lag_cycles)) + self.values
-        self.values = self.values[:self.samples]
+        count = min(self.samples, self.lag_cycles)
+        self.values.push(value, count)
 
         if not self.fixed_upper_bound:
-            self.maxvalue = max(self.values)
-        self.draw()
+            self.maxvalue = self.values.max()
+        if count == 1 and self._can_scroll():
+            self.draw_incremental()
+        else:
+            self.draw()
 
-    def update(self):
-        # lag detection
+    def _detect_lag(self):
         newtime = time.time()
         self.lag_cycles = int((newtime - self.oldtime) / self.frequency)
         self.oldtime = newtime
 
+    def update(self):
+        self._detect_lag()
         self.update_graph()
         self.timeout_add(self.frequency, self.update)
 
+    def on_sample(self, sample):
+        self._detect_lag()
+        self.update_graph(sample)
+
     def fulfill(self, value):
-        self.values = [value] * len(self.values)
+        self.values.fill(value)
 
 
 class CPUGraph(_Graph):
@@ -197,36 +350,31 @@ class CPUGraph(_Graph):
         _Graph.__init__(self, **config)
         self.add_defaults(CPUGraph.defaults)
         self.maxvalue = 100
-        self.oldvalues = self._getvalues()
-
-    def _getvalues(self):
-        proc = '/proc/stat'
-        if platform.system() == "FreeBSD":
-            proc = '/compat/linux' + proc
-
-        with open(proc) as file:
-            lines = file.readlines()
+        self.oldvalues = self._getvalues(
+            metrics.sample_once(metrics.proc_stat(shared=False))
+        )
 
-            # default to all cores (first line)
-            line = lines.pop(0)
+    def metrics_source(self):
+        return metrics.proc_stat()
 
-            # core specified, grab the corresponding line
-            if isinstance(self.core, int):
-                # we already removed the first line from the list,
-                # so it's 0 indexed now :D
-                line = lines[self.core]
+    def _getvalues(self, stat):
+        # default to all cores (first line)
+        name = "cpu"
 
-                if not line.startswith("cpu%s" % self.core):
-                    raise ValueError("No such core: %s" % self.core)
-            if platform.system() == 'FreeBSD':
-                name, user, nice, sys, idle = line.split(None, 4)
-            else:
-                name, user, nice, sys, idle, iowait, tail = line.split(None, 6)
+        # core specified, grab the corresponding line
+        if isinstance(self.core, int):
+            name = "cpu%s" % self.core
+            if name not in stat:
+                raise ValueError("No such core: %s" % self.core)
 
-            return (int(user), int(nice), int(sys), int(idle))
+        user, nice, sys, idle = stat[name][:4]
+        return (user, nice, sys, idle)
 
-    def update_graph(self):
-        nval = self._getvalues()
+    def update_graph(self, stat):
+        if stat is None:
+            self.push(self.values[0])
+            return
+        nval = self._getvalues(stat)
         oval = self.oldvalues
         busy = nval[0] + nval[1] + nval[2] - oval[0] - oval[1] - oval[2]
         total = busy + nval[3] - oval[3]
@@ -243,20 +391,7 @@ class CPUGraph(_Graph):
 
 
 def get_meminfo():
-    val = {}
-    proc = '/proc/meminfo'
-    if platform.system() == "FreeBSD":
-        proc = "/compat/linux" + proc
-    with open(proc) as file:
-        for line in file:
-            if line.lstrip().startswith("total"):
-                pass
-            else:
-                key, tail = line.strip().split(':')
-                uv = tail.split()
-                val[key] = int(uv[0])
-    val['MemUsed'] = val['MemTotal'] - val['MemFree']
-    return val
+    return metrics.sample_once(metrics.meminfo(shared=False))
 
 
 class MemoryGraph(_Graph):
@@ -266,17 +401,18 @@ class MemoryGraph(_Graph):
 
     def __init__(self, **config):
         _Graph.__init__(self, **config)
-        val = self._getvalues()
+        val = get_meminfo()
         self.maxvalue = val['MemTotal']
 
         mem = val['MemTotal'] - val['MemFree'] - val['Buffers'] - val['Cached']
         self.fulfill(mem)
 
-    def _getvalues(self):
-        return get_meminfo()
+    def metrics_source(self):
+        return metrics.meminfo()
 
-    def update_graph(self):
-        val = self._getvalues()
+    def update_graph(self, val):
+        if val is None:
+            return
         self.push(
             val['MemTotal'] - val['MemFree'] - val['Buffers'] - val['Cached']
         )
@@ -289,16 +425,17 @@ class SwapGraph(_Graph):
 
     def __init__(self, **config):
         _Graph.__init__(self, **config)
-        val = self._getvalues()
+        val = get_meminfo()
         self.maxvalue = val['SwapTotal']
         swap = val['SwapTotal'] - val['SwapFree'] - val.get('SwapCached', 0)
         self.fulfill(swap)
 
-    def _getvalues(self):
-        return get_meminfo()
+    def metrics_source(self):
+        return metrics.meminfo()
 
-    def update_graph(self):
-        val = self._getvalues()
+    def update_graph(self, val):
+        if val is None:
+            return
 
         swap = val['SwapTotal'] - val['SwapFree'] - val.get('SwapCached', 0)
 
@@ -309,6 +446,15 @@ class SwapGraph(_Graph):
         self.push(swap)
 
 
+def _parse_counter(text):
+    return int(text)
+
+
+def _parse_io_ticks(text):
+    # io_ticks is field number 9
+    return int(text.split()[9])
+
+
 class NetGraph(_Graph):
     """Display a network usage graph"""
     orientations = base.ORIENTATION_HORIZONTAL
@@ -338,21 +484,28 @@ class NetGraph(_Graph):
             type=self.bandwidth_type == 'down' and 'rx_bytes' or 'tx_bytes'
         )
         self.bytes = 0
-        self.bytes = self._get_values()
+        self.bytes = self._get_values(self._sample_now())
 
-    def _get_values(self):
+    def metrics_source(self):
+        return metrics.file_source(self.filename, _parse_counter)
+
+    def _sample_now(self):
         try:
-            with open(self.filename) as file:
-                val = int(file.read())
-                rval = val - self.bytes
-                self.bytes = val
-                return rval
-        except IOError:
+            return metrics.sample_once(metrics.file_source(
+                self.filename, _parse_counter, shared=False
+            ))
+        except OSError:
+            return None
+
+    def _get_values(self, val):
+        if val is None:
             return 0
+        rval = val - self.bytes
+        self.bytes = val
+        return rval
 
-    def update_graph(self):
-        val = self._get_values()
-        self.push(val)
+    def update_graph(self, val):
+        self.push(self._get_values(val))
 
     @staticmethod
     def get_main_iface():
@@ -382,21 +535,24 @@ class HDDGraph(_Graph):
     def __init__(self, **config):
         _Graph.__init__(self, **config)
         self.add_defaults(HDDGraph.defaults)
-        stats = statvfs(self.path)
+        stats = metrics.sample_once(metrics.statvfs(self.path, shared=False))
         self.maxvalue = stats.f_blocks * stats.f_frsize
-        values = self._get_values()
+        values = self._get_values(stats)
         self.fulfill(values)
 
-    def _get_values(self):
-        stats = statvfs(self.path)
+    def metrics_source(self):
+        return metrics.statvfs(self.path)
+
+    def _get_values(self, stats):
         if self.space_type == 'used':
             return (stats.f_blocks - stats.f_bfree) * stats.f_frsize
         else:
             return stats.f_bavail * stats.f_frsize
 
-    def update_graph(self):
-        val = self._get_values()
-        self.push(val)
+    def update_graph(self, stats):
+        if stats is None:
+            return
+        self.push(self._get_values(stats))
 
 
 class HDDBusyGraph(_Graph):
@@ -419,17 +575,15 @@ class HDDBusyGraph(_Graph):
         )
         self._prev = 0
 
-    def _get_values(self):
-        try:
-            # io_ticks is field number 9
-            with open(self.path) as f:
-                io_ticks = int(f.read().split()[9])
-        except IOError:
+    def metrics_source(self):
+        return metrics.file_source(self.path, _parse_io_ticks)
+
+    def _get_values(self, io_ticks):
+        if io_ticks is None:
             return 0
         activity = io_ticks - self._prev
         self._prev = io_ticks
         return activity
 
-    def update_graph(self):
-        val = self._get_values()
-        self.push(val)
+    def update_graph(self, io_ticks):
+        self.push(self._get_values(io_ticks))
@@ -49,13 +49,25 @@ class _GroupBase(base._TextBox, base.PaddingMixin, base.MarginMixin):
         self.add_defaults(_GroupBase.defaults)
         self.add_defaults(base.PaddingMixin.defaults)
         self.add_defaults(base.MarginMixin.defaults)
+        self._label_widths = {}
+        self._draw_queued = False
+        self._drawn_length = None
+
+    def label_width(self, label):
+        """The text width of a label, measured once per font"""
+        key = (label, self.font, self.fontsize)
+        width = self._label_widths.get(key)
+        if width is None:
+            width, _ = self.drawer.max_layout_size(
+                [label],
+                self.font,
+                self.fontsize
+            )
+            self._label_widths[key] = width
+        return width
 
     def box_width(self, groups):
-        width, _ = self.drawer.max_layout_size(
-            [i.label for i in groups],
-            self.font,
-            self.fontsize
-        )
+        width = max(self.label_width(i.label) for i in groups)
         return width + self.padding_x * 2 + self.borderwidth * 2
 
     def _configure(self, qtile, bar):
@@ -73,18 +85,41 @@ class _GroupBase(base._TextBox, base.PaddingMixin, base.MarginMixin):
             self.fontsize,
             self.fontshadow
         )
+        self._label_widths.clear()
         self.setup_hooks()
 
     def setup_hooks(self):
         def hook_response(*args, **kwargs):
+            self.queue_draw()
+
+        def changegroup_response(*args, **kwargs):
+            # labels may have changed
+            self._label_widths.clear()
             self.bar.draw()
+
         hook.subscribe.client_managed(hook_response)
         hook.subscribe.client_urgent_hint_changed(hook_response)
         hook.subscribe.client_killed(hook_response)
         hook.subscribe.setgroup(hook_response)
         hook.subscribe.group_window_add(hook_response)
         hook.subscribe.current_screen_change(hook_response)
-        hook.subscribe.changegroup(hook_response)
+        hook.subscribe.changegroup(changegroup_response)
+
+    def queue_draw(self):
+        """
+        Redraw the widget soon. Only the whole bar is redrawn, and only if
+        the length of the widget changed.
+        """
+        if not self._draw_queued:
+            self._draw_queued = True
+            self.qtile.call_soon(self._queued_draw)
+
+    def _queued_draw(self):
+        self._draw_queued = False
+        if self.offset is None or self.calculate_length() != self._drawn_length:
+            self.bar.draw()
+        else:
+            self.draw()
 
     def drawbox(self, offset, text, bordercolor, textcolor, highlight_color=None,
                 width=None, rounded=False, block=False, line=False, highlighted=False):
@@ -138,6 +173,7 @@ class AGroupBox(_GroupBase):
         return self.box_width(self.qtile.groups) + self.margin_x * 2
 
     def draw(self):
+        self._drawn_length = self.length
         self.drawer.clear(self.background or self.bar.background)
         e = next(
             i for i in self.qtile.groups
@@ -229,6 +265,14 @@ class GroupBox(_GroupBase):
         if self.spacing is None:
             self.spacing = self.margin_x
         self.clicked = None
+        self._drawn_boxes = None
+        self._drawn_canvas = None
+
+    def _configure(self, qtile, bar):
+        _GroupBase._configure(self, qtile, bar)
+        # the new drawer is blank, so paint all the boxes on the next draw
+        self._drawn_boxes = None
+        self._drawn_canvas = None
 
     @property
     def groups(self):
@@ -308,61 +352,101 @@ class GroupBox(_GroupBase):
     def group_has_urgent(self, group):
         return len([w for w in group.windows if w.urgent]) > 0
 
-    def draw(self):
-        self.drawer.clear(self.background or self.bar.background)
+    def box_state(self, g):
+        """The arguments of drawbox for a group, except its offset"""
+        to_highlight = False
+        is_block = (self.highlight_method == 'block')
+        is_line = (self.highlight_method == 'line')
 
-        offset = self.margin_x
-        for i, g in enumerate(self.groups):
-            to_highlight = False
-            is_block = (self.highlight_method == 'block')
-            is_line = (self.highlight_method == 'line')
-
-            bw = self.box_width([g])
+        if self.group_has_urgent(g) and self.urgent_alert_method == "text":
+            text_color = self.urgent_text
+        elif g.windows:
+            text_color = self.active
+        else:
+            text_color = self.inactive
 
-            if self.group_has_urgent(g) and self.urgent_alert_method == "text":
-                text_color = self.urgent_text
-            elif g.windows:
-                text_color = self.active
+        if g.screen:
+            if self.highlight_method == 'text':
+                border = self.bar.background
+                text_color = self.this_current_screen_border
             else:
-                text_color = self.inactive
-
-            if g.screen:
-                if self.highlight_method == 'text':
-                    border = self.bar.background
-                    text_color = self.this_current_screen_border
+                if self.bar.screen.group.name == g.name:
+                    if self.qtile.current_screen == self.bar.screen:
+                        border = self.this_current_screen_border
+                        to_highlight = True
+                    else:
+                        border = self.this_screen_border
                 else:
-                    if self.bar.screen.group.name == g.name:
-                        if self.qtile.current_screen == self.bar.screen:
-                            border = self.this_current_screen_border
-                            to_highlight = True
-                        else:
-                            border = self.this_screen_border
+                    if self.qtile.current_screen == g.screen:
+                        border = self.other_current_screen_border
                     else:
-                        if self.qtile.current_screen == g.screen:
-                            border = self.other_current_screen_border
-                        else:
-                            border = self.other_screen_border
-            elif self.group_has_urgent(g) and \
-                    self.urgent_alert_method in ('border', 'block', 'line'):
-                border = self.urgent_border
-                if self.urgent_alert_method == 'block':
-                    is_block = True
-                elif self.urgent_alert_method == 'line':
-                    is_line = True
-            else:
-                border = self.background or self.bar.background
-
-            self.drawbox(
-                offset,
-                g.label,
-                border,
-                text_color,
-                highlight_color=self.highlight_color,
-                width=bw,
-                rounded=self.rounded,
-                block=is_block,
-                line=is_line,
-                highlighted=to_highlight
-            )
-            offset += bw + self.spacing
+                        border = self.other_screen_border
+        elif self.group_has_urgent(g) and \
+                self.urgent_alert_method in ('border', 'block', 'line'):
+            border = self.urgent_border
+            if self.urgent_alert_method == 'block':
+                is_block = True
+            elif self.urgent_alert_method == 'line':
+                is_line = True
+        else:
+            border = self.background or self.bar.background
+
+        return dict(
+            text=g.label,
+            bordercolor=border,
+            textcolor=text_color,
+            highlight_color=self.highlight_color,
+            width=self.box_width([g]),
+            rounded=self.rounded,
+            block=is_block,
+            line=is_line,
+            highlighted=to_highlight
+        )
+
+    def draw(self):
+        boxes = []
+        offset = self.margin_x
+        for g in self.groups:
+            state = self.box_state(g)
+            boxes.append((g, offset, state))
+            offset += state['width'] + self.spacing
+
+        canvas = (self.offset, self.width, self.bar.height,
+                  self.background or self.bar.background)
+        previous = self._drawn_boxes
+        if previous is not None and canvas == self._drawn_canvas and \
+                [b[:2] for b in boxes] == [b[:2] for b in previous]:
+            # the boxes didn't move, only repaint the ones that changed
+            for i, (box, old) in enumerate(zip(boxes, previous)):
+                if box != old:
+                    self._repaint_box(boxes, i)
+        else:
+            self.drawer.clear(self.background or self.bar.background)
+            for g, offset, state in boxes:
+                self.drawbox(offset, **state)
+
+        self._drawn_boxes = boxes
+        self._drawn_canvas = canvas
+        self._drawn_length = self.length
         self.drawer.draw(offsetx=self.offset, width=self.width)
+
+    def _repaint_box(self, boxes, index):
+        # Repaint the area of a box, including the spacing around it. The
+        # neighbours are painted clipped to the area too, as their borders
+        # may reach into it.
+        _, offset, state = boxes[index]
+        start = offset - self.spacing / 2.0 if index else 0
+        if index + 1 < len(boxes):
+            end = offset + state['width'] + self.spacing / 2.0
+        else:
+            end = self.width
+
+        ctx = self.drawer.ctx
+        ctx.save()
+        ctx.rectangle(start, 0, end - start, self.bar.height)
+        ctx.clip()
+        self.drawer.set_source_rgb(self.background or self.bar.background)
+        ctx.paint()
+        for _, offset, state in boxes[max(index - 1, 0):index + 2]:
+            self.drawbox(offset, **state)
+        ctx.restore()
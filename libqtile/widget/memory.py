@@ -18,16 +18,14 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+from libqtile import metrics
 from libqtile.widget import base
 
 
-def get_meminfo():
-    val = {}
-    with open('/proc/meminfo') as file:
-        for line in file:
-            key, tail = line.split(':')
-            uv = tail.split()
-            val[key] = int(uv[0]) // 1000
+def get_meminfo(meminfo=None):
+    if meminfo is None:
+        meminfo = metrics.sample_once(metrics.meminfo(shared=False))
+    val = {key: value // 1000 for key, value in meminfo.items()}
     val['MemUsed'] = val['MemTotal'] - val['MemFree']
     return val
 
@@ -42,6 +40,26 @@ class Memory(base.InLoopPollText):
     def __init__(self, **config):
         super().__init__(**config)
         self.add_defaults(Memory.defaults)
+        self._sampler = None
+
+    def timer_setup(self):
+        if self.update_interval is None:
+            base.InLoopPollText.timer_setup(self)
+            return
+        self.tick()
+        self._sampler = metrics.subscribe(
+            self.qtile, metrics.meminfo(), self.update_interval, self.on_sample
+        )
+
+    def finalize(self):
+        if self._sampler is not None:
+            metrics.unsubscribe(self._sampler, self.on_sample)
+            self._sampler = None
+        base.InLoopPollText.finalize(self)
+
+    def on_sample(self, meminfo):
+        if meminfo is not None:
+            self.update(self.fmt.format(**get_meminfo(meminfo)))
 
     def poll(self):
         return self.fmt.format(**get_meminfo())
@@ -1,3 +1,6 @@
+import asyncio
+import time
+
 from . import base
 from libqtile.log_utils import logger
 
@@ -76,6 +79,12 @@ class Mpd2(base.ThreadPoolText):
         dict of functions for replace values in status with custom
 
         ``f(status, key, space_element) => str``
+
+    When ``idle`` is enabled and python-mpd2 has asyncio support, the widget
+    keeps one connection open on the event loop and waits for MPD to report
+    changes with the ``idle`` command instead of polling every
+    ``update_interval``. ``elapsed`` and ``time`` are then advanced locally
+    while playing.
     """
 
     orientations = base.ORIENTATION_HORIZONTAL
@@ -90,7 +99,11 @@ class Mpd2(base.ThreadPoolText):
         ('timeout', 30, 'MPDClient timeout'),
         ('idletimeout', 5, 'MPDClient idle command timeout'),
         ('no_connection', 'No connection', 'Text when mpd is disconnected'),
-        ('space', '-', 'Space keeper')
+        ('space', '-', 'Space keeper'),
+        ('idle', True, 'Wait for changes with the MPD idle command instead '
+            'of polling, needs python-mpd2 with asyncio support'),
+        ('max_reconnect_interval', 60, 'Maximum delay in seconds between '
+            'connection attempts in idle mode'),
     ]
 
     def __init__(self, status_format=default_format,
@@ -103,7 +116,88 @@ class Mpd2(base.ThreadPoolText):
         self.client = MPDClient()
         self.client.timeout = self.timeout
         self.client.idletimeout = self.idletimeout
+        self.async_client = None
+        self._status = None
+        self._status_time = None
+        self._elapsed_timer = None
+        if not self.idle:
+            self.try_reconnect()
+
+    def timer_setup(self):
+        if self.idle:
+            try:
+                from mpd.asyncio import MPDClient as AsyncMPDClient
+            except ImportError:
+                logger.warning("python-mpd2 has no asyncio support, "
+                               "polling mpd every %s s", self.update_interval)
+                self.idle = False
+            else:
+                self.create_task(self._idle_loop(AsyncMPDClient))
+                return
         self.try_reconnect()
+        super().timer_setup()
+
+    async def _idle_loop(self, client_class):
+        delay = self.update_interval
+        while True:
+            client = client_class()
+            try:
+                await client.connect(self.host, self.port)
+                if self.password:
+                    await client.password(self.password)
+                self.async_client = client
+                delay = self.update_interval
+                await self._refresh()
+                async for _ in client.idle(["player", "mixer", "options"]):
+                    await self._refresh()
+            except asyncio.CancelledError:
+                raise
+            except (socket_error, ConnectionError, CommandError) as e:
+                logger.debug("mpd connection failed: %s", e)
+            except Exception:
+                logger.exception("mpd connection failed")
+            finally:
+                self.async_client = None
+                try:
+                    client.disconnect()
+                except Exception:
+                    pass
+            self._set_status(None)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_interval)
+
+    async def _refresh(self):
+        status = await self.async_client.status()
+        current_song = await self.async_client.currentsong()
+        self._set_status((status, current_song))
+
+    def _set_status(self, status):
+        self._status = status
+        self._status_time = time.monotonic()
+        # coroutines don't flush X, so draw from a callback which does
+        self.qtile.call_soon(self._draw_status)
+
+    def _draw_status(self):
+        if self._elapsed_timer is not None:
+            self._elapsed_timer.cancel()
+            self._elapsed_timer = None
+        if self._status is None:
+            self.update(self.no_connection)
+            return
+        status, current_song = self._status
+        status = dict(status)
+        if status.get('state') == 'play' and 'elapsed' in status:
+            elapsed = float(status['elapsed']) + \
+                time.monotonic() - self._status_time
+            status['elapsed'] = '{:.3f}'.format(elapsed)
+            if 'time' in status:
+                total = status['time'].partition(':')[2]
+                status['time'] = '{}:{}'.format(int(elapsed), total)
+            if '{elapsed' in str(self.status_format) or \
+                    '{time' in str(self.status_format):
+                self._elapsed_timer = self.timeout_add(1, self._draw_status)
+        # update() only redraws when the text changed
+        self.update(self.formatter(status, dict(current_song)))
 
     def try_reconnect(self):
         if not self.connected:
@@ -136,6 +230,10 @@ class Mpd2(base.ThreadPoolText):
 
     # TODO: Resolve timeouts on the method call
     def button_press(self, x, y, button):
+        if self.idle:
+            if self.async_client is not None:
+                self.create_task(self._async_command(button))
+            return
         self.try_reconnect()
         if self.connected:
             self[button]
@@ -165,12 +263,45 @@ class Mpd2(base.ThreadPoolText):
 
         self.update(self.update_status)
 
+    async def _async_command(self, key):
+        # the changes are reported by idle, so there is nothing to redraw here
+        client = self.async_client
+        try:
+            if key == self.keys["toggle"]:
+                status = await client.status()
+                if status['state'] == 'play':
+                    await client.pause()
+                else:
+                    await client.play()
+
+            if key == self.keys["stop"]:
+                await client.stop()
+
+            if key == self.keys["previous"]:
+                await client.previous()
+
+            if key == self.keys["next"]:
+                await client.next()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("mpd command failed")
+
+        if key == self.keys['command']:
+            if self.command:
+                # user commands expect the blocking client
+                self.qtile.run_in_executor(self._run_command)
+
+    def _run_command(self):
+        self.try_reconnect()
+        if self.connected:
+            self.command(self.client)
+
     def formatter(self, status, currentsong):
         play_status = self.play_states[status['state']]
 
         # Dirty hack to prevent keys conflict
-        currentsong['fulltime'] = currentsong['time']
-        del currentsong['time']
+        currentsong['fulltime'] = currentsong.pop('time', self.space)
 
         self.prepare_formatting(status, currentsong)
         status.update(currentsong)
@@ -192,6 +323,8 @@ class Mpd2(base.ThreadPoolText):
 
     def finalize(self):
         super().finalize()
+        if self._elapsed_timer is not None:
+            self._elapsed_timer.cancel()
 
         try:
             self.client.close()
@@ -17,11 +17,10 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+from libqtile import metrics
 from libqtile.log_utils import logger
 from . import base
 
-from typing import List
-
 
 class Net(base.ThreadedPollText):
     """Displays interface down and up speed"""
@@ -35,6 +34,26 @@ class Net(base.ThreadedPollText):
         base.ThreadedPollText.__init__(self, **config)
         self.add_defaults(Net.defaults)
         self.interfaces = self.get_stats()
+        self._sampler = None
+
+    def timer_setup(self):
+        if self.update_interval is None:
+            base.ThreadedPollText.timer_setup(self)
+            return
+        self.tick()
+        self._sampler = metrics.subscribe(
+            self.qtile, metrics.net_dev(), self.update_interval, self.on_sample
+        )
+
+    def finalize(self):
+        if self._sampler is not None:
+            metrics.unsubscribe(self._sampler, self.on_sample)
+            self._sampler = None
+        base.ThreadedPollText.finalize(self)
+
+    def on_sample(self, interfaces):
+        if interfaces is not None:
+            self.update(self._poll(interfaces))
 
     def convert_b(self, b):
         # Here we round to 1000 instead of 1024
@@ -54,17 +73,7 @@ class Net(base.ThreadedPollText):
         return b, letter
 
     def get_stats(self):
-        lines: List[str] = []
-        with open('/proc/net/dev', 'r') as f:
-            lines = f.readlines()[2:]
-        interfaces = {}
-        for s in lines:
-            int_s = s.split()
-            name = int_s[0][:-1]
-            down = float(int_s[1])
-            up = float(int_s[-8])
-            interfaces[name] = {'down': down, 'up': up}
-        return interfaces
+        return metrics.sample_once(metrics.net_dev(shared=False))
 
     def _format(self, down, up):
         down = "%0.2f" % down
@@ -79,8 +88,10 @@ class Net(base.ThreadedPollText):
         return down, up
 
     def poll(self):
+        return self._poll(self.get_stats())
+
+    def _poll(self, new_int):
         try:
-            new_int = self.get_stats()
             down = new_int[self.interface]['down'] - \
                 self.interfaces[self.interface]['down']
             up = new_int[self.interface]['up'] - \
@@ -31,20 +31,46 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import bisect
+import functools
 import glob
+import json
 import os
 import pickle
 import string
-from collections import OrderedDict, deque
+import threading
+import time
+from collections import deque
 
 from libqtile.log_utils import logger
 from libqtile.command import _SelectError
 
 from . import base
-from .. import bar, command, hook, pangocffi, utils, xkeysyms
+from .. import bar, command, fuzzy, hook, pangocffi, utils, xkeysyms
 from ..core import xcbq
 
 
+def _sort_lookup(lookup, score=None):
+    """Sort (display, actual) completions, most frecent first"""
+    if score is None:
+        lookup.sort()
+    else:
+        lookup.sort(key=lambda x: (-max(score(x[0]), score(x[1])), x))
+
+
+def _rank_matches(matches, score=None):
+    """Turn (fuzzy score, display, actual) matches into sorted completions
+
+    The frecency score, when there is one, is added to the fuzzy score, so
+    recently used entries come first among similar matches.
+    """
+    if score is not None:
+        matches = [(s + max(score(display), score(actual)), display, actual)
+                   for s, display, actual in matches]
+        matches.sort(key=lambda x: (-x[0], x[1]))
+    return [(display, actual) for _, display, actual in matches]
+
+
 class NullCompleter:
     def __init__(self, qtile):
         self.qtile = qtile
@@ -65,6 +91,7 @@ class FileCompleter:
         self._testing = _testing
         self.qtile = qtile
         self.thisfinal = None
+        self.score = None
         self.reset()
 
     def actual(self):
@@ -92,7 +119,7 @@ class FileCompleter:
                 if os.path.isdir(f):
                     display += "/"
                 self.lookup.append((display, f))
-                self.lookup.sort()
+            _sort_lookup(self.lookup, self.score)
             self.offset = -1
             self.lookup.append((txt, txt))
         self.offset += 1
@@ -108,6 +135,7 @@ class QshCompleter:
         self.qtile = qtile
         self.client = command.CommandRoot(self.qtile)
         self.thisfinal = None
+        self.score = None
         self.reset()
 
     def actual(self):
@@ -146,6 +174,9 @@ class QshCompleter:
                 if cmd.lower().startswith(term):
                     self.lookup.append((cmd + '()', cmd + '()'))
 
+            if self.score is not None:
+                # the history holds the full paths, e.g. "group.info()"
+                self.lookup.sort(key=lambda x: -self.score(self.path + x[0]))
             self.offset = -1
             self.lookup.append((term, term))
 
@@ -163,6 +194,7 @@ class GroupCompleter:
         self.thisfinal = None
         self.lookup = None
         self.offset = None
+        self.score = None
 
     def actual(self):
         """Returns the current actual value"""
@@ -176,12 +208,8 @@ class GroupCompleter:
         """Returns the next completion for txt, or None if there is no completion"""
         txt = txt.lower()
         if not self.lookup:
-            self.lookup = []
-            for group in self.qtile.groups_map.keys():
-                if group.lower().startswith(txt):
-                    self.lookup.append((group, group))
-
-            self.lookup.sort()
+            matches = fuzzy.group_index(self.qtile).search(txt)
+            self.lookup = _rank_matches(matches, self.score)
             self.offset = -1
             self.lookup.append((txt, txt))
 
@@ -199,6 +227,7 @@ class WindowCompleter:
         self.thisfinal = None
         self.lookup = None
         self.offset = None
+        self.score = None
 
     def actual(self):
         """Returns the current actual value"""
@@ -211,12 +240,11 @@ class WindowCompleter:
     def complete(self, txt):
         """Returns the next completion for txt, or None if there is no completion"""
         if not self.lookup:
-            self.lookup = []
-            for wid, window in self.qtile.windows_map.items():
-                if window.group and window.name.lower().startswith(txt):
-                    self.lookup.append((window.name, wid))
-
-            self.lookup.sort()
+            matches = [
+                match for match in fuzzy.window_index(self.qtile).search(txt)
+                if getattr(self.qtile.windows_map.get(match[2]), "group", None)
+            ]
+            self.lookup = _rank_matches(matches, self.score)
             self.offset = -1
             self.lookup.append((txt, txt))
 
@@ -228,6 +256,161 @@ class WindowCompleter:
         return ret[0]
 
 
+class ExecutableIndex:
+    """A sorted index of the executables on $PATH
+
+    Building the index means listing every directory on $PATH, which is slow
+    on systems with thousands of binaries, so it is done in the executor and
+    persisted in the cache directory. Completion is then a bisect over the
+    sorted names. The index is rebuilt when $PATH or the mtime of one of its
+    directories changes.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.path = None
+        self.mtimes = {}
+        self.names = []
+        self.files = []
+        self.lock = threading.Lock()
+        self._refreshing = False
+        self._loaded = False
+
+    @staticmethod
+    def _dirs(path):
+        return [os.path.expanduser(d) for d in path.split(":") if d]
+
+    @staticmethod
+    def _mtimes(dirs):
+        mtimes = {}
+        for d in dirs:
+            try:
+                mtimes[d] = os.stat(d).st_mtime
+            except OSError:
+                mtimes[d] = None
+        return mtimes
+
+    def stale(self, path):
+        """Whether the index is out of date for the given $PATH"""
+        return path != self.path or self._mtimes(self._dirs(path)) != self.mtimes
+
+    def build(self, path):
+        """Scan the directories of path, this blocks and is safe to call off loop"""
+        dirs = self._dirs(path)
+        mtimes = self._mtimes(dirs)
+        found = {}
+        for d in dirs:
+            try:
+                entries = list(os.scandir(d))
+            except OSError:
+                continue
+            for entry in entries:
+                # the first directory on $PATH wins, like in the shell
+                if entry.name in found:
+                    continue
+                try:
+                    if not entry.is_dir() and os.access(entry.path, os.X_OK):
+                        found[entry.name] = entry.path
+                except OSError:
+                    pass
+        names = sorted(found)
+        with self.lock:
+            self.path = path
+            self.mtimes = mtimes
+            self.names = names
+            self.files = [found[name] for name in names]
+
+    def load(self):
+        """Load the index persisted by a previous run, if there is one"""
+        self._loaded = True
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+            with self.lock:
+                self.path = data["path"]
+                self.mtimes = data["mtimes"]
+                self.names = data["names"]
+                self.files = data["files"]
+        except (OSError, ValueError, KeyError):
+            logger.exception("failed to load the executable index")
+
+    def save(self):
+        if self.cache_path is None:
+            return
+        with self.lock:
+            data = dict(path=self.path, mtimes=self.mtimes,
+                        names=self.names, files=self.files)
+        try:
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            logger.exception("failed to save the executable index")
+
+    def _refresh(self, path):
+        try:
+            self.build(path)
+            self.save()
+        finally:
+            self._refreshing = False
+
+    def refresh(self, qtile, path):
+        """Rebuild the index in the executor if it is out of date
+
+        Until the index is built for the first time, ready is False. Without
+        a qtile instance (e.g. in tests), the index is rebuilt in place.
+        """
+        if not self._loaded:
+            self.load()
+        if self._refreshing or not self.stale(path):
+            return
+        if qtile is None:
+            self.build(path)
+            return
+        self._refreshing = True
+        qtile.run_in_executor(self._refresh, path)
+
+    @property
+    def ready(self):
+        return self.path is not None
+
+    def complete(self, prefix):
+        """Returns the (name, file) pairs of the executables starting with prefix"""
+        with self.lock:
+            names, files = self.names, self.files
+        lo = bisect.bisect_left(names, prefix)
+        hi = bisect.bisect_left(names, prefix + "\U0010ffff", lo)
+        return list(zip(names[lo:hi], files[lo:hi]))
+
+    def fuzzy(self, query):
+        """Returns the (score, name, file) fuzzy matches of query, best first"""
+        query = query.lower()
+        with self.lock:
+            names, files = self.names, self.files
+        matches = []
+        for name, file in zip(names, files):
+            s = fuzzy.score(query, name.lower())
+            if s is not None:
+                matches.append((s, name, file))
+        matches.sort(key=lambda x: (-x[0], x[1]))
+        return matches
+
+
+_executable_index = None
+
+
+def get_executable_index():
+    global _executable_index
+    if _executable_index is None:
+        _executable_index = ExecutableIndex(
+            os.path.join(utils.get_cache_dir(), "executables.json")
+        )
+    return _executable_index
+
+
 class CommandCompleter:
     """
     Parameters
@@ -239,10 +422,19 @@ class CommandCompleter:
     DEFAULTPATH = "/bin:/usr/bin:/usr/local/bin"
 
     def __init__(self, qtile, _testing=False):
+        self.qtile = qtile
         self.lookup = None
         self.offset = -1
         self.thisfinal = None
+        self.score = None
         self._testing = _testing
+        if not _testing and qtile is not None:
+            # get a head start on refreshing the index, completion sessions
+            # start from a key press
+            get_executable_index().refresh(qtile, self._path())
+
+    def _path(self):
+        return os.environ.get("PATH", self.DEFAULTPATH)
 
     def actual(self):
         """Returns the current actual value"""
@@ -255,43 +447,73 @@ class CommandCompleter:
         self.lookup = None
         self.offset = -1
 
+    def _complete_file(self, txt):
+        path = os.path.expanduser(txt)
+        if os.path.isdir(path):
+            directory, start = path, ""
+            prefix = txt
+        else:
+            directory, start = os.path.split(path)
+            prefix = os.path.dirname(txt)
+        prefix = prefix.rstrip("/") or "/"
+        try:
+            entries = os.scandir(directory or ".")
+        except OSError:
+            return
+        with entries:
+            # only the entries matching the typed name are checked, and the
+            # directory is consumed as it is read
+            for entry in entries:
+                if not entry.name.startswith(start):
+                    continue
+                if start == "" and entry.name.startswith("."):
+                    continue
+                if self.executable(entry.path):
+                    display = os.path.join(prefix, entry.name)
+                    if entry.is_dir():
+                        display += "/"
+                    yield display, entry.path
+
+    def _complete_command(self, txt):
+        # only the executables starting with txt, from each directory on $PATH
+        for d in ExecutableIndex._dirs(self._path()):
+            try:
+                entries = os.scandir(d)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if not entry.name.startswith(txt):
+                        continue
+                    try:
+                        if not entry.is_dir() and self.executable(entry.path):
+                            yield entry.name, entry.path
+                    except OSError:
+                        pass
+
     def complete(self, txt):
         """Returns the next completion for txt, or None if there is no completion"""
         if not self.lookup:
+            fuzzy_matches = False
             if not self._testing:
                 # Lookup is a set of (display value, actual value) tuples.
-                self.lookup = []
                 if txt and txt[0] in "~/":
-                    path = os.path.expanduser(txt)
-                    if os.path.isdir(path):
-                        files = glob.glob(os.path.join(path, "*"))
-                        prefix = txt
-                    else:
-                        files = glob.glob(path + "*")
-                        prefix = os.path.dirname(txt)
-                    prefix = prefix.rstrip("/") or "/"
-                    for f in files:
-                        if self.executable(f):
-                            display = os.path.join(prefix, os.path.basename(f))
-                            if os.path.isdir(f):
-                                display += "/"
-                            self.lookup.append((display, f))
+                    self.lookup = list(self._complete_file(txt))
                 else:
-                    dirs = os.environ.get("PATH", self.DEFAULTPATH).split(":")
-                    for d in dirs:
-                        try:
-                            d = os.path.expanduser(d)
-                            for cmd in glob.iglob(os.path.join(d, "%s*" % txt)):
-                                if self.executable(cmd):
-                                    self.lookup.append(
-                                        (
-                                            os.path.basename(cmd),
-                                            cmd
-                                        ),
-                                    )
-                        except OSError:
-                            pass
-            self.lookup.sort()
+                    index = get_executable_index()
+                    index.refresh(self.qtile, self._path())
+                    if not index.ready:
+                        # the index is still being built for the first time
+                        self.lookup = list(self._complete_command(txt))
+                    else:
+                        self.lookup = index.complete(txt)
+                        if not self.lookup and txt:
+                            # nothing starts with txt, try to match it fuzzily
+                            self.lookup = _rank_matches(index.fuzzy(txt),
+                                                        self.score)
+                            fuzzy_matches = True
+            if not fuzzy_matches:
+                _sort_lookup(self.lookup, self.score)
             self.offset = -1
             self.lookup.append((txt, txt))
         self.offset += 1
@@ -302,6 +524,178 @@ class CommandCompleter:
         return ret[0]
 
 
+class PromptHistory:
+    """The prompt history of every completer
+
+    The history is kept in an append-only log of JSON records, one per line,
+    so entering a command appends a line instead of rewriting the history. A
+    truncated last line (e.g. after a crash) is cut off when loading. The log
+    is compacted once it holds many more records than there are live entries.
+
+    Records are ``[completer, text, time]`` for a use of ``text``, and, in
+    compacted logs, ``[completer, text, time, score]`` to restore a score
+    and ``[completer, text, None]`` to restore a browsable entry.
+
+    Every use of an entry adds 1 to its frecency score, which halves every
+    ``half_life`` seconds. Completers rank their completions by this score.
+    """
+
+    half_life = 14 * 24 * 3600
+    # scores below this are dropped on compaction
+    min_score = 0.01
+
+    def __init__(self, path, completers, max_history=100, ignore_dups=False):
+        self.path = path
+        self.ignore_dups = ignore_dups
+        self.entries = {x: deque(maxlen=max_history or None)
+                        for x in completers}
+        self.scores = {x: {} for x in completers}
+        # the texts in entries, to find duplicates without searching them
+        self._entry_sets = {x: set() for x in completers}
+        self.records = 0
+
+    def _use(self, completer, text, when, weight=1):
+        scores = self.scores[completer]
+        if text in scores:
+            score, last = scores[text]
+            if when < last:
+                weight *= 0.5 ** ((last - when) / self.half_life)
+                when = last
+            else:
+                score *= 0.5 ** ((when - last) / self.half_life)
+            weight += score
+        scores[text] = (weight, when)
+
+    def _append(self, completer, text):
+        entries = self.entries[completer]
+        if self.ignore_dups:
+            entry_set = self._entry_sets[completer]
+            if text in entry_set:
+                entries.remove(text)
+            elif len(entries) == entries.maxlen:
+                # the oldest entry is about to fall off
+                entry_set.discard(entries[0])
+            entry_set.add(text)
+        entries.append(text)
+
+    def _replay(self, record):
+        completer, text, when, *score = record
+        if completer not in self.entries:
+            return
+        if when is None:
+            self._append(completer, text)
+        elif score:
+            self._use(completer, text, when, score[0])
+        else:
+            self._use(completer, text, when)
+            self._append(completer, text)
+
+    def load(self):
+        """Load the history log, compacting it if needed"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                end = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # the write of the last record was cut short, cut it
+                        # off so the next record starts on its own line
+                        logger.warning("truncating prompt history")
+                        os.truncate(self.path, end)
+                        break
+                    end += len(line)
+                    self.records += 1
+                    try:
+                        self._replay(json.loads(line.decode()))
+                    except (ValueError, TypeError):
+                        logger.warning("skipping corrupt prompt history record")
+        except OSError:
+            logger.exception("failed to load prompt history")
+            return
+        self._maybe_compact()
+
+    def load_pickle(self, path):
+        """Import the history of the pickle file used by older versions"""
+        try:
+            with open(path, 'rb') as f:
+                history = pickle.load(f)
+        except:  # noqa: E722
+            # unfortunately, pickle doesn't wrap its errors, so we
+            # can't detect what's a pickle error and what's not.
+            logger.exception("failed to load prompt history")
+            return
+        now = time.time()
+        records = []
+        for completer, entries in history.items():
+            if completer in self.entries:
+                records.extend([completer, text, now] for text in entries)
+        for record in records:
+            self._replay(record)
+        try:
+            with open(self.path, 'a') as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+            self.records += len(records)
+        except (OSError, TypeError):
+            logger.exception("failed to save prompt history")
+
+    def add(self, completer, text):
+        """Record a use of text in the history of completer"""
+        record = [completer, text, time.time()]
+        self._replay(record)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+            self.records += 1
+        except (OSError, TypeError):
+            logger.exception("failed to save prompt history")
+            return
+        self._maybe_compact()
+
+    def score(self, completer, text, now=None):
+        """The current frecency score of text"""
+        try:
+            score, last = self.scores[completer][text]
+        except (KeyError, TypeError):
+            return 0
+        if now is None:
+            now = time.time()
+        return score * 0.5 ** (max(now - last, 0) / self.half_life)
+
+    def _maybe_compact(self):
+        live = sum(len(x) for x in self.entries.values()) + \
+            sum(len(x) for x in self.scores.values())
+        if self.records > 2 * live + 1000:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log with only the live scores and entries"""
+        now = time.time()
+        records = []
+        for completer, scores in self.scores.items():
+            for text, (score, last) in list(scores.items()):
+                if self.score(completer, text, now) < self.min_score:
+                    del scores[text]
+                    continue
+                records.append([completer, text, last, score])
+        for completer, entries in self.entries.items():
+            records.extend([completer, text, None] for text in entries)
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'w') as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except OSError:
+            logger.exception("failed to compact prompt history")
+            return
+        self.records = len(records)
+
+
 class Prompt(base._TextBox):
     """A widget that prompts for user input
 
@@ -366,34 +760,16 @@ class Prompt(base._TextBox):
             self.original_background = self.background
         # If history record is on, get saved history or create history record
         if self.record_history:
-            self.history_path = os.path.join(utils.get_cache_dir(),
-                                             'prompt_history')
+            cache_dir = utils.get_cache_dir()
+            self.history_path = os.path.join(cache_dir, 'prompt_history.log')
+            self.history = PromptHistory(self.history_path, self.completers,
+                                         self.max_history,
+                                         self.ignore_dups_history)
+            legacy_path = os.path.join(cache_dir, 'prompt_history')
             if os.path.exists(self.history_path):
-                with open(self.history_path, 'rb') as f:
-                    try:
-                        self.history = pickle.load(f)
-                        if self.ignore_dups_history:
-                            self._dedup_history()
-                    except:  # noqa: E722
-                        # unfortunately, pickle doesn't wrap its errors, so we
-                        # can't detect what's a pickle error and what's not.
-                        logger.exception("failed to load prompt history")
-                        self.history = {x: deque(maxlen=self.max_history)
-                                        for x in self.completers}
-
-                    # self.history of size does not match.
-                    if len(self.history) != len(self.completers):
-                        self.history = {x: deque(maxlen=self.max_history)
-                                        for x in self.completers}
-
-                    if self.max_history != \
-                       self.history[list(self.history)[0]].maxlen:
-                        self.history = {x: deque(self.history[x],
-                                                 self.max_history)
-                                        for x in self.completers}
-            else:
-                self.history = {x: deque(maxlen=self.max_history)
-                                for x in self.completers}
+                self.history.load()
+            elif os.path.exists(legacy_path):
+                self.history.load_pickle(legacy_path)
 
     def _configure(self, qtile, bar):
         self.markup = True
@@ -447,8 +823,11 @@ class Prompt(base._TextBox):
         self._update()
         self.bar.widget_grab_keyboard(self)
         if self.record_history:
-            self.completer_history = self.history[complete]
+            self.completer_name = complete
+            self.completer_history = self.history.entries[complete]
             self.position = len(self.completer_history)
+            self.completer.score = functools.partial(self.history.score,
+                                                     complete)
 
     def calculate_length(self):
         if self.text:
@@ -553,18 +932,8 @@ class Prompt(base._TextBox):
         if self.user_input:
             # If history record is activated, also save command in history
             if self.record_history:
-                # ensure no dups in history
-                if self.ignore_dups_history and (self.user_input in self.completer_history):
-                    self.completer_history.remove(self.user_input)
-                    self.position -= 1
-
-                self.completer_history.append(self.user_input)
-
-                if self.position < self.max_history:
-                    self.position += 1
-                os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
-                with open(self.history_path, mode='wb') as f:
-                    pickle.dump(self.history, f, protocol=2)
+                self.history.add(self.completer_name, self.user_input)
+                self.position = len(self.completer_history)
             self.callback(self.user_input)
 
     def _alert(self):
@@ -715,20 +1084,3 @@ class Prompt(base._TextBox):
                 cmd(args)
 
         self.start_input(prompt, f, completer)
-
-    def _dedup_history(self):
-        """Filter the history deque, clearing all duplicate values."""
-        self.history = {x: self._dedup_deque(self.history[x])
-                        for x in self.completers}
-
-    def _dedup_deque(self, dq):
-        return deque(_LastUpdatedOrderedDict.fromkeys(dq))
-
-
-class _LastUpdatedOrderedDict(OrderedDict):
-    """Store items in the order the keys were last added."""
-
-    def __setitem__(self, key, value):
-        if key in self:
-            del self[key]
-        OrderedDict.__setitem__(self, key, value)
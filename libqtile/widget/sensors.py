@@ -24,23 +24,56 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
 import re
 from subprocess import CalledProcessError
 
 from . import base
+from .. import metrics
 from ..utils import (
     UnixCommandNotFound, UnixCommandRuntimeError, catch_exception_and_warn
 )
 from libqtile.log_utils import logger
 
+HWMON_DIR = '/sys/class/hwmon'
+
+
+def _hwmon_inputs():
+    """Find the temperature inputs of /sys/class/hwmon by their sensors tag"""
+    inputs = {}
+    try:
+        hwmons = sorted(os.listdir(HWMON_DIR))
+    except OSError:
+        return inputs
+    for hwmon in hwmons:
+        directory = os.path.join(HWMON_DIR, hwmon)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        temps = sorted(
+            int(m.group(1)) for m in
+            (re.match(r"temp(\d+)_input$", name) for name in names) if m
+        )
+        for i in temps:
+            tag = "temp%d" % i
+            try:
+                tag = metrics.read_file(
+                    os.path.join(directory, tag + "_label")).strip()
+            except OSError:
+                pass
+            inputs.setdefault(tag, os.path.join(directory,
+                                                "temp%d_input" % i))
+    return inputs
+
 
 class ThermalSensor(base.InLoopPollText):
     """Widget to display temperature sensor information
 
-    For using the thermal sensor widget you need to have lm-sensors installed.
-    You can get a list of the tag_sensors executing "sensors" in your terminal.
-    Then you can choose which you want, otherwise it will display the first
-    available.
+    The temperatures are read from /sys/class/hwmon when available, else
+    you need to have lm-sensors installed. You can get a list of the
+    tag_sensors executing "sensors" in your terminal. Then you can choose
+    which you want, otherwise it will display the first available.
     """
     orientations = base.ORIENTATION_HORIZONTAL
     defaults = [
@@ -56,6 +89,8 @@ class ThermalSensor(base.InLoopPollText):
             'then change to foreground_alert colour'
         ),
         ('foreground_alert', 'ff0000', 'Foreground colour alert'),
+        ('use_sysfs', True, 'Read the temperatures from /sys/class/hwmon '
+            'instead of running sensors, when available'),
     ]
 
     def __init__(self, **config):
@@ -71,6 +106,7 @@ class ThermalSensor(base.InLoopPollText):
             re.UNICODE | re.VERBOSE
         )
         self.value_temp = re.compile(r"\d+\.\d+")
+        self.hwmon_inputs = _hwmon_inputs() if self.use_sysfs else {}
         temp_values = self.get_temp_sensors()
         self.foreground_normal = self.foreground
 
@@ -83,11 +119,30 @@ class ThermalSensor(base.InLoopPollText):
                 self.tag_sensor = k
                 break
 
+    def get_temp_sensors(self):
+        if self.hwmon_inputs:
+            return self._read_hwmon()
+        return self._run_sensors()
+
+    def _read_hwmon(self):
+        """reads the hwmon inputs into the same format as `sensors` output"""
+        temperature_values = {}
+        for tag, path in self.hwmon_inputs.items():
+            try:
+                temp = int(metrics.read_file(path)) / 1000
+            except (OSError, ValueError):
+                continue
+            if self.metric:
+                temperature_values[tag] = "%.1f" % temp, u"\xb0C"
+            else:
+                temperature_values[tag] = "%.1f" % (temp * 1.8 + 32), u"\xb0F"
+        return temperature_values
+
     @catch_exception_and_warn(warning=UnixCommandNotFound, excepts=OSError)
     @catch_exception_and_warn(warning=UnixCommandRuntimeError,
                               excepts=CalledProcessError,
                               return_on_exception="")
-    def get_temp_sensors(self):
+    def _run_sensors(self):
         """calls the unix `sensors` command with `-f` flag if user has specified that
         the output should be read in Fahrenheit.
         """
@@ -23,11 +23,11 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import bisect
 import re
 
-import cairocffi
 from .. import pangocffi
-from .. import bar, hook
+from .. import bar, drawer, hook
 from . import base
 
 
@@ -150,8 +150,8 @@ class TaskList(base._Widget, base.PaddingMixin, base.MarginMixin):
         self.add_defaults(TaskList.defaults)
         self.add_defaults(base.PaddingMixin.defaults)
         self.add_defaults(base.MarginMixin.defaults)
-        self._icons_cache = {}
         self._box_end_positions = []
+        self._task_widths = {}
         self.markup = False
         if self.spacing is None:
             self.spacing = self.margin_x
@@ -171,6 +171,18 @@ class TaskList(base._Widget, base.PaddingMixin, base.MarginMixin):
         width = width + 2 * (self.padding_x + self.borderwidth)
         return width
 
+    def task_width(self, window, name):
+        """
+        Box width of a window's task name, only measured again when the name
+        of the window changed.
+        """
+        cached = self._task_widths.get(window)
+        if cached is not None and cached[0] == name:
+            return cached[1]
+        width = self.box_width(name)
+        self._task_widths[window] = (name, width)
+        return width
+
     def get_taskname(self, window):
         """
         Get display name for given window.
@@ -253,7 +265,7 @@ class TaskList(base._Widget, base.PaddingMixin, base.MarginMixin):
             # Default behaviour: calculated width for each task according to
             # icon and task name consisting
             # of state abbreviation and window name
-            width_boxes = [(self.box_width(names[idx]) +
+            width_boxes = [(self.task_width(windows[idx], names[idx]) +
                             ((self.icon_size + self.padding_x) if icons[idx] else 0))
                            for idx in range(window_count)]
 
@@ -279,6 +291,7 @@ class TaskList(base._Widget, base.PaddingMixin, base.MarginMixin):
 
     def _configure(self, qtile, bar):
         base._Widget._configure(self, qtile, bar)
+        self._task_widths.clear()
         if self.icon_size is None:
             self.icon_size = self.bar.height - 2 * (self.borderwidth +
                                                     self.margin_y)
@@ -302,9 +315,11 @@ class TaskList(base._Widget, base.PaddingMixin, base.MarginMixin):
             self.bar.draw()
 
     def remove_icon_cache(self, window):
-        wid = window.window.wid
-        if wid in self._icons_cache:
-            self._icons_cache.pop(wid)
+        drawer.icon_cache.invalidate(window)
+
+    def remove_window(self, window):
+        self._task_widths.pop(window, None)
+        self.remove_icon_cache(window)
 
     def invalidate_cache(self, window):
         self.remove_icon_cache(window)
@@ -317,7 +332,7 @@ class TaskList(base._Widget, base.PaddingMixin, base.MarginMixin):
         hook.subscribe.client_urgent_hint_changed(self.update)
 
         hook.subscribe.net_wm_icon_change(self.invalidate_cache)
-        hook.subscribe.client_killed(self.remove_icon_cache)
+        hook.subscribe.client_killed(self.remove_window)
 
     def drawtext(self, text, textcolor, width):
         if self.markup:
@@ -353,14 +368,18 @@ class TaskList(base._Widget, base.PaddingMixin, base.MarginMixin):
             self.draw_icon(icon, offset)
 
     def get_clicked(self, x, y):
-        box_start = self.margin_x
-        for box_end, win in zip(self._box_end_positions, self.windows):
-            if box_start <= x <= box_end:
-                return win
-            else:
-                box_start = box_end + self.spacing
-        # not found any , return None
-        return None
+        index = bisect.bisect_left(self._box_end_positions, x)
+        windows = self.windows
+        if index >= min(len(self._box_end_positions), len(windows)):
+            return None
+        if index:
+            box_start = self._box_end_positions[index - 1] + self.spacing
+        else:
+            box_start = self.margin_x
+        # clicks in the spacing between boxes don't hit any window
+        if x < box_start:
+            return None
+        return windows[index]
 
     def button_press(self, x, y, button):
         window = None
@@ -378,39 +397,7 @@ class TaskList(base._Widget, base.PaddingMixin, base.MarginMixin):
             window.toggle_minimize()
 
     def get_window_icon(self, window):
-        if not window.icons:
-            return None
-
-        cache = self._icons_cache.get(window.window.wid)
-        if cache:
-            return cache
-
-        icons = sorted(
-            iter(window.icons.items()),
-            key=lambda x: abs(self.icon_size - int(x[0].split("x")[0]))
-        )
-        icon = icons[0]
-        width, height = map(int, icon[0].split("x"))
-
-        img = cairocffi.ImageSurface.create_for_data(
-            icon[1],
-            cairocffi.FORMAT_ARGB32,
-            width,
-            height
-        )
-
-        surface = cairocffi.SurfacePattern(img)
-
-        scaler = cairocffi.Matrix()
-
-        if height != self.icon_size:
-            sp = height / self.icon_size
-            height = self.icon_size
-            width /= sp
-            scaler.scale(sp, sp)
-        surface.set_matrix(scaler)
-        self._icons_cache[window.window.wid] = surface
-        return surface
+        return drawer.icon_cache.get(window, self.icon_size)
 
     def draw_icon(self, surface, offset):
         if not surface:
@@ -420,8 +407,7 @@ class TaskList(base._Widget, base.PaddingMixin, base.MarginMixin):
         y = self.padding_y + self.borderwidth
 
         self.drawer.ctx.save()
-        self.drawer.ctx.translate(x, y)
-        self.drawer.ctx.set_source(surface)
+        self.drawer.ctx.set_source_surface(surface, x, y)
         self.drawer.ctx.paint()
         self.drawer.ctx.restore()
 
@@ -32,9 +32,10 @@
 
 import re
 import subprocess
+import time
 
 from . import base
-from .. import bar
+from .. import bar, mixer
 
 __all__ = [
     'Volume',
@@ -46,11 +47,20 @@ BUTTON_DOWN = 5
 BUTTON_MUTE = 1
 BUTTON_RIGHT = 3
 
+# don't reopen mixers lost sooner than this many seconds after opening them
+MIXER_RETRY = 10
+
 
 class Volume(base._TextBox):
     """Widget that display and change volume
 
     If theme_path is set it draw widget as icons.
+
+    Unless ``get_volume_command`` is set, the volume is read from an ALSA
+    mixer, through libasound when available or else amixer, and the widget
+    is updated when the mixer reports a change instead of every
+    ``update_interval``. A mixer whose connection is lost is opened again,
+    or the widget falls back to polling.
     """
     orientations = base.ORIENTATION_HORIZONTAL
     defaults = [
@@ -79,11 +89,27 @@ class Volume(base._TextBox):
             self.length = 0
         self.surfaces = {}
         self.volume = None
+        self.mixer = None
+        self._mixer_opened = None
 
     def timer_setup(self):
-        self.timeout_add(self.update_interval, self.update)
         if self.theme_path:
             self.setup_images()
+        if self.get_volume_command is None:
+            self._open_mixer()
+        if self.mixer is None:
+            self.timeout_add(self.update_interval, self.update)
+
+    def _open_mixer(self):
+        self._mixer_opened = time.monotonic()
+        self.mixer = mixer.subscribe(self.qtile, self.cardid, self.device,
+                                     self.channel, self._on_mixer)
+
+    def finalize(self):
+        if self.mixer is not None:
+            mixer.unsubscribe(self.mixer, self._on_mixer)
+            self.mixer = None
+        base._TextBox.finalize(self)
 
     def create_amixer_command(self, *args):
         cmd = ['amixer']
@@ -101,6 +127,8 @@ class Volume(base._TextBox):
         if button == BUTTON_DOWN:
             if self.volume_down_command is not None:
                 subprocess.call(self.volume_down_command)
+            elif self.mixer is not None:
+                self.mixer.change_volume(-self.step)
             else:
                 subprocess.call(self.create_amixer_command('-q',
                                                            'sset',
@@ -109,6 +137,8 @@ class Volume(base._TextBox):
         elif button == BUTTON_UP:
             if self.volume_up_command is not None:
                 subprocess.call(self.volume_up_command)
+            elif self.mixer is not None:
+                self.mixer.change_volume(self.step)
             else:
                 subprocess.call(self.create_amixer_command('-q',
                                                            'sset',
@@ -117,6 +147,8 @@ class Volume(base._TextBox):
         elif button == BUTTON_MUTE:
             if self.mute_command is not None:
                 subprocess.call(self.mute_command)
+            elif self.mixer is not None:
+                self.mixer.toggle_mute()
             else:
                 subprocess.call(self.create_amixer_command('-q',
                                                            'sset',
@@ -129,14 +161,29 @@ class Volume(base._TextBox):
         self.draw()
 
     def update(self):
-        vol = self.get_volume()
+        self._set_volume(self.get_volume())
+        self.timeout_add(self.update_interval, self.update)
+
+    def _on_mixer(self, status):
+        if status is mixer.LOST:
+            self.mixer = None
+            if time.monotonic() - self._mixer_opened >= MIXER_RETRY:
+                self._open_mixer()
+            if self.mixer is None:
+                self.update()
+            return
+        if status is None or status.muted:
+            self._set_volume(-1)
+        else:
+            self._set_volume(status.volume)
+
+    def _set_volume(self, vol):
         if vol != self.volume:
             self.volume = vol
             # Update the underlying canvas size before actually attempting
             # to figure out how big it is and draw it.
             self._update_drawer()
             self.bar.draw()
-        self.timeout_add(self.update_interval, self.update)
 
     def _update_drawer(self):
         if self.theme_path:
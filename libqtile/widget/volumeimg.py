@@ -3,6 +3,7 @@ from subprocess import Popen, PIPE
 from collections import namedtuple, OrderedDict
 
 from . import statusupdated
+from .. import mixer
 
 
 GET_VOL_CMD = ('amixer', 'get', 'Master')
@@ -33,6 +34,12 @@ icons['audio-volume-medium'] = lambda aud_stat: True if aud_stat.volume < 0.8 el
 icons['audio-volume-high'] = lambda aud_stat: True
 
 
+def icon_name(audio_status):
+    for name, test in icons.items():
+        if test(audio_status):
+            return name
+
+
 class VolumeImg(statusupdated.StatUpImage):
     """VolumeImg a graphical volume status widget
 
@@ -77,10 +84,28 @@ class VolumeImg(statusupdated.StatUpImage):
         if any((not x.success for x in self.loaded_images)):
             raise ValueError('Problem loading one of the volume images')
         super(VolumeImg, self).__init__(*pargs, **kwargs)
+        self.mixer = None
+
+    def timer_setup(self):
+        self.mixer = mixer.subscribe(self.qtile, None, None, 'Master',
+                                     self._on_mixer)
+        if self.mixer is None:
+            super(VolumeImg, self).timer_setup()
+
+    def finalize(self):
+        if self.mixer is not None:
+            mixer.unsubscribe(self.mixer, self._on_mixer)
+            self.mixer = None
+        super(VolumeImg, self).finalize()
+
+    def _on_mixer(self, status):
+        if status is not None:
+            audio_status = AudioStatus(status.volume / 100.0, status.muted)
+            self.status_set_and_update(icon_name(audio_status))
 
     def status_poller(self):
-        audio_status = get_vol()
-        for icon_name, test in icons.items():
-            if test(audio_status):
-                break
-        return icon_name
+        if self.mixer is not None:
+            # called in the executor, e.g. through cmd_update_status
+            self.qtile.call_soon_threadsafe(self.mixer.refresh)
+            return self.status
+        return icon_name(get_vol())
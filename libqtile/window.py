@@ -18,8 +18,13 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import array
+import collections.abc
 import contextlib
+import functools
 import inspect
+import itertools
+import struct
+import sys
 import traceback
 import warnings
 from xcffib.xproto import EventMask, StackMode, SetMode
@@ -151,6 +156,92 @@ def _float_setter(attr):
     return setter
 
 
+@functools.lru_cache(maxsize=None)
+def _get_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@functools.lru_cache(maxsize=None)
+def _premultiply_table():
+    # maps alpha * 256 + channel to the premultiplied channel
+    return bytes(c * a // 255 for a in range(256) for c in range(256))
+
+
+def premultiply_argb32(data):
+    """Premultiply the colour channels of native endian ARGB32 pixels by alpha
+
+    Returns a new bytearray, as needed by cairo's ImageSurface.create_for_data.
+    """
+    alpha_index = 3 if sys.byteorder == "little" else 0
+    numpy = _get_numpy()
+    if numpy is not None:
+        pixels = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, 4)
+        alpha = pixels[:, alpha_index:alpha_index + 1].astype(numpy.uint16)
+        out = (pixels * alpha // 255).astype(numpy.uint8)
+        out[:, alpha_index] = pixels[:, alpha_index]
+        return bytearray(out.tobytes())
+
+    out = bytearray(data)
+    alpha = out[alpha_index::4]
+    if alpha.count(255) == len(alpha):
+        return out
+
+    # Look every channel up in the premultiplication table, indexed by pairs
+    # of (channel, alpha) bytes read as native endian 16 bit integers.
+    table = _premultiply_table()
+    pairs = bytearray(len(alpha) * 2)
+    high = 1 if sys.byteorder == "little" else 0
+    pairs[high::2] = alpha
+    for i in range(4):
+        if i != alpha_index:
+            pairs[1 - high::2] = out[i::4]
+            out[i::4] = bytes(map(table.__getitem__, array.array("H", pairs)))
+    return out
+
+
+class NetWmIcons(collections.abc.Mapping):
+    """The icons of a _NET_WM_ICON property, keyed by "WIDTHxHEIGHT"
+
+    Only the sizes are parsed up front, the pixels of each icon are
+    premultiplied when it is first looked up.
+    """
+    _revisions = itertools.count()
+
+    def __init__(self, data):
+        self.revision = next(self._revisions)
+        self._data = memoryview(data)
+        self._offsets = {}
+        self._icons = {}
+
+        offset = 0
+        while offset + 8 <= len(data):
+            width, height = struct.unpack_from("=II", data, offset)
+            offset += 8
+            length = width * height * 4
+            if not width or not height or offset + length > len(data):
+                break
+            self._offsets["%sx%s" % (width, height)] = (offset, length)
+            offset += length
+
+    def __getitem__(self, key):
+        icon = self._icons.get(key)
+        if icon is None:
+            offset, length = self._offsets[key]
+            icon = premultiply_argb32(self._data[offset:offset + length])
+            self._icons[key] = icon
+        return icon
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __len__(self):
+        return len(self._offsets)
+
+
 class _Window(command.CommandObject):
     _window_mask = 0  # override in child class
 
@@ -482,6 +573,8 @@ class _Window(command.CommandObject):
         self.height = height
         self.borderwidth = borderwidth
         self.bordercolor = bordercolor
+        if getattr(self, 'group', None) is not None:
+            self.qtile.window_rects.update(self, x, y, x + width, y + height)
 
         kwarg = dict(
             x=x,
@@ -822,6 +915,13 @@ class Window(_Window):
                 self.float_height = self.height
             self._float_state = NOT_FLOATING
             self.group.mark_floating(self, False)
+            self._float_changed()
+
+    def _float_changed(self):
+        # while dragging, the change is announced when the drag ends
+        if self.qtile._drag is not None:
+            self.qtile._drag.float_changed = True
+        else:
             hook.fire('float_change')
 
     def toggle_floating(self):
@@ -948,6 +1048,7 @@ class Window(_Window):
         screen = self.qtile.screens[screen]
         if self.group:
             self.group.remove(self)
+        self.qtile.window_rects.remove(self)
         s = Static(self.window, self.qtile, screen, x, y, width, height)
         self.qtile.windows_map[self.window.wid] = s
         hook.fire("client_managed", s)
@@ -1015,7 +1116,7 @@ class Window(_Window):
             self._float_state = new_float_state
             if self.group:  # may be not, if it's called from hook
                 self.group.mark_floating(self, True)
-            hook.fire('float_change')
+            self._float_changed()
 
     def _enablefloating(self, x=None, y=None, w=None, h=None,
                         new_float_state=FLOATING):
@@ -1131,33 +1232,7 @@ class Window(_Window):
         icon = self.window.get_property('_NET_WM_ICON', 'CARDINAL')
         if not icon:
             return
-        icon = list(map(ord, icon.value))
-
-        icons = {}
-        while True:
-            if not icon:
-                break
-            size = icon[:8]
-            if len(size) != 8 or not size[0] or not size[4]:
-                break
-
-            icon = icon[8:]
-
-            width = size[0]
-            height = size[4]
-
-            next_pix = width * height * 4
-            data = icon[:next_pix]
-
-            arr = array.array("B", data)
-            for i in range(0, len(arr), 4):
-                mult = arr[i + 3] / 255.
-                arr[i + 0] = int(arr[i + 0] * mult)
-                arr[i + 1] = int(arr[i + 1] * mult)
-                arr[i + 2] = int(arr[i + 2] * mult)
-            icon = icon[next_pix:]
-            icons["%sx%s" % (width, height)] = arr
-        self.icons = icons
+        self.icons = NetWmIcons(icon.value.buf())
         hook.fire("net_wm_icon_change", self)
 
     def handle_ClientMessage(self, event):  # noqa: N802
@@ -1420,8 +1495,9 @@ class Window(_Window):
         if self.floating:
             self.tweak_float(dx, dy)
             return
-        for window in self.group.windows:
-            if window == self or window.floating:
+        for window in self.qtile.window_rects.at(curx, cury):
+            if window == self or window.group is not self.group or \
+                    window.floating:
                 continue
             if self._is_in_window(curx, cury, window):
                 clients = self.group.layout.clients
@@ -0,0 +1,190 @@
+from types import SimpleNamespace
+
+import pytest
+
+from libqtile import command, hook, window
+from libqtile.command import lazy
+from libqtile.config import Drag
+from libqtile.core import drag
+
+
+class FakeTimer:
+    def __init__(self, when, func):
+        self.when = when
+        self.func = func
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeEventLoop:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+class FakeServer:
+    def __init__(self):
+        self.calls = []
+
+    def call(self, data):
+        self.calls.append(data)
+        return command.SUCCESS, None
+
+
+class FakeWindow:
+    x, y, width, height, borderwidth = 10, 20, 300, 200, 1
+
+
+class FakeQtile:
+    def __init__(self):
+        self._eventloop = FakeEventLoop()
+        self.server = FakeServer()
+        self.timers = []
+        self.current_window = FakeWindow()
+        self._drag = None
+
+    def call_later(self, delay, func, *args):
+        timer = FakeTimer(self._eventloop.now + delay, func)
+        self.timers.append(timer)
+        return timer
+
+    def run_until(self, now):
+        """Advance the clock, running the timers due by then"""
+        self._eventloop.now = now
+        for timer in list(self.timers):
+            if timer.when <= now and not timer.cancelled:
+                self.timers.remove(timer)
+                timer.func()
+
+    def color_pixel(self, color):
+        return 0
+
+
+class FakeEdge:
+    def __init__(self):
+        self.window = self
+        self.placed = []
+        self.killed = False
+
+    def set_attribute(self, **kwargs):
+        pass
+
+    def place(self, x, y, width, height, borderwidth, bordercolor,
+              above=False):
+        self.placed.append((x, y, width, height))
+
+    def unhide(self):
+        pass
+
+    def kill(self):
+        self.killed = True
+
+
+@pytest.fixture
+def qtile():
+    q = FakeQtile()
+    yield q
+    hook.clear()
+
+
+def start_drag(qtile, **kwargs):
+    binding = Drag([], "Button1", lazy.window.set_position_floating(),
+                   **kwargs)
+    qtile._drag = drag.DragState(qtile, binding, 100, 100, 10, 20)
+    return qtile._drag
+
+
+def positions(qtile):
+    return [args for _, name, args, _ in qtile.server.calls]
+
+
+def test_one_apply_per_frame(qtile):
+    state = start_drag(qtile, frame_rate=10)
+    # the first motion is applied right away
+    state.motion(101, 101)
+    assert positions(qtile) == [(11, 21, 101, 101)]
+
+    # the motions until the next frame only keep the latest position
+    for i in range(2, 10):
+        qtile.run_until(i * 0.01)
+        state.motion(100 + i, 100 + i)
+    assert len(positions(qtile)) == 1
+    assert len(qtile.timers) == 1
+
+    qtile.run_until(0.1)
+    assert positions(qtile) == [(11, 21, 101, 101), (19, 29, 109, 109)]
+    # no motion, no frame
+    qtile.run_until(0.2)
+    assert len(positions(qtile)) == 2
+
+
+def test_every_motion_without_frame_rate(qtile):
+    state = start_drag(qtile, frame_rate=0)
+    for i in range(1, 4):
+        state.motion(100 + i, 100)
+    assert positions(qtile) == [(10 + i, 20, 100 + i, 100) for i in (1, 2, 3)]
+    assert qtile.timers == []
+
+
+def test_release_applies_last_position(qtile):
+    state = start_drag(qtile, frame_rate=10)
+    state.motion(101, 101)
+    qtile.run_until(0.05)
+    state.motion(150, 160)
+    timer = qtile.timers[-1]
+
+    state.finish()
+    assert timer.cancelled
+    assert positions(qtile)[-1] == (60, 80, 150, 160)
+    assert qtile._drag is None
+
+
+def test_float_change_fires_once(qtile):
+    fired = []
+    hook.subscribe.float_change(lambda: fired.append(True))
+    state = start_drag(qtile)
+    # windows changing their floating state during the drag
+    for _ in range(3):
+        window.Window._float_changed(SimpleNamespace(qtile=qtile))
+    assert fired == []
+    state.finish()
+    assert fired == [True]
+
+    window.Window._float_changed(SimpleNamespace(qtile=qtile))
+    assert fired == [True, True]
+
+
+def test_outline(qtile, monkeypatch):
+    edges = []
+
+    def create(qtile, x, y, width, height):
+        edge = FakeEdge()
+        edges.append(edge)
+        return edge
+
+    monkeypatch.setattr(drag.window.Internal, "create", create)
+    state = start_drag(qtile, frame_rate=0, outline="#ffffff")
+    assert len(edges) == 4
+
+    # motions only move the outline, with the size of the window and its
+    # borders, the window is moved on release
+    state.motion(150, 160)
+    state.motion(120, 130)
+    assert positions(qtile) == []
+    top = edges[0]
+    assert top.placed[-1] == (30, 50, 302, 2)
+
+    state.finish()
+    assert all(edge.killed for edge in edges)
+    assert positions(qtile) == [(30, 50, 120, 130)]
+
+
+def test_no_outline_for_other_commands(qtile, monkeypatch):
+    monkeypatch.setattr(drag.window.Internal, "create", None)
+    binding = Drag([], "Button1", lazy.window.set_position(), outline="#fff")
+    state = drag.DragState(qtile, binding, 100, 100, 10, 20)
+    assert state.outline is None
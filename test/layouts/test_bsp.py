@@ -17,6 +17,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import random
+from types import SimpleNamespace
+
 import pytest
 
 from libqtile import layout
@@ -68,3 +71,85 @@ def test_bsp_window_focus_cycle(qtile):
 
     # assert window focus cycle, according to order in layout
     assert_focus_path(qtile, 'two', 'float1', 'float2', 'one', 'three')
+
+
+class FakeClient:
+    has_focus = False
+
+
+def reference_geometry(node, x, y, w, h, geometry):
+    """The geometry of each client, computed recursively from scratch"""
+    if node.client:
+        geometry[node.client] = (x, y, w, h)
+    if len(node.children) > 1:
+        first, second = node.children
+        if node.split_horizontal:
+            w0 = int(node.split_ratio * w * 0.01 + 0.5)
+            reference_geometry(first, x, y, w0, h, geometry)
+            reference_geometry(second, x + w0, y, w - w0, h, geometry)
+        else:
+            h0 = int(node.split_ratio * h * 0.01 + 0.5)
+            reference_geometry(first, x, y, w, h0, geometry)
+            reference_geometry(second, x, y + h0, w, h - h0, geometry)
+    return geometry
+
+
+def reference_clients(node):
+    if node.client:
+        yield node.client
+    for child in node.children:
+        yield from reference_clients(child)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_bsp_cached_geometry(seed):
+    rng = random.Random(seed)
+    bsp = layout.Bsp(fair=bool(seed % 2), margin=0)
+    clients = []
+    screens = [
+        SimpleNamespace(x=0, y=0, width=1920, height=1080),
+        SimpleNamespace(x=1920, y=0, width=1280, height=1024),
+    ]
+    screen = screens[0]
+
+    def layout_all():
+        check(bsp.plan(clients, screen))
+
+    def check(plan):
+        expected = reference_geometry(bsp.root, screen.x, screen.y,
+                                      screen.width, screen.height, {})
+        placed = {
+            p.client: (p.x, p.y, p.width + 2 * p.borderwidth,
+                       p.height + 2 * p.borderwidth)
+            for p in plan if p.visible
+        }
+        assert placed == expected
+        assert list(bsp._node_index()) == list(reference_clients(bsp.root))
+
+    bsp.group = SimpleNamespace(
+        layout_all=layout_all,
+        qtile=SimpleNamespace(color_pixel=lambda colour: colour),
+    )
+    commands = [
+        "toggle_split", "normalize",
+        "grow_left", "grow_right", "grow_up", "grow_down",
+        "flip_left", "flip_right", "flip_up", "flip_down",
+        "shuffle_left", "shuffle_right", "shuffle_up", "shuffle_down",
+    ]
+    for _ in range(300):
+        op = rng.random()
+        if op < 0.25 or not clients:
+            client = FakeClient()
+            clients.append(client)
+            bsp.add(client)
+        elif op < 0.35:
+            client = rng.choice(clients)
+            clients.remove(client)
+            bsp.remove(client)
+        elif op < 0.5:
+            bsp.focus(rng.choice(clients))
+        elif op < 0.55:
+            screen = rng.choice(screens)
+        else:
+            getattr(bsp, "cmd_" + rng.choice(commands))()
+        layout_all()
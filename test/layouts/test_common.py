@@ -425,3 +425,167 @@ def test_cycle_layouts(qtile):
         # Use qtile.c.layout.info()['name'] in the assertion message, so we
         # know which layout is buggy
         assert qtile.c.window.info()['name'] == "three", qtile.c.layout.info()['name']
+
+
+class FakeClient:
+    def __init__(self):
+        self.x = self.y = self.width = self.height = None
+        self.borderwidth = 0
+        self.bordercolor = None
+        self.calls = []
+
+    def place(self, x, y, width, height, borderwidth, bordercolor,
+              above=False, margin=None):
+        self.calls.append("place")
+        self.x, self.y = x + margin, y + margin
+        self.width, self.height = width - 2 * margin, height - 2 * margin
+        self.borderwidth, self.bordercolor = borderwidth, bordercolor
+
+    def hide(self):
+        self.calls.append("hide")
+
+    def unhide(self):
+        self.calls.append("unhide")
+
+
+def test_apply_plan():
+    shown, hidden = FakeClient(), FakeClient()
+    plan = [
+        layout.base.Placement(shown, 0, 0, 100, 50, 2, 1, margin=5),
+        layout.base.hidden(hidden),
+    ]
+    layout.base.apply_plan(plan)
+    assert shown.calls == ["place", "unhide"]
+    assert (shown.x, shown.y, shown.width, shown.height) == (5, 5, 90, 40)
+    assert hidden.calls == ["hide"]
+
+    # placing again at the same geometry doesn't configure the window
+    layout.base.apply_plan(plan)
+    assert shown.calls == ["place", "unhide", "unhide"]
+    layout.base.apply_plan([plan[0]._replace(above=True)])
+    assert shown.calls[-2:] == ["place", "unhide"]
+
+
+def test_client_list_positions():
+    clients = layout.base._ClientList()
+    for name in "abcde":
+        clients.append(name)
+    clients.rotate_up()
+    clients.rotate_up()
+    assert list(clients) == list("cdeab")
+    assert [clients.index(c) for c in "abcde"] == [3, 4, 0, 1, 2]
+
+    clients.add("f", 1)
+    clients.remove("d")
+    clients.swap("a", "c")
+    clients[0], clients[1] = clients[1], clients[0]
+    assert list(clients) == list("eacfb")
+    assert all(clients.index(c) == i for i, c in enumerate(clients))
+    assert "d" not in clients
+    assert clients.focus_next("c") == "f"
+    assert clients.focus_previous("e") is None
+    with pytest.raises(ValueError):
+        clients.index("d")
+
+
+def test_client_list_state():
+    windows = {wid: FakeClient() for wid in range(1, 5)}
+    for wid, client in windows.items():
+        client.window = type("Window", (), {"wid": wid})()
+
+    clients = layout.base._ClientList()
+    for wid in (3, 1, 4):
+        clients.append(windows[wid])
+    clients.current_client = windows[4]
+    state = clients.get_state()
+    assert state == {"clients": [3, 1, 4], "current": 4}
+
+    restored = layout.base._ClientList()
+    remaining = dict(windows)
+    restored.restore_state(state, remaining)
+    assert [c.window.wid for c in restored] == [3, 1, 4]
+    assert restored.current_client is windows[4]
+    assert list(remaining) == [2]
+
+
+def state_windows(count):
+    windows = {wid: FakeClient() for wid in range(1, count + 1)}
+    for wid, client in windows.items():
+        client.window = type("Window", (), {"wid": wid})()
+        client.name = str(wid)
+    return windows
+
+
+def restore(old, new, windows):
+    """Restore the state of old in new, like after a restart"""
+    state = old.get_state()
+    new.group = type("Group", (), {"current_window": None})()
+    for client in windows.values():
+        new.add(client)
+    new.restore_state(state, dict(windows))
+
+
+def test_restore_state_num_stacks():
+    windows = state_windows(4)
+    old = layout.Stack(num_stacks=3)
+    for wid, stack in ((1, 0), (2, 1), (3, 2), (4, 2)):
+        old.stacks[stack].add(windows[wid])
+    old.stacks[1].toggle_split()
+
+    # the config now asks for fewer stacks
+    new = layout.Stack(num_stacks=2)
+    restore(old, new, windows)
+    assert len(new.stacks) == 2
+    assert "1" in [c.name for c in new.stacks[0]]
+    assert "2" in [c.name for c in new.stacks[1]]
+    assert not new.stacks[1].split
+    assert sorted(c.name for c in new.clients) == ["1", "2", "3", "4"]
+
+    new = layout.Stack(num_stacks=4)
+    restore(old, new, windows)
+    assert len(new.stacks) == 4
+    assert [len(s) for s in new.stacks] == [1, 1, 2, 0]
+
+
+def test_restore_state_sections():
+    windows = state_windows(3)
+    old = layout.TreeTab(sections=["a", "b"])
+    for client in windows.values():
+        old.add(client)
+    old._tree.sections["b"].children.append(
+        old._tree.sections["a"].children.pop()
+    )
+    old._tree.sections["b"].children[-1].parent = old._tree.sections["b"]
+
+    # the section b is gone from the config, c is new
+    new = layout.TreeTab(sections=["a", "c"])
+    restore(old, new, windows)
+    assert [s.title for s in new._tree.children] == ["a", "c"]
+    assert sorted(c.name for c in new._nodes) == ["1", "2", "3"]
+    assert [n.window.name for n in new._tree.sections["a"].children] == \
+        ["1", "2", "3"]
+    assert not new._tree.sections["c"].children
+
+
+@pytest.mark.parametrize("layout_class, config", [
+    (layout.MonadTall, dict(ratio=0.6, align=layout.MonadTall._right)),
+    (layout.MonadWide, dict(ratio=0.6)),
+    (layout.Tile, dict(ratio=0.4, masterWindows=2)),
+    (layout.RatioTile, dict(ratio=2)),
+    (layout.Matrix, dict(columns=3)),
+])
+def test_restore_state_config(layout_class, config):
+    windows = state_windows(3)
+    old = layout_class()
+    for client in reversed(list(windows.values())):
+        old.add(client)
+    order = [c.name for c in old.clients]
+
+    # settings changed in the config win over the saved ones
+    new = layout_class(**config)
+    restore(old, new, windows)
+    assert [c.name for c in new.clients] == order
+    for name, value in config.items():
+        if name == "masterWindows":
+            name = "master"
+        assert getattr(new, name) == value
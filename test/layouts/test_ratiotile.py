@@ -29,6 +29,7 @@ import pytest
 from time import sleep
 
 from libqtile import layout
+from libqtile.layout import ratiotile
 import libqtile.config
 from ..conftest import no_xinerama
 from .layout_utils import assert_focused, assert_focus_path
@@ -212,3 +213,26 @@ def test_ratiotile_window_focus_cycle(qtile):
 
     # assert window focus cycle, according to order in layout
     assert_focus_path(qtile, 'two', 'one', 'float1', 'float2', 'three')
+
+
+@pytest.mark.parametrize("fancy", [False, True])
+@pytest.mark.parametrize("ratio", [ratiotile.GOLDEN_RATIO, 1, 0.5])
+def test_ratiotile_cached_grid(monkeypatch, fancy, ratio):
+    screens = [(0, 0, 800, 600), (1920, 0, 1280, 1024), (0, 30, 1366, 738),
+               (800, 1080, 333, 1000)]
+    expected = {}
+    # the sizes computed for each call, as before they were cached
+    with monkeypatch.context() as m:
+        m.setattr(ratiotile, "_best_grid", ratiotile._best_grid.__wrapped__)
+        for num_windows in range(1, 25):
+            for x, y, width, height in screens:
+                gi = ratiotile.GridInfo(ratio, num_windows, width, height)
+                method = gi.get_sizes_advanced if fancy else gi.get_sizes
+                expected[num_windows, x, y, width, height] = \
+                    method(width, height, x, y)
+
+    for (num_windows, x, y, width, height), sizes in expected.items():
+        cached = ratiotile.grid_sizes(num_windows, width, height, ratio, fancy)
+        assert [
+            (sx + x, sy + y, w, h) for sx, sy, w, h in cached
+        ] == [tuple(size) for size in sizes]
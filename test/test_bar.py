@@ -22,6 +22,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
+
 import pytest
 
 import libqtile.layout
@@ -112,6 +114,117 @@ def test_completion():
     c.reset()
 
 
+def test_executable_index(tmpdir):
+    bin_dir = tmpdir.mkdir("bin")
+    for name in ["ls", "lsblk", "mv"]:
+        f = bin_dir.join(name)
+        f.write("")
+        f.chmod(0o755)
+    bin_dir.join("lsnotexec").write("")
+    path = str(bin_dir)
+
+    index = libqtile.widget.prompt.ExecutableIndex(str(tmpdir.join("cache")))
+    index.refresh(None, path)
+    assert [name for name, _ in index.complete("ls")] == ["ls", "lsblk"]
+    assert index.complete("x") == []
+    assert not index.stale(path)
+
+    index.save()
+    loaded = libqtile.widget.prompt.ExecutableIndex(index.cache_path)
+    loaded.load()
+    assert loaded.complete("m") == [("mv", str(bin_dir.join("mv")))]
+
+    bin_dir.join("mkdir").write("")
+    bin_dir.join("mkdir").chmod(0o755)
+    os.utime(path, (0, 0))
+    assert loaded.stale(path)
+
+
+def test_executable_index_deferred(tmpdir, monkeypatch):
+    bin_dir = tmpdir.mkdir("bin")
+    for name in ["ls", "lsblk", "mv"]:
+        f = bin_dir.join(name)
+        f.write("")
+        f.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir))
+
+    class DeferringQtile:
+        def __init__(self):
+            self.calls = []
+
+        def run_in_executor(self, func, *args):
+            self.calls.append((func, args))
+
+    qtile = DeferringQtile()
+    index = libqtile.widget.prompt.ExecutableIndex(str(tmpdir.join("cache")))
+    monkeypatch.setattr(libqtile.widget.prompt, "_executable_index", index)
+
+    # the first build doesn't block the completion, $PATH is scanned instead
+    c = libqtile.widget.prompt.CommandCompleter(qtile)
+    assert len(qtile.calls) == 1
+    assert not index.ready
+    assert c.complete("ls") == "ls"
+    assert c.complete("ls") == "lsblk"
+    assert len(qtile.calls) == 1
+
+    func, args = qtile.calls.pop()
+    func(*args)
+    assert index.ready
+    assert os.path.exists(index.cache_path)
+    c.reset()
+    assert c.complete("m") == "mv"
+    assert qtile.calls == []
+
+
+def test_prompt_history(tmpdir):
+    path = str(tmpdir.join("prompt_history.log"))
+    history = libqtile.widget.prompt.PromptHistory(path, ["cmd", None], 3,
+                                                   ignore_dups=True)
+    for text in ["a", "b", "a", "c", "d"]:
+        history.add("cmd", text)
+    assert list(history.entries["cmd"]) == ["a", "c", "d"]
+    assert history.score("cmd", "a") > history.score("cmd", "b") > 0
+    assert history.score("cmd", "x") == 0
+
+    # a crash may leave a truncated record behind
+    with open(path, "a") as f:
+        f.write('["cmd", "e"')
+
+    loaded = libqtile.widget.prompt.PromptHistory(path, ["cmd", None], 3,
+                                                  ignore_dups=True)
+    loaded.load()
+    assert list(loaded.entries["cmd"]) == ["a", "c", "d"]
+    assert loaded.scores == history.scores
+
+    # and is cut off, so the next record isn't appended to it
+    loaded.add("cmd", "e")
+    reloaded = libqtile.widget.prompt.PromptHistory(path, ["cmd", None], 3,
+                                                    ignore_dups=True)
+    reloaded.load()
+    assert list(reloaded.entries["cmd"]) == ["c", "d", "e"]
+    assert reloaded.records == 6
+    loaded = reloaded
+
+    loaded.compact()
+    compacted = libqtile.widget.prompt.PromptHistory(path, ["cmd", None], 3,
+                                                     ignore_dups=True)
+    compacted.load()
+    assert compacted.records == 8
+    assert list(compacted.entries["cmd"]) == ["c", "d", "e"]
+    assert compacted.score("cmd", "a") == pytest.approx(loaded.score("cmd", "a"))
+
+    # entries that fell off the history aren't duplicates anymore
+    for text in ["a", "d"]:
+        compacted._append("cmd", text)
+    assert list(compacted.entries["cmd"]) == ["e", "a", "d"]
+    assert compacted._entry_sets["cmd"] == {"e", "a", "d"}
+
+    lookup = [("b", "b"), ("a", "a"), ("z", "z")]
+    libqtile.widget.prompt._sort_lookup(
+        lookup, lambda text: compacted.score("cmd", text))
+    assert lookup == [("a", "a"), ("b", "b"), ("z", "z")]
+
+
 @gb_config
 def test_draw(qtile):
     qtile.test_window("one")
@@ -25,7 +25,7 @@ import pytest
 
 from libqtile import confreader
 from libqtile import config, utils
-from libqtile.core import xcore
+from libqtile.core import xcbq, xcore
 
 tests_dir = os.path.dirname(os.path.realpath(__file__))
 
@@ -109,3 +109,22 @@ def test_ezclick_ezdrag():
     btn = config.EzDrag('A-2', cmd)
     assert btn.button == 'Button2'
     assert btn.modifiers == [config.EzClick.modifier_keys['A']]
+
+
+def test_translated_bindings():
+
+    def cmd(x):
+        return None
+
+    key = config.Key(["shift", "control"], "a", cmd)
+    assert key.keysym == xcbq.keysyms["a"]
+    assert key.modmask == xcbq.ModMasks["shift"] | xcbq.ModMasks["control"]
+
+    btn = config.Click(["mod4"], "Button1", cmd)
+    assert btn.modmask == xcbq.ModMasks["mod4"]
+
+    with pytest.raises(utils.QtileError):
+        config.Key(["nonexistent"], "a", cmd)
+
+    with pytest.raises(utils.QtileError):
+        config.Drag(["nonexistent"], "Button1", cmd)
@@ -0,0 +1,86 @@
+import struct
+
+import cairocffi
+
+from libqtile import drawer
+from libqtile.window import NetWmIcons
+
+
+class FakeXWindow:
+    def __init__(self, wid):
+        self.wid = wid
+
+
+class FakeWindow:
+    def __init__(self, wid, sizes):
+        self.window = FakeXWindow(wid)
+        data = b""
+        for size in sizes:
+            data += struct.pack("=II", size, size)
+            data += struct.pack("=I", 0xff336699) * size * size
+        self.icons = NetWmIcons(data)
+
+
+def test_icon_cache_scales_closest_icon():
+    cache = drawer.ScaledIconCache()
+    window = FakeWindow(1, [16, 64])
+    surface = cache.get(window, 20)
+    assert (surface.get_width(), surface.get_height()) == (20, 20)
+    assert cache.get(window, 20) is surface
+    assert cache.used == surface.get_stride() * 20
+
+
+def test_icon_cache_revision_and_invalidate():
+    cache = drawer.ScaledIconCache()
+    window = FakeWindow(1, [16])
+    surface = cache.get(window, 16)
+
+    window.icons = FakeWindow(1, [16]).icons
+    assert cache.get(window, 16) is not surface
+
+    cache.invalidate(window)
+    assert cache.used == 0
+
+
+def test_icon_cache_budget():
+    cache = drawer.ScaledIconCache(budget=2 * 32 * 32 * 4)
+    windows = [FakeWindow(wid, [32]) for wid in range(3)]
+    for window in windows:
+        cache.get(window, 32)
+    assert cache.used <= cache.budget
+    assert len(cache._surfaces) == 2
+
+
+def image_drawer(width, height):
+    d = drawer.Drawer.__new__(drawer.Drawer)
+    d.width, d.height = width, height
+    d.surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, height)
+    d.ctx = d.new_ctx()
+    return d
+
+
+def test_gradient_cache():
+    colours = ("ff0000", "00ff00", "0000ff")
+    pattern = drawer._linear_gradient(colours, 20)
+    assert drawer._linear_gradient(colours, 20) is pattern
+    assert drawer._linear_gradient(colours, 30) is not pattern
+    assert pattern.get_color_stops() == [
+        (0.0, 1, 0, 0, 1), (0.5, 0, 1, 0, 1), (1.0, 0, 0, 1, 1)
+    ]
+
+    # drawers of the same height share the pattern
+    first, second = image_drawer(10, 20), image_drawer(50, 20)
+    first.set_source_rgb(list(colours))
+    second.set_source_rgb(list(colours))
+    assert first.ctx.get_source()._pointer == pattern._pointer
+    assert second.ctx.get_source()._pointer == pattern._pointer
+
+
+def test_unhashable_colours():
+    assert drawer._rgb([255, 0, 0]) == (1, 0, 0, 1)
+
+    d = image_drawer(10, 20)
+    d.set_source_rgb([[255, 0, 0], [0, 0, 255]])
+    assert d.ctx.get_source().get_color_stops() == [
+        (0.0, 1, 0, 0, 1), (1.0, 0, 0, 1, 1)
+    ]
@@ -0,0 +1,68 @@
+from libqtile import fuzzy, hook
+
+
+def test_score():
+    assert fuzzy.score("zz", "firefox") is None
+    assert fuzzy.score("", "firefox") == 0
+    # prefix beats word start beats scattered
+    assert fuzzy.score("fi", "firefox") > fuzzy.score("fi", "my files") > \
+        fuzzy.score("fi", "profile")
+    # the best occurrence is found, not only the first one
+    assert fuzzy.score("fox", "ff fox") > fuzzy.score("fox", "fa o x")
+
+
+def test_index_search():
+    index = fuzzy.FuzzyIndex()
+    for key, name in enumerate(["Firefox", "Terminal", "xterm", "Files"]):
+        index.set(key, name)
+    assert [key for _, _, key in index.search("term")] == [1, 2]
+    assert [key for _, _, key in index.search("termi")] == [1]
+
+    index.remove(1)
+    assert index.search("termi") == []
+    index.set(2, "xterminal")
+    assert [key for _, _, key in index.search("termi")] == [2]
+
+
+class FakeWindow:
+    def __init__(self, wid, name):
+        self.wid = wid
+        self.name = name
+        self.group = "a"
+
+
+class FakeQtile:
+    def __init__(self):
+        self.windows_map = {1: FakeWindow(1, "one")}
+        self.groups_map = {"a": None}
+
+
+def test_window_index():
+    hook.clear()
+    index = fuzzy.WindowIndex(FakeQtile())
+    assert [key for _, _, key in index.search("o")] == [1]
+
+    window = FakeWindow(2, "two")
+    hook.fire("client_managed", window)
+    window.name = "three"
+    hook.fire("client_name_updated", window)
+    assert [key for _, _, key in index.search("t")] == [2]
+
+    hook.fire("client_killed", window)
+    assert index.search("t") == []
+    hook.clear()
+
+
+def test_finalize():
+    hook.clear()
+    qtile = FakeQtile()
+    index = fuzzy.window_index(qtile)
+    assert fuzzy.window_index(qtile) is index
+
+    fuzzy.finalize(qtile)
+    assert fuzzy.window_index(qtile) is not index
+    # the dropped index doesn't follow the hooks anymore
+    hook.fire("client_managed", FakeWindow(2, "two"))
+    assert 2 not in index.items
+    fuzzy.finalize(qtile)
+    hook.clear()
@@ -0,0 +1,224 @@
+import pytest
+
+from libqtile import metrics
+
+STAT = """cpu  6427 0 745 25518 12 0 31 0 0 0
+cpu0 3210 0 372 12759 6 0 15 0 0 0
+cpu1 3217 0 373 12759 6 0 16 0 0 0
+intr 1 2 3
+ctxt 42
+"""
+
+MEMINFO = """MemTotal:       16000000 kB
+MemFree:         4000000 kB
+Buffers:          100000 kB
+Cached:          2000000 kB
+HugePages_Total:       0
+"""
+
+NET_DEV = """Inter-|   Receive |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes ...
+    lo:    4845      10    0    0    0     0          0         0     4845      10    0    0    0     0       0     0
+  eth0:4156474    3000    0    0    0     0          0         0    46523     400    0    0    0     0       0     0
+"""
+
+
+def test_parse_stat():
+    stat = metrics.parse_stat(STAT)
+    assert set(stat) == {"cpu", "cpu0", "cpu1"}
+    assert stat["cpu"][:4] == [6427, 0, 745, 25518]
+
+
+def test_parse_meminfo():
+    meminfo = metrics.parse_meminfo(MEMINFO)
+    assert meminfo["MemTotal"] == 16000000
+    assert meminfo["HugePages_Total"] == 0
+    assert meminfo["MemUsed"] == 12000000
+
+
+def test_parse_net_dev():
+    interfaces = metrics.parse_net_dev(NET_DEV)
+    assert interfaces["eth0"] == {"down": 4156474, "up": 46523}
+    assert interfaces["lo"] == {"down": 4845, "up": 4845}
+
+
+def test_metrics_file(tmpdir):
+    path = tmpdir.join("stat")
+    path.write("a" * 100)
+    source = metrics.FileSource(str(path), len)
+    source.file = metrics.MetricsFile(str(path), bufsize=16)
+    assert source.sample() == 100
+    path.write("b" * 10)
+    assert source.sample() == 10
+    source.close()
+
+
+def test_shared_sources():
+    assert metrics.proc_stat() is metrics.proc_stat()
+    assert metrics.statvfs("/") is metrics.statvfs("/")
+    assert metrics.statvfs("/") is not metrics.statvfs("/tmp")
+
+
+class FakeQtile:
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, func, *args):
+        timer = FakeTimer(delay, func)
+        self.timers.append(timer)
+        return timer
+
+
+class FakeTimer:
+    def __init__(self, delay, func):
+        self.delay = delay
+        self.func = func
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class CountingSource:
+    blocking = False
+
+    def __init__(self):
+        self.reads = 0
+
+    def sample(self):
+        self.reads += 1
+        return self.reads
+
+
+@pytest.mark.parametrize("subscribers", [1, 5])
+def test_sampler_reads_once_per_tick(subscribers):
+    qtile = FakeQtile()
+    source = CountingSource()
+    received = []
+    callbacks = [received.append for _ in range(subscribers)]
+    samplers = {metrics.subscribe(qtile, source, 2, cb) for cb in callbacks}
+    assert len(samplers) == 1
+    sampler = samplers.pop()
+
+    qtile.timers[-1].func()
+    assert source.reads == 1
+    assert received == [1] * subscribers
+
+    for cb in callbacks:
+        metrics.unsubscribe(sampler, cb)
+    assert qtile.timers[-1].cancelled
+    assert (qtile, source, 2) not in metrics._samplers
+
+
+def test_read_file(tmpdir):
+    path = tmpdir.join("brightness")
+    path.write("10\n")
+    assert metrics.read_file(str(path)) == "10\n"
+    path.write("200\n")
+    assert metrics.read_file(str(path)) == "200\n"
+
+    with pytest.raises(OSError):
+        metrics.read_file(str(tmpdir.join("missing")))
+
+
+def test_adaptive_poller_backs_off():
+    qtile = FakeQtile()
+    values = iter([1, 1, 1, 1, 2, 2])
+    received = []
+    poller = metrics.AdaptivePoller(qtile, lambda: next(values),
+                                    received.append, 1, 4)
+    poller.start()
+    for _ in range(4):
+        qtile.timers[-1].func()
+    assert received == [1, 2]
+    assert [timer.delay for timer in qtile.timers] == [1, 2, 4, 4, 1]
+
+    # a uevent resets the interval
+    poller.trigger()
+    assert qtile.timers[-2].cancelled
+    assert qtile.timers[-1].delay == 1
+    assert received == [1, 2]
+
+
+def test_adaptive_poller_errors():
+    qtile = FakeQtile()
+    values = iter([OSError("unavailable"), 1, 2])
+    received = []
+
+    def poll():
+        value = next(values)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def callback(value):
+        received.append(value)
+        raise ValueError("can't show %s" % value)
+
+    poller = metrics.AdaptivePoller(qtile, poll, callback, 1, 4)
+    # nothing was read, so there is nothing to show
+    poller.start()
+    assert received == []
+    assert len(qtile.timers) == 1
+
+    # the callback failing doesn't stop the polling
+    with pytest.raises(ValueError):
+        qtile.timers[-1].func()
+    assert received == [1]
+    assert len(qtile.timers) == 2
+    with pytest.raises(ValueError):
+        qtile.timers[-1].func()
+    assert received == [1, 2]
+    assert len(qtile.timers) == 3
+
+
+def test_parse_uevent():
+    data = (b"change@/devices/LNXSYSTM:00/PNP0C0A:00/power_supply/BAT0\0"
+            b"ACTION=change\0SUBSYSTEM=power_supply\0POWER_SUPPLY_NAME=BAT0\0")
+    props = metrics.UeventMonitor.parse(data)
+    assert props["SUBSYSTEM"] == "power_supply"
+    assert props["POWER_SUPPLY_NAME"] == "BAT0"
+
+
+def test_unsubscribe_closes_sources(tmpdir):
+    path = tmpdir.join("stat")
+    path.write("cpu  1 2 3 4\n")
+    qtile = FakeQtile()
+    source = metrics.file_source(str(path), metrics.parse_stat)
+    first = metrics.subscribe(qtile, source, 1, print)
+    second = metrics.subscribe(qtile, source, 2, print)
+    first.sample()
+    assert source.file is not None
+
+    # still sampled at the other interval
+    metrics.unsubscribe(first, print)
+    assert source.file is not None
+    assert metrics.file_source(str(path), metrics.parse_stat) is source
+
+    metrics.unsubscribe(second, print)
+    assert source.file is None
+    assert metrics.file_source(str(path), metrics.parse_stat) is not source
+
+
+def test_finalize():
+    qtile, other = FakeQtile(), FakeQtile()
+    source = CountingSource()
+    sampler = metrics.subscribe(qtile, source, 1, print)
+    kept = metrics.subscribe(other, source, 1, print)
+    assert sampler is not kept
+
+    metrics.finalize(qtile)
+    assert qtile.timers[-1].cancelled
+    assert not other.timers[-1].cancelled
+    assert (qtile, source, 1) not in metrics._samplers
+    metrics.unsubscribe(kept, print)
+
+
+def test_sample_once(tmpdir):
+    path = tmpdir.join("stat")
+    path.write("cpu  1 2 3 4\n")
+    sources = dict(metrics._sources)
+    source = metrics.file_source(str(path), metrics.parse_stat, shared=False)
+    assert metrics.sample_once(source)["cpu"] == [1, 2, 3, 4]
+    assert source.file is None
+    assert metrics._sources == sources
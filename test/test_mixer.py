@@ -0,0 +1,119 @@
+import pytest
+
+from libqtile import mixer
+
+
+class FakeMixer:
+    blocking = False
+
+    def __init__(self):
+        self.volume = 50
+        self.muted = False
+        self.closed = False
+        self.connected = True
+
+    def fds(self):
+        return [42]
+
+    def handle_events(self):
+        return self.connected
+
+    def status(self):
+        return mixer.MixerStatus(self.volume, self.muted)
+
+    def change_volume(self, step):
+        self.volume += step
+
+    def toggle_mute(self):
+        self.muted = not self.muted
+
+    def close(self):
+        self.closed = True
+
+
+class FakeQtile:
+    def __init__(self):
+        self.readers = {}
+
+    def add_reader(self, fd, func):
+        self.readers[fd] = func
+
+    def remove_reader(self, fd):
+        del self.readers[fd]
+
+
+def test_watcher_publishes_changes():
+    qtile = FakeQtile()
+    fake = FakeMixer()
+    watcher = mixer.MixerWatcher(qtile, fake)
+    watcher.start()
+    statuses = []
+    watcher.subscribe(statuses.append)
+    assert statuses == [(50, False)]
+
+    # events without a change of the element are not published
+    qtile.readers[42]()
+    assert statuses == [(50, False)]
+
+    fake.volume = 60
+    qtile.readers[42]()
+    watcher.toggle_mute()
+    assert statuses == [(50, False), (60, False), (60, True)]
+
+    watcher.stop()
+    assert not qtile.readers
+    assert fake.closed
+
+
+def no_libasound():
+    raise mixer.MixerError("libasound not found")
+
+
+def test_no_mixer(monkeypatch):
+    monkeypatch.setattr(mixer, "_get_libasound", no_libasound)
+    monkeypatch.setattr(mixer.shutil, "which", lambda cmd: None)
+    with pytest.raises(mixer.MixerError):
+        mixer.AmixerMixer(None, "default", "Master")
+    assert mixer.subscribe(FakeQtile(), None, None, "Master", print) is None
+
+
+def test_watchers_per_qtile(monkeypatch):
+    monkeypatch.setattr(mixer, "open_mixer", lambda *args: FakeMixer())
+    qtile, other = FakeQtile(), FakeQtile()
+    watcher = mixer.subscribe(qtile, None, None, "Master", print)
+    assert mixer.subscribe(qtile, None, None, "Master", print) is watcher
+    kept = mixer.subscribe(other, None, None, "Master", print)
+    assert kept is not watcher
+
+    mixer.finalize(qtile)
+    assert watcher.mixer.closed
+    assert not qtile.readers
+    assert other.readers
+    mixer.finalize(other)
+    assert not mixer._watchers
+
+
+def test_watcher_lost(monkeypatch):
+    monkeypatch.setattr(mixer, "open_mixer", lambda *args: FakeMixer())
+    qtile = FakeQtile()
+    statuses = []
+    watcher = mixer.subscribe(qtile, None, None, "Master", statuses.append)
+    fake = watcher.mixer
+    fake.muted = True
+    qtile.readers[42]()
+
+    # a lost connection isn't a mute
+    fake.connected = False
+    qtile.readers[42]()
+    assert statuses == [(50, False), (50, True), mixer.LOST]
+    assert fake.closed
+    assert not qtile.readers
+    assert not watcher.subscribers
+    mixer.unsubscribe(watcher, statuses.append)
+
+    # subscribing again opens the mixer again
+    other = mixer.subscribe(qtile, None, None, "Master", statuses.append)
+    assert other is not watcher
+    assert other.mixer is not fake
+    assert qtile.readers
+    mixer.finalize(qtile)
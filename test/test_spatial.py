@@ -0,0 +1,29 @@
+from libqtile.spatial import RectIndex
+
+
+def test_rect_index():
+    index = RectIndex(cell_size=100)
+    index.update("left", 0, 0, 150, 300)
+    index.update("right", 150, 0, 400, 300)
+    assert index.at(50, 50) == ["left"]
+    assert index.at(150, 120) == ["left", "right"]
+    assert index.at(399, 299) == ["right"]
+    assert index.at(401, 10) == []
+
+    index.update("left", 500, 500, 600, 600)
+    assert index.at(50, 50) == []
+    assert index.at(550, 600) == ["left"]
+
+    index.remove("left")
+    index.remove("missing")
+    assert "left" not in index
+    assert index.at(550, 550) == []
+    assert len(index) == 1
+
+
+def test_rect_index_negative():
+    index = RectIndex(cell_size=100)
+    index.update("above", -50, -1080, 1870, 0)
+    assert index.at(-10, -10) == ["above"]
+    assert index.at(0, 0) == ["above"]
+    assert index.at(0, 1) == []
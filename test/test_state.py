@@ -0,0 +1,112 @@
+import marshal
+import os
+import pickle
+import struct
+
+import pytest
+
+from libqtile import window
+from libqtile.core.manager import Qtile
+from libqtile.state import QtileState, STATE_VERSION, _HEADER, _MAGIC
+
+
+class FakeLayout:
+    name = "columns"
+    state_version = 1
+
+    def get_state(self):
+        return {"clients": [2, 1], "current": 1}
+
+
+class FakeXWindow:
+    def __init__(self, wid):
+        self.wid = wid
+
+
+class FakeWindow:
+    def __init__(self, wid, float_state):
+        self.window = FakeXWindow(wid)
+        self._float_state = float_state
+        self.x, self.y, self.width, self.height = 10, 20, 300, 200
+
+
+class FakeGroup:
+    def __init__(self, name, windows):
+        self.name = name
+        self.label = name
+        self.layout = FakeLayout()
+        self.layouts = [self.layout]
+        self.windows = set(windows)
+        self.focus_history = list(windows)
+
+
+class FakeScreen:
+    def __init__(self, group):
+        self.group = group
+
+
+class FakeQtile:
+    def __init__(self):
+        windows = [
+            FakeWindow(1, window.NOT_FLOATING),
+            FakeWindow(2, window.FLOATING),
+        ]
+        self.groups = [FakeGroup("a", windows), FakeGroup("b", [])]
+        self.screens = [FakeScreen(self.groups[0])]
+        self.current_screen = self.screens[0]
+
+
+def test_save_load(tmp_path):
+    path = str(tmp_path / "state")
+    with open(path, "wb") as f:
+        QtileState(FakeQtile()).save(f)
+
+    state = QtileState.load(path)
+    assert state.groups == [("a", "columns", "a"), ("b", "columns", "b")]
+    assert state.screens == {0: "a"}
+    assert state.current_screen == 0
+    assert state.windows == {
+        1: ("a", False, 10, 20, 300, 200),
+        2: ("a", True, 10, 20, 300, 200),
+    }
+    assert state.focus_history == {"a": [1, 2], "b": []}
+    assert state.layouts["a"] == [
+        ("columns", 1, {"clients": [2, 1], "current": 1})
+    ]
+
+
+def test_load_other_version(tmp_path):
+    path = str(tmp_path / "state")
+    with open(path, "wb") as f:
+        QtileState(FakeQtile()).save(f)
+    with open(path, "r+b") as f:
+        f.seek(4)
+        f.write(struct.pack("<H", 0))
+    with pytest.raises(ValueError):
+        QtileState.load(path)
+
+    with open(path, "wb") as f:
+        f.write(b"QTST")
+    with pytest.raises(ValueError):
+        QtileState.load(path)
+
+
+def test_load_state_never_fails(tmp_path):
+    path = str(tmp_path / "state")
+    payload = marshal.dumps(["not", "a", "dict"])
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, STATE_VERSION, len(payload)))
+        f.write(payload)
+    with pytest.raises(TypeError):
+        QtileState.load(path)
+
+    # on startup, a broken state file is logged and removed
+    assert Qtile._load_state(None, path) is None
+    assert not os.path.exists(path)
+
+
+def test_pickled_state():
+    # cmd_get_state returns the state pickled, which --with-state accepts
+    state = QtileState(FakeQtile())
+    pickled = pickle.dumps(state, protocol=0).decode()
+    assert vars(Qtile._load_state(None, pickled)) == vars(state)
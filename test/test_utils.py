@@ -20,6 +20,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
+import stat
+import tempfile
+
+import pytest
+
 import libqtile.utils as utils
 
 
@@ -57,3 +63,25 @@ def test_shuffle():
     assert test_l != list(range(3))
     utils.shuffle_down(test_l)
     assert test_l == list(range(3))
+
+
+def test_get_runtime_dir(tmpdir, monkeypatch):
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmpdir))
+    path = utils.get_runtime_dir()
+    assert path == str(tmpdir.join("qtile-%d" % os.getuid()))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+    assert utils.get_runtime_dir() == path
+
+    # a directory others can write to isn't used
+    os.chmod(path, 0o777)
+    with pytest.raises(utils.QtileError):
+        utils.get_runtime_dir()
+    os.rmdir(path)
+
+    # nor is a symlink, e.g. to a directory of another user
+    target = tmpdir.mkdir("target")
+    target.chmod(0o700)
+    os.symlink(str(target), path)
+    with pytest.raises(utils.QtileError):
+        utils.get_runtime_dir()
@@ -0,0 +1,35 @@
+import struct
+
+from libqtile import window
+
+
+def _argb(pixels):
+    # pixels as (a, r, g, b) tuples, packed as native endian ARGB32
+    return b"".join(
+        struct.pack("=I", a << 24 | r << 16 | g << 8 | b) for a, r, g, b in pixels
+    )
+
+
+def test_net_wm_icons():
+    data = (
+        struct.pack("=II", 1, 2) + _argb([(255, 1, 2, 3), (0, 4, 5, 6)]) +
+        struct.pack("=II", 2, 1) + _argb([(128, 255, 128, 0), (255, 9, 8, 7)])
+    )
+    icons = window.NetWmIcons(data)
+    assert sorted(icons) == ["1x2", "2x1"]
+    assert len(icons) == 2
+    assert bytes(icons["1x2"]) == _argb([(255, 1, 2, 3), (0, 0, 0, 0)])
+    assert bytes(icons["2x1"]) == _argb([(128, 128, 64, 0), (255, 9, 8, 7)])
+
+
+def test_net_wm_icons_truncated():
+    data = struct.pack("=II", 1, 1) + _argb([(255, 1, 1, 1)]) + struct.pack("=II", 4, 4)
+    icons = window.NetWmIcons(data)
+    assert list(icons) == ["1x1"]
+
+
+def test_premultiply_without_numpy(monkeypatch):
+    monkeypatch.setattr(window, "_get_numpy", lambda: None)
+    data = _argb([(51, 255, 100, 5), (255, 1, 2, 3)])
+    expected = _argb([(51, 51, 20, 1), (255, 1, 2, 3)])
+    assert bytes(window.premultiply_argb32(data)) == expected
@@ -0,0 +1,194 @@
+from types import SimpleNamespace
+
+import cairocffi
+import pytest
+
+from libqtile import drawer
+from libqtile.widget.graph import _Graph, _RingBuffer
+
+
+def test_ring_buffer_push():
+    values = _RingBuffer(4)
+    for i in range(1, 7):
+        values.push(i)
+    assert list(values) == [6, 5, 4, 3]
+    assert values[0] == 6
+    assert values[-1] == 3
+    assert list(values.oldest_first()) == [3, 4, 5, 6]
+    assert values.max() == 6
+
+    with pytest.raises(IndexError):
+        values[4]
+
+
+def test_ring_buffer_lag():
+    values = _RingBuffer(4)
+    values.push(1)
+    values.push(2, count=2)
+    assert list(values) == [2, 2, 1, 0]
+    values.push(3, count=10)
+    assert list(values) == [3, 3, 3, 3]
+
+
+def test_ring_buffer_fill():
+    values = _RingBuffer(3)
+    values.push(5)
+    values.fill(2)
+    assert list(values) == [2, 2, 2]
+    assert len(values) == 3
+
+
+class FakeCore:
+    """Copies areas within the drawer's image surface like X would"""
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.copies = []
+
+    def CopyArea(self, src, dst, gc, src_x, src_y, dst_x, dst_y,  # noqa: N802
+                 width, height):
+        self.copies.append((src, dst))
+        if src != dst:
+            # drawing onto the bar window
+            return
+        data = self.surface.get_data()
+        stride = self.surface.get_stride()
+        rows = [
+            bytes(data[(src_y + i) * stride + src_x * 4:
+                       (src_y + i) * stride + (src_x + width) * 4])
+            for i in range(height)
+        ]
+        for i, row in enumerate(rows):
+            start = (dst_y + i) * stride + dst_x * 4
+            data[start:start + width * 4] = row
+
+
+class ImageDrawer(drawer.Drawer):
+    """A Drawer painting to an image surface instead of an X pixmap"""
+
+    def __init__(self, width, height):
+        self.wid, self.width, self.height = "window", width, height
+        self.pixmap, self.gc = "pixmap", None
+        self.surface = cairocffi.ImageSurface(
+            cairocffi.FORMAT_ARGB32, width, height
+        )
+        self.core = FakeCore(self.surface)
+        self.qtile = SimpleNamespace(
+            conn=SimpleNamespace(conn=SimpleNamespace(core=self.core))
+        )
+        self.ctx = self.new_ctx()
+        self.clear((0, 0, 1))
+
+    def pixels(self):
+        self.surface.flush()
+        return bytes(self.surface.get_data())
+
+
+def test_copy_area():
+    d = ImageDrawer(20, 10)
+    d.clear("000000")
+    d.set_source_rgb("ff0000")
+    d.fillrect(0, 0, 5, 10)
+    d.copy_area(0, 2, 5, 4, 10, 3)
+    assert d.core.copies == [("pixmap", "pixmap")]
+
+    # cairo sees the copied pixels
+    data = d.pixels()
+    stride = d.surface.get_stride()
+
+    def red(x, y):
+        return data[y * stride + x * 4 + 2] == 0xff
+
+    assert [red(12, y) for y in range(10)] == [False] * 3 + [True] * 4 + \
+        [False] * 3
+    assert not red(15, 4)
+    assert red(4, 0)
+
+
+def make_graph(graph_type, samples, width=110, **config):
+    graph = _Graph(
+        width=width, type=graph_type, samples=samples, incremental=True,
+        **config
+    )
+    graph.bar = SimpleNamespace(
+        height=24, size=24, horizontal=True, background="000000"
+    )
+    graph.offsetx = 0
+    graph.drawer = ImageDrawer(width, 24)
+    return graph
+
+
+# the samples of each type for a step of 5 pixels in a 100 pixels wide graph
+STEPS = [("box", 20), ("line", 21), ("linefill", 22)]
+
+
+@pytest.mark.parametrize("graph_type, samples", STEPS)
+def test_can_scroll(graph_type, samples):
+    graph = make_graph(graph_type, samples)
+    graph.maxvalue = 10
+    # nothing drawn yet
+    assert not graph._can_scroll()
+    graph.draw()
+    assert graph._can_scroll()
+
+    graph.length = 120
+    assert not graph._can_scroll()
+    graph.length = 110
+    graph.bar.height = 30
+    assert not graph._can_scroll()
+    graph.bar.height = 24
+    graph.maxvalue = 20
+    assert not graph._can_scroll()
+    graph.maxvalue = 10
+    assert graph._can_scroll()
+
+    graph.incremental = False
+    assert not graph._can_scroll()
+
+    # a step which isn't a whole number of pixels
+    graph = make_graph(graph_type, samples + 1)
+    graph.draw()
+    assert not graph._can_scroll()
+
+
+@pytest.mark.parametrize("graph_type, samples", STEPS)
+def test_push_falls_back_to_draw(graph_type, samples):
+    graph = make_graph(graph_type, samples)
+    calls = []
+    graph.draw_incremental = lambda: calls.append("incremental")
+    graph.draw = lambda: calls.append("draw")
+    graph._drawn = (graph.width, graph.bar.height, graph._scale())
+    graph.lag_cycles = 1
+
+    graph.push(0)
+    assert calls == ["incremental"]
+    # a new maximum changes the scale
+    graph.push(5)
+    assert calls[-1] == "draw"
+    graph._drawn = (graph.width, graph.bar.height, graph._scale())
+    # so does lag, which pushes several samples at once
+    graph.lag_cycles = 3
+    graph.push(1)
+    assert calls[-1] == "draw"
+
+
+@pytest.mark.parametrize("graph_type, samples", STEPS)
+@pytest.mark.parametrize("start_pos", ["bottom", "top"])
+def test_draw_incremental_matches_draw(graph_type, samples, start_pos):
+    incremental = make_graph(graph_type, samples, start_pos=start_pos)
+    full = make_graph(graph_type, samples, start_pos=start_pos)
+    for graph in (incremental, full):
+        graph.fixed_upper_bound = True
+        graph.maxvalue = 100
+        graph.lag_cycles = 1
+        graph.draw()
+
+    # including the extremes, where lines reach into the borders
+    values = [0, 100, 37, 5, 100, 100, 64, 0, 0, 83, 12, 99, 50, 1]
+    for value in values * 3:
+        incremental.push(value)
+        full.values.push(value)
+        full.draw()
+        assert incremental.drawer.pixels() == full.drawer.pixels()
+    assert incremental.drawer.core.copies.count(("pixmap", "pixmap")) == \
+        len(values) * 3
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pytest
+
+from libqtile import hook
+from libqtile.widget import base
+from libqtile.widget.groupbox import GroupBox
+
+
+class FakeContext:
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+class FakeDrawer:
+    def __init__(self):
+        self.ctx = FakeContext()
+        self.cleared = 0
+
+    def max_layout_size(self, texts, font, fontsize):
+        return 10 * len(texts[0]), fontsize
+
+    def textlayout(self, *args, **kwargs):
+        return None
+
+    def clear(self, colour):
+        self.cleared += 1
+
+    def set_source_rgb(self, colour):
+        pass
+
+    def draw(self, offsetx=None, width=None):
+        pass
+
+
+@pytest.fixture
+def groupbox(monkeypatch):
+    def configure(self, qtile, bar):
+        self.qtile = qtile
+        self.bar = bar
+        self.drawer = FakeDrawer()
+
+    monkeypatch.setattr(base._Widget, "_configure", configure)
+    groups = [
+        SimpleNamespace(name=name, label=name, windows=[], screen=None)
+        for name in "abc"
+    ]
+    screen = SimpleNamespace(group=groups[0])
+    groups[0].screen = screen
+    qtile = SimpleNamespace(groups=groups, current_screen=screen)
+    bar = SimpleNamespace(
+        horizontal=True, height=24, background="000000", screen=screen,
+        draw=lambda: None,
+    )
+
+    widget = GroupBox()
+    widget.offsetx = 0
+    widget.length_type = base.bar.CALCULATED
+    widget._configure(qtile, bar)
+    widget.painted = []
+    monkeypatch.setattr(
+        widget, "drawbox",
+        lambda offset, text, *args, **kwargs: widget.painted.append(text)
+    )
+    yield widget
+    hook.clear()
+
+
+def test_repaint_changed_box(groupbox):
+    groupbox.draw()
+    assert groupbox.drawer.cleared == 1
+    assert groupbox.painted == ["a", "b", "c"]
+
+    # nothing changed, nothing is painted
+    groupbox.painted = []
+    groupbox.draw()
+    assert groupbox.painted == []
+
+    # a group got a window: its box is repainted, with its neighbours
+    # clipped to it
+    groupbox.qtile.groups[2].windows.append(SimpleNamespace(urgent=False))
+    groupbox.draw()
+    assert groupbox.drawer.cleared == 1
+    assert groupbox.painted == ["b", "c"]
+
+
+def test_repaint_after_configure(groupbox):
+    groupbox.draw()
+    groupbox.painted = []
+
+    # a new drawer is blank, all the boxes are painted on it
+    groupbox._configure(groupbox.qtile, groupbox.bar)
+    groupbox.draw()
+    assert groupbox.drawer.cleared == 1
+    assert groupbox.painted == ["a", "b", "c"]
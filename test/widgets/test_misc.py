@@ -21,10 +21,16 @@
 
 # Widget specific tests
 
+import asyncio
+import threading
+
 import pytest
+from libqtile import metrics
 from libqtile.config import Screen
 from libqtile.bar import Bar
-from libqtile.widget import TextBox, ThermalSensor
+from libqtile.widget import DF, Net, TextBox, ThermalSensor, base
+from libqtile.widget import graph, memory
+from libqtile.widget.generic_poll_text import GenPollUrl
 from ..conftest import BareConfig
 
 
@@ -74,3 +80,160 @@ def test_thermalsensor_regex_compatibility():
     assert sensors_detected["Core 2"] == ("58.0", "°C")
     assert sensors_detected["Core 3"] == ("61.0", "°C")
     assert not ("Adapter" in sensors_detected.keys())
+
+
+class BlockingPoll(base.ThreadedPollText):
+    def __init__(self, **config):
+        base.ThreadedPollText.__init__(self, **config)
+        self.qtile = None
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def poll(self):
+        self.started.set()
+        self.release.wait(5)
+        return "done"
+
+
+def test_threaded_poll_single_flight():
+    widget = BlockingPoll()
+    widget.tick()
+    widget.tick()
+    widget.tick()
+    assert widget.poll_stats["skipped"] == 2
+
+    widget.release.set()
+    widget._poll_future.result(5)
+    assert widget.poll_stats["polls"] == 1
+    assert widget.poll_stats["errors"] == 0
+    assert widget.poll_stats["max"] >= widget.poll_stats["last"] > 0
+
+
+def test_threaded_poll_hanging_polls():
+    # more widgets hanging than the initial pool size
+    widgets = [BlockingPoll() for _ in range(base.POLL_WORKERS + 2)]
+    for widget in widgets:
+        widget.tick()
+    try:
+        # every widget got a thread of its own
+        for widget in widgets:
+            assert widget.started.wait(5)
+    finally:
+        for widget in widgets:
+            widget.release.set()
+    for widget in widgets:
+        widget._poll_future.result(5)
+
+
+class SlowAsyncPoll(base.AsyncPollText):
+    def __init__(self, **config):
+        base.AsyncPollText.__init__(self, **config)
+        self.qtile = None
+
+    async def poll(self):
+        await asyncio.sleep(1)
+        return "done"
+
+
+def test_async_poll_timeout_backoff():
+    widget = SlowAsyncPoll(update_interval=2, poll_timeout=0.01, max_backoff=5)
+    loop = asyncio.new_event_loop()
+    try:
+        assert widget.next_delay() == 2
+        assert not loop.run_until_complete(widget._poll_once())
+        assert widget.failures == 1
+        assert widget.next_delay() == 4
+        assert not loop.run_until_complete(widget._poll_once())
+        assert widget.next_delay() == 5
+
+        async def fast_poll():
+            return "done"
+        widget.poll = fast_poll
+        assert loop.run_until_complete(widget._poll_once())
+        assert widget.failures == 0
+        assert widget.next_delay() == 2
+    finally:
+        loop.close()
+
+
+class FakeLoopQtile:
+    def __init__(self, loop):
+        self.loop = loop
+        self.updates = []
+
+    def run_in_executor(self, func, *args):
+        return self.loop.run_in_executor(None, func, *args)
+
+    def call_soon(self, func, *args):
+        self.updates.append(args)
+
+
+def test_gen_poll_url():
+    fetched = []
+    hang = threading.Event()
+
+    class Fetched(GenPollUrl):
+        def fetch(self, url, data=None, headers=None, is_json=True,
+                  is_xml=False):
+            fetched.append((url, data, headers))
+            hang.wait(5)
+            return {"price": 42}
+
+    widget = Fetched(
+        url="http://localhost/", data={"a": 1}, poll_timeout=0.1,
+        parse=lambda body: "%(price)d" % body,
+    )
+    loop = asyncio.new_event_loop()
+    widget.qtile = FakeLoopQtile(loop)
+    try:
+        # a hanging fetch only times out the poll, not the event loop
+        assert not loop.run_until_complete(widget._poll_once())
+        assert widget.failures == 1
+        hang.set()
+        assert loop.run_until_complete(widget._poll_once())
+        assert widget.qtile.updates == [("42",)]
+        url, data, headers = fetched[-1]
+        assert data == b'{"a": 1}'
+        assert headers["Content-Type"] == "application/json"
+    finally:
+        hang.set()
+        loop.close()
+
+
+class FakeTimerQtile:
+    def __init__(self, loop):
+        self.loop = loop
+        self.updates = []
+
+    def call_later(self, delay, func, *args):
+        return self.loop.call_later(delay, func, *args)
+
+    def call_soon_threadsafe(self, func, *args):
+        self.updates.append(args)
+
+
+@pytest.mark.parametrize("widget_class", [DF, Net])
+def test_metrics_widget_polls_once(widget_class):
+    widget = widget_class(update_interval=None, interface="lo")
+    loop = asyncio.new_event_loop()
+    widget.qtile = FakeTimerQtile(loop)
+    try:
+        widget.timer_setup()
+        assert widget._sampler is None
+        widget._poll_future.result(5)
+        assert widget.poll_stats["errors"] == 0
+        assert len(widget.qtile.updates) == 1
+    finally:
+        loop.close()
+
+
+def test_one_off_samples_not_shared():
+    sources = dict(metrics._sources)
+    memory.get_meminfo()
+    graph.get_meminfo()
+    graph.CPUGraph()
+    graph.NetGraph(interface="lo")
+    graph.HDDGraph()
+    DF().poll()
+    Net(interface="lo").poll()
+    assert metrics._sources == sources
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("mpd")
+
+from libqtile.widget.mpd2widget import Mpd2  # noqa: E402
+
+
+class FakeQtile:
+    in_callback = False
+
+    def call_soon(self, func, *args):
+        def callback():
+            self.in_callback = True
+            try:
+                func(*args)
+            finally:
+                self.in_callback = False
+        asyncio.get_event_loop().call_soon(callback)
+
+
+class FakeAsyncClient:
+    """Plays a song, reports a change, then fails unexpectedly"""
+    connects = 0
+    reconnected = None
+
+    def __init__(self):
+        self.state = "stop"
+        self.disconnected = False
+
+    async def connect(self, host, port):
+        FakeAsyncClient.connects += 1
+        if FakeAsyncClient.connects > 1:
+            # stay disconnected
+            FakeAsyncClient.reconnected.set()
+            await asyncio.Event().wait()
+
+    async def status(self):
+        await asyncio.sleep(0)
+        return {"state": self.state}
+
+    async def currentsong(self):
+        return {"title": "song"}
+
+    async def idle(self, subsystems):
+        self.state = "play"
+        yield ["player"]
+        await asyncio.sleep(0)
+        raise RuntimeError("unexpected")
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+def test_idle_loop():
+    widget = Mpd2(status_format="{play_status} {title}", update_interval=0,
+                  idle=True)
+    widget.qtile = FakeQtile()
+    texts = []
+
+    def update(text):
+        # coroutines don't flush X, the widget must draw from a callback
+        assert widget.qtile.in_callback
+        texts.append(text)
+    widget.update = update
+
+    async def run():
+        FakeAsyncClient.connects = 0
+        FakeAsyncClient.reconnected = asyncio.Event()
+        task = asyncio.ensure_future(widget._idle_loop(FakeAsyncClient))
+        await asyncio.wait_for(FakeAsyncClient.reconnected.wait(), 5)
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    assert texts == ["\u25a0 song", "\u25b6 song", widget.no_connection]
+    # the unexpected error was logged, and the widget tried to reconnect
+    assert FakeAsyncClient.connects == 2
+    assert widget.async_client is None
+
+
+class FakeCommandClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.commands = []
+
+    async def status(self):
+        return {"state": "play"}
+
+    async def pause(self):
+        if self.error is not None:
+            raise self.error
+        self.commands.append("pause")
+
+
+def test_async_command():
+    widget = Mpd2(idle=True)
+    loop = asyncio.new_event_loop()
+    try:
+        widget.async_client = FakeCommandClient()
+        loop.run_until_complete(widget._async_command(widget.keys["toggle"]))
+        assert widget.async_client.commands == ["pause"]
+
+        # a failing command is logged, it doesn't end up in the event loop
+        widget.async_client = FakeCommandClient(RuntimeError("unexpected"))
+        loop.run_until_complete(widget._async_command(widget.keys["toggle"]))
+    finally:
+        loop.close()
@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import pytest
+
+from libqtile import hook
+from libqtile.widget import base
+from libqtile.widget.tasklist import TaskList
+
+
+class FakeLayout:
+    pass
+
+
+class FakeDrawer:
+    def __init__(self):
+        self.measured = []
+
+    def max_layout_size(self, texts, font, fontsize):
+        self.measured.extend(texts)
+        return 10 * len(texts[0]), fontsize
+
+    def textlayout(self, *args, **kwargs):
+        return FakeLayout()
+
+
+class FakeGroup:
+    def __init__(self):
+        self.windows = []
+        self.current_window = None
+
+
+class FakeWindow:
+    minimized = maximized = floating = False
+
+    def __init__(self, group, name):
+        self.group = group
+        self.name = name
+        self.window = SimpleNamespace(wid=id(self))
+
+
+class FakeBar:
+    horizontal = True
+    height = 24
+
+    def __init__(self, group):
+        self.screen = SimpleNamespace(group=group)
+
+    def draw(self):
+        pass
+
+
+@pytest.fixture
+def tasklist(monkeypatch):
+    def configure(self, qtile, bar):
+        self.qtile = qtile
+        self.bar = bar
+        self.drawer = FakeDrawer()
+
+    monkeypatch.setattr(base._Widget, "_configure", configure)
+    group = FakeGroup()
+    widget = TaskList(icon_size=0, padding_x=0, borderwidth=0)
+    widget.length = 1000
+    widget._configure(None, FakeBar(group))
+    yield widget
+    hook.clear()
+
+
+def test_task_widths_cached(tasklist):
+    group = tasklist.bar.screen.group
+    a, b = FakeWindow(group, "a"), FakeWindow(group, "bb")
+    group.windows = [a, b]
+
+    boxes = list(tasklist.calc_box_widths())
+    assert [w for _, _, _, w in boxes] == [10, 20]
+    assert tasklist.drawer.measured == ["a", "bb"]
+
+    # nothing changed, nothing is measured again
+    list(tasklist.calc_box_widths())
+    assert tasklist.drawer.measured == ["a", "bb"]
+
+    # a renamed window is measured again
+    b.name = "ccc"
+    boxes = list(tasklist.calc_box_widths())
+    assert [w for _, _, _, w in boxes] == [10, 30]
+    assert tasklist.drawer.measured == ["a", "bb", "ccc"]
+
+    # so is a window whose state changed its task name
+    a.floating = True
+    list(tasklist.calc_box_widths())
+    assert tasklist.drawer.measured[-1] == tasklist.txt_floating + "a"
+
+    tasklist.remove_window(a)
+    assert a not in tasklist._task_widths
+
+    # reconfiguring (e.g. a new font) measures everything again
+    tasklist._configure(None, tasklist.bar)
+    list(tasklist.calc_box_widths())
+    assert tasklist.drawer.measured == [tasklist.txt_floating + "a", "ccc"]
+
+
+@pytest.mark.parametrize("margin_x, spacing, ends", [
+    (3, 0, [10, 20, 35]),
+    (3, 4, [10, 24, 30, 50]),
+    (0, 2, [1, 4, 7]),
+])
+def test_get_clicked(tasklist, margin_x, spacing, ends):
+    group = tasklist.bar.screen.group
+    group.windows = [FakeWindow(group, str(i)) for i in range(len(ends))]
+    tasklist.margin_x = margin_x
+    tasklist.spacing = spacing
+    tasklist._box_end_positions = ends
+
+    def linear_scan(x):
+        box_start = margin_x
+        for box_end, win in zip(ends, group.windows):
+            if box_start <= x <= box_end:
+                return win
+            box_start = box_end + spacing
+        return None
+
+    for x in range(-1, ends[-1] + 3):
+        assert tasklist.get_clicked(x, 0) is linear_scan(x), x
+
+    # a window closed since the last draw
+    group.windows.pop()
+    assert tasklist.get_clicked(ends[-1], 0) is None
@@ -1,6 +1,6 @@
 import pytest
-from libqtile.widget import Volume
-from libqtile import images
+from libqtile.widget import Volume, volume
+from libqtile import images, mixer
 import cairocffi
 from .conftest import TEST_DIR
 
@@ -28,3 +28,76 @@ def test_images_good(tmpdir, fake_bar, svg_img_as_pypath):
     assert len(vol.surfaces) == len(names)
     for name, surfpat in vol.surfaces.items():
         assert isinstance(surfpat, cairocffi.SurfacePattern)
+
+
+class FakeMixer:
+    blocking = False
+
+    def __init__(self):
+        self.connected = True
+
+    def fds(self):
+        return [42]
+
+    def handle_events(self):
+        return self.connected
+
+    def status(self):
+        return mixer.MixerStatus(50, False)
+
+    def close(self):
+        pass
+
+
+class FakeQtile:
+    def __init__(self):
+        self.readers = {}
+        self.timers = []
+
+    def add_reader(self, fd, func):
+        self.readers[fd] = func
+
+    def remove_reader(self, fd):
+        del self.readers[fd]
+
+    def call_later(self, delay, func, *args):
+        self.timers.append(func)
+
+
+def test_mixer_lost(monkeypatch):
+    opened = []
+
+    def open_mixer(*args):
+        if len(opened) == 2:
+            return None
+        opened.append(FakeMixer())
+        return opened[-1]
+
+    now = [0]
+    monkeypatch.setattr(mixer, "open_mixer", open_mixer)
+    monkeypatch.setattr(volume.time, "monotonic", lambda: now[0])
+    vol = Volume()
+    vol.qtile = FakeQtile()
+    volumes = []
+    monkeypatch.setattr(vol, "_set_volume", volumes.append)
+    monkeypatch.setattr(vol, "get_volume", lambda: 20)
+    vol.timer_setup()
+    assert vol.mixer is not None
+    assert volumes == [50]
+
+    # the mixer is opened again, e.g. when alsactl monitor was killed
+    now[0] = volume.MIXER_RETRY
+    opened[0].connected = False
+    vol.qtile.readers[42]()
+    assert len(opened) == 2
+    assert vol.mixer is not None
+    assert volumes == [50, 50]
+    assert vol.qtile.timers == []
+
+    # it is lost again right away, the widget polls instead
+    opened[1].connected = False
+    vol.qtile.readers[42]()
+    assert vol.mixer is None
+    assert volumes == [50, 50, 20]
+    assert len(vol.qtile.timers) == 1
+    mixer.finalize(vol.qtile)